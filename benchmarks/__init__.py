@@ -0,0 +1,3 @@
+"""
+Offline benchmarks of building queries, creating filters and filtering DataFrames, see `python -m benchmarks --help`.
+"""
@@ -0,0 +1,372 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import transude as txd
+from typing import Callable, Dict, Iterator, List, Tuple
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_factory import DataFrameFilterFactory
+from transude.data_frame_filter_manager import DataFrameFilterManager
+
+PRESETS = {
+    'quick': {'rows': [1_000, 100_000], 'filters': [1, 10]},
+    'standard': {'rows': [1_000, 100_000, 1_000_000], 'filters': [1, 10, 100, 1_000]},
+    'full': {'rows': [1_000, 100_000, 1_000_000, 10_000_000, 50_000_000], 'filters': [1, 10, 100, 1_000, 10_000]},
+}
+OPERATORS = ['numeric', 'datetime', 'contains', 'regex']
+SHAPES = ['and', 'or', 'groups']
+ENGINES = ['query', 'mask']
+HOSTS = np.array([f"{role}-{number:02d}.{site}" for role in ('web', 'db', 'cache', 'queue')
+                  for number in range(25) for site in ('eu', 'us')], dtype=object)
+START = pd.Timestamp('2022-01-01')
+
+Case = Tuple[str, int, str, Callable[[], tuple], Callable[..., object]]
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Make a DataFrame with integer, float, datetime, text and categorical columns.
+
+    :param rows: int
+    The number of rows.
+    :param seed: int (default: 0)
+    The seed of the random values, so that every run filters the same DataFrame.
+    :return: pd.DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': np.arange(rows),
+        'price': rng.uniform(0, 100, rows),
+        'when': START + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, rows), unit='s'),
+        'host': HOSTS[rng.integers(0, len(HOSTS), rows)],
+        'level': pd.Categorical.from_codes(rng.integers(0, 3, rows), categories=['INFO', 'WARN', 'ERROR']),
+    })
+
+
+def make_filter(operator: str, index: int, rng: np.random.Generator, **kwargs) -> DataFrameFilter:
+    """
+    Make the index-th filter of an operator mix. Comparisons alternate between lower and upper bounds.
+
+    :param operator: str
+    One of 'numeric', 'datetime', 'contains', 'regex' or 'mixed', which cycles through the others.
+    :param index: int
+    The position of the filter, deciding its comparison and, for 'mixed', its operator.
+    :param rng: np.random.Generator
+    The generator of the values.
+    :param kwargs:
+    Further arguments of the DataFrameFilter, such as filter_id and joiner.
+    :return: DataFrameFilter
+    """
+    if operator == 'mixed':
+        operator = OPERATORS[index % len(OPERATORS)]
+    comparison = '>' if index % 2 == 0 else '<'
+    if operator == 'numeric':
+        value = float(rng.uniform(0, 50) if comparison == '>' else rng.uniform(50, 100))
+        return DataFrameFilter(column='price', value=value, operator=comparison, **kwargs)
+    if operator == 'datetime':
+        days = int(rng.integers(0, 180) if comparison == '>' else rng.integers(180, 365))
+        value = (START + pd.Timedelta(days=days)).strftime('%Y-%m-%d')
+        return DataFrameFilter(column='when', value=value, operator=comparison, **kwargs)
+    if operator == 'contains':
+        return DataFrameFilter(column='host', value=f"-{int(rng.integers(0, 25)):02d}.", operator='contains',
+                               **kwargs)
+    if operator == 'regex':
+        value = rf"^(?:web|db)-{int(rng.integers(0, 3))}\d\."
+        return DataFrameFilter(column='host', value=value, operator='contains', regex=True, **kwargs)
+    raise ValueError(f"Invalid operator mix: {operator}")
+
+
+def make_filters(operator: str, count: int, shape: str, seed: int = 0) -> List[DataFrameFilter]:
+    """
+    Make the filters of a benchmark case.
+
+    :param operator: str
+    The operator mix, see make_filter.
+    :param count: int
+    The number of filters.
+    :param shape: str
+    How the filters are grouped: 'and' puts each filter in a group of its own, 'or' puts all filters in one group
+    joined by 'or', and 'groups' makes groups of 10 filters joined by 'or'.
+    :param seed: int (default: 0)
+    The seed of the values.
+    :return: List[DataFrameFilter]
+    """
+    rng = np.random.default_rng(seed)
+    if shape == 'and':
+        return [make_filter(operator, index, rng, filter_id=index) for index in range(count)]
+    if shape == 'or':
+        return [make_filter(operator, index, rng, filter_id=0, joiner='or') for index in range(count)]
+    if shape == 'groups':
+        return [make_filter(operator, index, rng, filter_id=index // 10, joiner='or') for index in range(count)]
+    raise ValueError(f"Invalid group shape: {shape}")
+
+
+def get_cases(rows: List[int], filters: List[int], operators: List[str] = None, shapes: List[str] = None,
+              engines: List[str] = None, max_cells: float = 2e9) -> Iterator[Case]:
+    """
+    Generate the benchmark cases as (name, units, unit, setup, run), where setup returns the arguments of run and is
+    not timed, and units is the number of rows or filters processed by a run.
+
+    :param rows: List[int]
+    The frame sizes of the filter_df cases.
+    :param filters: List[int]
+    The filter counts of all cases.
+    :param operators: List[str] (default: None)
+    The operator mixes. Defaults to all of OPERATORS and 'mixed'.
+    :param shapes: List[str] (default: None)
+    The group shapes. Defaults to all of SHAPES.
+    :param engines: List[str] (default: None)
+    The engines of the filter_df cases. Defaults to all of ENGINES.
+    :param max_cells: float (default: 2e9)
+    filter_df cases evaluating more filters times rows are skipped.
+    :return: Iterator[Case]
+    """
+    operators = operators or OPERATORS + ['mixed']
+    shapes = shapes or SHAPES
+    engines = engines or ENGINES
+
+    for count in filters:
+        for shape in shapes:
+            df_filters = make_filters('mixed', count, shape)
+
+            def setup(df_filters=df_filters):
+                # A new manager has no cached query
+                return DataFrameFilterManager(list(df_filters)),
+
+            yield f"build_query[filters={count},shape={shape}]", count, 'filters', setup, \
+                DataFrameFilterManager.build_query
+
+        df_filter_manager = DataFrameFilterManager(make_filters('mixed', count, 'and'))
+        df_filter_manager.build_query()
+        yield f"build_query[filters={count},cached=True]", count, 'filters', \
+            lambda df_filter_manager=df_filter_manager: (df_filter_manager,), DataFrameFilterManager.build_query
+
+        values = [str(value) for value in np.random.default_rng(0).integers(0, max(rows), count)]
+        for bulk in (False, True):
+            def setup(values=values, bulk=bulk):
+                return DataFrameFilterFactory(columns='id', values=values, operator='==', joiner='or', filter_id=0,
+                                              data_frame=make_frame(1), bulk=bulk),
+
+            yield f"create_filters[values={count},bulk={bulk}]", count, 'values', setup, \
+                DataFrameFilterFactory.create_filters
+
+    # Only the DataFrame of the current size is kept
+    data_frames = {}
+    for size in rows:
+        for count in filters:
+            if size * count > max_cells:
+                continue
+            for operator in operators:
+                for shape in shapes:
+                    if count == 1 and shape != shapes[0]:
+                        continue
+                    df_filter_manager = DataFrameFilterManager(make_filters(operator, count, shape))
+                    for engine in engines:
+                        def setup(df_filter_manager=df_filter_manager, size=size):
+                            if size not in data_frames:
+                                data_frames.clear()
+                                data_frames[size] = make_frame(size)
+                            return data_frames[size], df_filter_manager
+
+                        def run(data_frame, df_filter_manager, engine=engine):
+                            return txd.filter_df_via_manager(data_frame, df_filter_manager, engine=engine)
+
+                        yield f"filter_df[rows={size},filters={count},operator={operator},shape={shape}," \
+                              f"engine={engine}]", size, 'rows', setup, run
+
+
+def measure(setup: Callable[[], tuple], run: Callable[..., object], min_repeats: int = 3, max_repeats: int = 50,
+            min_time: float = 0.5) -> Dict[str, float]:
+    """
+    Time repeated runs until both min_repeats runs and min_time seconds are reached, then trace the peak memory
+    allocated by one more run. Memory is traced separately, as tracing slows runs down.
+
+    :param setup: Callable[[], tuple]
+    Returns the arguments of a run, and is not timed.
+    :param run: Callable[..., object]
+    The code to benchmark.
+    :param min_repeats: int (default: 3)
+    The minimum number of timed runs.
+    :param max_repeats: int (default: 50)
+    The maximum number of timed runs.
+    :param min_time: float (default: 0.5)
+    The minimum total time of the timed runs, in seconds.
+    :return: Dict[str, float]
+    The number of runs, the mean and percentiles of their latencies in seconds, and the peak traced memory in bytes.
+    """
+    timings = []
+    while len(timings) < max(min_repeats, 1) or (sum(timings) < min_time and len(timings) < max_repeats):
+        args = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(*args)
+        timings.append(time.perf_counter() - start)
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    p50, p90, p99 = np.percentile(timings, [50, 90, 99]).tolist()
+    return {'repeats': len(timings), 'mean': float(np.mean(timings)), 'p50': p50, 'p90': p90, 'p99': p99,
+            'peak_bytes': peak}
+
+
+def run_suite(cases: Iterator[Case], select: str = None, report: Callable[[str, dict], None] = None,
+              **measure_options) -> Dict[str, dict]:
+    """
+    Run benchmark cases.
+
+    :param cases: Iterator[Case]
+    The cases to run, see get_cases.
+    :param select: str (default: None)
+    Only cases whose name contains this string are run.
+    :param report: Callable[[str, dict], None] (default: None)
+    Called with the name and result of each case as soon as it finished.
+    :param measure_options:
+    Options passed to measure.
+    :return: Dict[str, dict]
+    The result of each case by name, with the throughput in units per second at the median latency.
+    """
+    results = {}
+    for name, units, unit, setup, run in cases:
+        if select is not None and select not in name:
+            continue
+        result = measure(setup, run, **measure_options)
+        result['throughput'] = units / result['p50'] if result['p50'] > 0 else float('inf')
+        result['unit'] = unit
+        results[name] = result
+        if report is not None:
+            report(name, result)
+    return results
+
+
+def get_environment() -> Dict[str, object]:
+    """
+    Describe the machine and library versions, which baselines are only comparable within.
+
+    :return: Dict[str, object]
+    """
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'platform': platform.platform(), 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def save_baseline(path: str, results: Dict[str, dict]) -> None:
+    """
+    Save results as a baseline to compare later runs against.
+
+    :param path: str
+    The JSON file to write.
+    :param results: Dict[str, dict]
+    The results of run_suite.
+    """
+    with open(path, 'w') as file:
+        json.dump({'environment': get_environment(), 'results': results}, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    """
+    Load the results of a baseline saved by save_baseline.
+
+    :param path: str
+    The JSON file to read.
+    :return: Dict[str, dict]
+    """
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            threshold: float = 1.25) -> List[Tuple[str, float, float, float, bool]]:
+    """
+    Compare the median latencies of results with those of a baseline.
+
+    :param results: Dict[str, dict]
+    The results of run_suite.
+    :param baseline: Dict[str, dict]
+    The results of the baseline. Cases missing from either are not compared.
+    :param threshold: float (default: 1.25)
+    The ratio of median latencies above which a case counts as a regression.
+    :return: List[Tuple[str, float, float, float, bool]]
+    The name, baseline median, median, ratio and whether it is a regression, of each compared case.
+    """
+    comparisons = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['p50'] / baseline[name]['p50'] if baseline[name]['p50'] > 0 else 1.0
+        comparisons.append((name, baseline[name]['p50'], result['p50'], ratio, ratio > threshold))
+    return comparisons
+
+
+def format_result(name: str, result: dict) -> str:
+    """
+    Format the result of a case as a line of the report.
+
+    :param name: str
+    The name of the case.
+    :param result: dict
+    The result of the case.
+    :return: str
+    """
+    return f"{name:<90} {result['repeats']:>4} {result['p50'] * 1e3:>10.3f} {result['p90'] * 1e3:>10.3f} " \
+           f"{result['p99'] * 1e3:>10.3f} {result['throughput']:>12.4g} {result['unit']:<7} " \
+           f"{result['peak_bytes'] / 1024 ** 2:>9.1f}"
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Run the benchmarks from the command line.
+
+    :param argv: List[str] (default: None)
+    The command line arguments. Defaults to sys.argv.
+    :return: int
+    The exit status, 1 if a case regressed against the compared baseline.
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Offline benchmarks of building queries, creating filters and "
+                                                 "filtering DataFrames.")
+    parser.add_argument('--preset', choices=PRESETS, default='quick',
+                        help="Frame sizes and filter counts to run (default: quick)")
+    parser.add_argument('--rows', type=int, nargs='+', help="Frame sizes, overriding the preset")
+    parser.add_argument('--filters', type=int, nargs='+', help="Filter counts, overriding the preset")
+    parser.add_argument('--operators', nargs='+', choices=OPERATORS + ['mixed'], help="Operator mixes (default: all)")
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, help="Group shapes (default: all)")
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, help="Engines of filter_df cases (default: all)")
+    parser.add_argument('--max-cells', type=float, default=2e9,
+                        help="Skip filter_df cases evaluating more filters times rows (default: 2e9)")
+    parser.add_argument('--select', help="Only run cases whose name contains this string")
+    parser.add_argument('--min-time', type=float, default=0.5, help="Minimum seconds timed per case (default: 0.5)")
+    parser.add_argument('--max-repeats', type=int, default=50, help="Maximum timed runs per case (default: 50)")
+    parser.add_argument('--save', metavar='PATH', help="Save the results as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="Compare the results with a saved baseline")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="Median latency ratio above which a case regressed (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    cases = get_cases(args.rows or preset['rows'], args.filters or preset['filters'], args.operators, args.shapes,
+                      args.engines, args.max_cells)
+    print(f"{'case':<90} {'runs':>4} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'throughput':>12} "
+          f"{'unit/s':<7} {'peak MB':>9}")
+    results = run_suite(cases, args.select, lambda name, result: print(format_result(name, result), flush=True),
+                        min_time=args.min_time, max_repeats=args.max_repeats)
+    if args.save:
+        save_baseline(args.save, results)
+    if not args.compare:
+        return 0
+    comparisons = compare(results, load_baseline(args.compare), args.threshold)
+    print(f"\n{'case':<90} {'base ms':>10} {'p50 ms':>10} {'ratio':>7}")
+    for name, base, p50, ratio, regressed in comparisons:
+        print(f"{name:<90} {base * 1e3:>10.3f} {p50 * 1e3:>10.3f} {ratio:>7.2f}{'  REGRESSION' if regressed else ''}")
+    regressions = sum(regressed for *_, regressed in comparisons)
+    print(f"\n{len(comparisons)} cases compared, {regressions} regressed by more than {args.threshold:.2f}x")
+    return 1 if regressions else 0
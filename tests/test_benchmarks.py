@@ -0,0 +1,56 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import transude as txd
+from benchmarks.suite import compare, get_cases, load_baseline, main, make_filters, make_frame, run_suite
+from transude.data_frame_filter_manager import DataFrameFilterManager
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_filters_select_rows(self):
+        df = make_frame(1000)
+        for operator in ('numeric', 'datetime', 'contains', 'regex', 'mixed'):
+            for shape in ('and', 'or', 'groups'):
+                df_filter_manager = DataFrameFilterManager(make_filters(operator, 20, shape))
+                filtered = txd.filter_df_via_manager(df, df_filter_manager, engine='mask')
+                self.assertEqual(len(filtered), len(txd.filter_df_via_manager(df, df_filter_manager)))
+                if shape != 'and':
+                    self.assertGreater(len(filtered), 0)
+
+    def test_run_suite(self):
+        cases = get_cases([100], [1, 10], operators=['mixed'], shapes=['groups'], max_cells=500)
+        results = run_suite(cases, min_repeats=1, max_repeats=1, min_time=0)
+        self.assertIn('build_query[filters=10,cached=True]', results)
+        self.assertIn('create_filters[values=10,bulk=True]', results)
+        self.assertIn('filter_df[rows=100,filters=1,operator=mixed,shape=groups,engine=mask]', results)
+        # 100 rows times 10 filters exceeds max_cells
+        self.assertFalse([name for name in results if 'rows=100,filters=10' in name])
+        for result in results.values():
+            self.assertEqual(result['repeats'], 1)
+            self.assertLessEqual(result['p50'], result['p99'])
+            self.assertGreater(result['throughput'], 0)
+            self.assertGreaterEqual(result['peak_bytes'], 0)
+
+    def test_compare(self):
+        baseline = {'a': {'p50': 1.0}, 'b': {'p50': 1.0}}
+        results = {'a': {'p50': 1.1}, 'b': {'p50': 2.0}, 'c': {'p50': 1.0}}
+        self.assertEqual(compare(results, baseline, threshold=1.25),
+                         [('a', 1.0, 1.1, 1.1, False), ('b', 1.0, 2.0, 2.0, True)])
+
+    def test_save_and_compare_baseline(self):
+        args = ['--rows', '100', '--filters', '1', '--operators', 'numeric', '--engines', 'mask', '--select',
+                'filter_df', '--min-time', '0', '--max-repeats', '1']
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()) as output:
+            path = os.path.join(directory, 'baseline.json')
+            self.assertEqual(main(args + ['--save', path]), 0)
+            self.assertEqual(list(load_baseline(path)),
+                             ['filter_df[rows=100,filters=1,operator=numeric,shape=and,engine=mask]'])
+            # Any slowdown regresses against a threshold of zero
+            self.assertEqual(main(args + ['--compare', path, '--threshold', '0']), 1)
+        self.assertIn('1 cases compared, 1 regressed', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import tempfile
+import numpy as np
+import pandas as pd
+import unittest
+import transude as txd
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_arrow_engine import DataFrameArrowEngine, convert_value, get_types
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestDataFrameArrowEngine(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'id': [1, 2, 3, 4, 5, 6],
+            'color': ['blue', 'red', 'Green', 'a.b', 'blue', 'RED'],
+            'size': pd.Categorical(['small', 'medium', 'large', 'small', 'medium', 'large']),
+            'price': [1.5, 2.5, 3.5, 4.5, 5.5, 6.5],
+            'when': pd.to_datetime(['2022-01-01', '2022-02-01', '2022-03-01', '2022-04-01', '2022-05-01',
+                                    '2022-06-01']),
+        })
+        self.arrow_df = self.df.convert_dtypes(dtype_backend='pyarrow')
+        self.engine = DataFrameArrowEngine()
+
+    def assert_same_as_query(self, df_filters):
+        df_filter_manager = DataFrameFilterManager(df_filters)
+        expected = self.df.query(df_filter_manager.build_query())['id'].tolist()
+        for data_frame in [self.df, self.arrow_df]:
+            self.assertEqual(expected, self.engine.filter_df(data_frame, df_filter_manager)['id'].tolist(),
+                             df_filter_manager.build_query())
+        table = pa.Table.from_pandas(self.df, preserve_index=False)
+        self.assertEqual(expected, self.engine.filter_df(table, df_filter_manager).column('id').to_pylist())
+
+    def test_same_as_query(self):
+        for df_filter in [DataFrameFilter(column='price', value=2.5, operator='>'),
+                          DataFrameFilter(column='id', value=3, operator='<='),
+                          DataFrameFilter(column='color', value='red', operator='!='),
+                          DataFrameFilter(column='size', value='small', operator='=='),
+                          DataFrameFilter(column='color', value='re', operator='contains'),
+                          DataFrameFilter(column='color', value='re', operator='contains', match_case=True),
+                          DataFrameFilter(column='color', value='.', operator='contains'),
+                          DataFrameFilter(column='color', value='^[bg]', operator='contains', regex=True),
+                          DataFrameFilter(column='size', value='l', operator='startswith'),
+                          DataFrameFilter(column='color', value='d', operator='endswith'),
+                          DataFrameFilter(column='color', value='[a-z]', operator='match'),
+                          DataFrameFilter(column='id', value='1', operator='endswith'),
+                          DataFrameFilter(column='color', value=['blue', 'red', 'purple'], operator='in'),
+                          DataFrameFilter(column='id', value=[1, 4], operator='not in')]:
+            self.assert_same_as_query([df_filter])
+
+    def test_groups_and_joiners(self):
+        self.assert_same_as_query([
+            DataFrameFilter(column='color', value='blue', operator='==', joiner='or', filter_id=1),
+            DataFrameFilter(column='color', value='red', operator='==', joiner='or', filter_id=1),
+            DataFrameFilter(column='price', value=5.0, operator='<', filter_id=2, group_joiner='and'),
+            DataFrameFilter(column='id', value=6, operator='==', filter_id=3, group_joiner='or')])
+        self.assert_same_as_query([
+            DataFrameFilter(column='id', value=1, operator='==', filter_id=1),
+            DataFrameFilter(column='id', value=2, operator='==', joiner='or', filter_id=1),
+            DataFrameFilter(column='price', value=1.0, operator='>', joiner='and', filter_id=1)])
+        self.assert_same_as_query([DataFrameFilter(column='size', value=value, operator='!=', filter_id=1)
+                                   for value in ['small', 'tiny']])
+
+    def test_missing_values(self):
+        df = pd.DataFrame({'id': [1, 2, 3], 'status': ['a', None, 'b']}).convert_dtypes(dtype_backend='pyarrow')
+        df_filters = [DataFrameFilter(column='status', value=value, operator='!=', filter_id=1) for value in 'ac']
+        self.assertEqual([3], self.engine.filter_df(df, DataFrameFilterManager(df_filters))['id'].tolist())
+        df_filter = DataFrameFilter(column='status', value='a', operator='!=')
+        self.assertEqual([3], self.engine.filter_df(df, DataFrameFilterManager([df_filter]))['id'].tolist())
+
+    def test_string_values(self):
+        df_filters = txd.build_df_filters(columns=['price', 'when', 'id'], values=['2', '2022-04-01', '5'],
+                                          operator='>')
+        self.assertEqual([6], txd.filter_df_from_df_filters(self.arrow_df, df_filters, engine='arrow')['id'].tolist())
+        self.assertEqual(pa.scalar(2.5), convert_value('2.5', pa.int64()))
+        df_filter = DataFrameFilter(column='when', value=pd.Timestamp('2022-03-01'), operator='>=')
+        for data_frame in [self.df, self.arrow_df]:
+            self.assertEqual([3, 4, 5, 6], self.engine.filter_df(data_frame, DataFrameFilterManager([df_filter]))
+                             ['id'].tolist())
+
+    def test_chunked_table(self):
+        table = pa.Table.from_pandas(pd.DataFrame({'id': np.arange(10000)}), preserve_index=False)
+        table = pa.concat_tables([table.slice(offset, 500) for offset in range(0, 10000, 500)])
+        df_filter_manager = DataFrameFilterManager([
+            DataFrameFilter(column='id', value=7, operator='<', filter_id=1),
+            DataFrameFilter(column='id', value=9990, operator='>', joiner='or', filter_id=1)])
+        expected = list(range(7)) + list(range(9991, 10000))
+        self.assertEqual(expected, self.engine.filter_df(table, df_filter_manager).column('id').to_pylist())
+        data_frame = table.to_pandas(types_mapper=pd.ArrowDtype)
+        self.assertEqual(20, data_frame['id'].array._pa_array.num_chunks)
+        self.assertEqual(expected, np.flatnonzero(self.engine.get_mask(data_frame, df_filter_manager)).tolist())
+
+    def test_filter_df(self):
+        table = pa.Table.from_pandas(self.df, preserve_index=False)
+        self.assertEqual([2, 6], txd.filter_df(table, columns='color', values='red', operator='contains')
+                         .column('id').to_pylist())
+        df_filter_manager = DataFrameFilterManager()
+        self.assertIs(table, txd.filter_df_via_manager(table, df_filter_manager))
+        with self.assertRaises(TypeError):
+            self.engine.filter_df([1, 2], df_filter_manager)
+
+    def test_query_on_arrow_strings(self):
+        df_filter = txd.build_df_filters(columns='color', values='re', operator='contains', data_frame=self.arrow_df)[0]
+        self.assertTrue(df_filter.has_string_dtype())
+        self.assertEqual("color.str.contains('re', case=False, regex=False)", df_filter.get_query())
+        self.assertEqual([2, 3, 6], txd.filter_df(self.arrow_df, columns='color', values='re', operator='contains')
+                         ['id'].tolist())
+
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestDataFrameArrowEngineParquet(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'region': np.repeat(['east', 'north', 'south'], 1000),
+                                'id': np.arange(3000),
+                                'host': np.tile(['web-01', 'db-01'], 1500)})
+        self.directory = tempfile.TemporaryDirectory()
+        ds.write_dataset(pa.Table.from_pandas(self.df, preserve_index=False), self.directory.name, format='parquet',
+                         partitioning=['region'], partitioning_flavor='hive', min_rows_per_group=100,
+                         max_rows_per_group=100)
+        self.dataset = ds.dataset(self.directory.name, format='parquet', partitioning='hive')
+        self.engine = DataFrameArrowEngine()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_pruned_counts(self, df_filter_manager):
+        expression = self.engine.get_expression(df_filter_manager, get_types(self.dataset.schema))
+        fragments = list(self.dataset.get_fragments(filter=expression))
+        row_groups = [fragment.split_by_row_group(filter=expression, schema=self.dataset.schema)
+                      for fragment in fragments]
+        return len(fragments), sum(len(row_group) for row_group in row_groups)
+
+    def assert_same_as_query(self, df_filter_manager, columns=None):
+        expected = self.df.query(df_filter_manager.build_query())
+        filtered_df = txd.filter_parquet_via_manager(self.directory.name, df_filter_manager, columns)
+        filtered_df = filtered_df.sort_values('id', ignore_index=True)
+        expected = expected[filtered_df.columns].reset_index(drop=True)
+        pd.testing.assert_frame_equal(expected, filtered_df, check_dtype=False, check_categorical=False)
+
+    def test_partition_pruning(self):
+        df_filter_manager = DataFrameFilterManager([
+            DataFrameFilter(column='region', value='north', operator='==', filter_id=1),
+            DataFrameFilter(column='region', value='south', operator='==', joiner='or', filter_id=1)])
+        self.assert_same_as_query(df_filter_manager)
+        self.assertEqual((2, 20), self.get_pruned_counts(df_filter_manager))
+
+    def test_row_group_pruning(self):
+        df_filter_manager = DataFrameFilterManager([
+            DataFrameFilter(column='id', value=950, operator='>=', filter_id=1),
+            DataFrameFilter(column='id', value=1050, operator='<', filter_id=1)])
+        self.assert_same_as_query(df_filter_manager, ['id', 'host'])
+        self.assertEqual((3, 2), self.get_pruned_counts(df_filter_manager))
+
+    def test_group_joiner_nesting(self):
+        df_filter_manager = DataFrameFilterManager([
+            DataFrameFilter(column='region', value='east', operator='==', filter_id=1),
+            DataFrameFilter(column='id', value=150, operator='<', filter_id=2),
+            DataFrameFilter(column='id', value=2950, operator='>=', filter_id=3, group_joiner='or'),
+            DataFrameFilter(column='host', value='WEB', operator='contains', filter_id=4)])
+        self.assert_same_as_query(df_filter_manager)
+        self.assertEqual((3, 3), self.get_pruned_counts(df_filter_manager))
+
+
+if __name__ == '__main__':
+    unittest.main()
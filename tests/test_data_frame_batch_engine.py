@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import unittest
+import transude as txd
+from transude.data_frame_batch_engine import DataFrameBatchEngine
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_mask_engine import DataFrameMaskEngine
+
+
+class CountingMaskEngine(DataFrameMaskEngine):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.evaluations = 0
+
+    def evaluate_filter(self, data_frame, df_filter):
+        self.evaluations += 1
+        return super().evaluate_filter(data_frame, df_filter)
+
+
+class TestDataFrameBatchEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'id': np.arange(200),
+                                'host': rng.choice(['web-01', 'web-02', 'db-01', None], 200),
+                                'latency': rng.integers(0, 500, 200)})
+        web = DataFrameFilter(column='host', value='WEB', operator='contains', filter_id=1)
+        slow = DataFrameFilter(column='latency', value=250, operator='>=', filter_id=2)
+        fast = DataFrameFilter(column='latency', value=50, operator='<', filter_id=2)
+        db = DataFrameFilter(column='host', value='db-01', operator='==', filter_id=3, group_joiner='or')
+        self.df_filter_lists = [[web, slow], [web, slow], [web, fast], [slow, db], [], [web]]
+
+    def test_same_as_query(self):
+        df_filter_managers = [DataFrameFilterManager(df_filters) for df_filters in self.df_filter_lists]
+        for engine in [DataFrameBatchEngine(), DataFrameBatchEngine(DataFrameMaskEngine(keep_group_masks=True, group_workers=2))]:
+            for _ in range(2):
+                results = engine.filter_dfs(self.df, df_filter_managers)
+                self.assertEqual(len(df_filter_managers), len(results))
+                for df_filter_manager, result in zip(df_filter_managers, results):
+                    pd.testing.assert_frame_equal(txd.filter_df_via_manager(self.df, df_filter_manager), result)
+            engine.engine.close()
+
+    def test_evaluates_distinct_filters_once(self):
+        engine = DataFrameBatchEngine(CountingMaskEngine(mask_cache=txd.DataFrameCache(), keep_group_masks=False))
+        masks = engine.get_masks(self.df, self.df_filter_lists * 100)
+        self.assertEqual(4, engine.engine.evaluations)
+        self.assertIs(masks[0], masks[1])
+        self.assertIsNone(masks[4])
+
+    def test_edited_data_frame(self):
+        df = pd.DataFrame({'a': [1, 2, 3]})
+        df_filter_manager = DataFrameFilterManager([DataFrameFilter(column='a', value=2, operator='==')])
+        engine = DataFrameBatchEngine()
+        self.assertEqual([1], engine.filter_dfs(df, [df_filter_manager])[0].index.tolist())
+        df.loc[0, 'a'] = 2
+        self.assertEqual([0, 1], engine.filter_dfs(df, [df_filter_manager])[0].index.tolist())
+        df['a'] = [3, 3, 3]
+        self.assertEqual([], DataFrameBatchEngine().filter_dfs(df, [df_filter_manager])[0].index.tolist())
+
+    def test_filter_dfs_via_managers(self):
+        results = txd.filter_dfs_via_managers(self.df, self.df_filter_lists)
+        for df_filters, result in zip(self.df_filter_lists, results):
+            pd.testing.assert_frame_equal(txd.filter_df_from_df_filters(self.df, df_filters), result)
+        with self.assertRaises(TypeError):
+            txd.filter_dfs_via_managers(None, self.df_filter_lists)
+
+
+if __name__ == '__main__':
+    unittest.main()
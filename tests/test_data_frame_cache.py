@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+import unittest
+import transude as txd
+from transude.data_frame_cache import DataFrameCache, estimate_nbytes
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_mask_engine import DataFrameMaskEngine
+from transude.data_frame_version import get_frame_version, bump_frame_version
+
+
+class TestDataFrameCache(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = DataFrameCache()
+        self.assertIsNone(cache.get('a'))
+        mask = np.array([True, False])
+        cache.put('a', mask)
+        self.assertIs(mask, cache.get('a'))
+        self.assertFalse(mask.flags.writeable)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(2, cache.nbytes)
+
+    def test_lru_eviction(self):
+        cache = DataFrameCache(max_bytes=30)
+        cache.put('a', np.zeros(10, dtype=bool))
+        cache.put('b', np.zeros(10, dtype=bool))
+        cache.put('c', np.zeros(10, dtype=bool))
+        cache.get('a')
+        cache.put('d', np.zeros(10, dtype=bool))
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(30, cache.nbytes)
+
+        cache.put('e', np.zeros(31, dtype=bool))
+        self.assertNotIn('e', cache)
+        self.assertEqual(3, len(cache))
+
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.nbytes)
+
+    def test_invalid_max_bytes(self):
+        with self.assertRaises(ValueError):
+            DataFrameCache(max_bytes=-1)
+
+    def test_estimate_nbytes(self):
+        series = pd.Series(['a' * 100] * 5000)
+        self.assertEqual(series.memory_usage(index=False, deep=True), estimate_nbytes(series))
+        series = pd.Series(np.arange(10))
+        self.assertEqual(80, estimate_nbytes(series))
+        self.assertEqual(0, estimate_nbytes(pd.Series([], dtype=object)))
+
+
+class TestDataFrameVersion(unittest.TestCase):
+    def test_get_frame_version(self):
+        df = pd.DataFrame({'a': [1, 2, 3]})
+        version = get_frame_version(df)
+        self.assertEqual(version, get_frame_version(df))
+        self.assertNotEqual(version, get_frame_version(df.copy()))
+
+        bump_frame_version(df)
+        self.assertNotEqual(version, get_frame_version(df))
+
+        version = get_frame_version(df)
+        df['b'] = df['a']
+        self.assertNotEqual(version, get_frame_version(df))
+
+    def test_serial_not_reused(self):
+        serials = set()
+        for _ in range(10):
+            serials.add(get_frame_version(pd.DataFrame({'a': [1]}))[0])
+        self.assertEqual(10, len(serials))
+
+
+class TestDataFrameMaskEngineCache(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'color': ['blue', 'red', 'green', 'red'], 'size': [1, 2, 3, 4]})
+        self.cache = DataFrameCache()
+        self.engine = DataFrameMaskEngine(self.cache, keep_group_masks=False)
+
+    def test_reuses_masks(self):
+        df_filter1 = DataFrameFilter(column='color', value='red', operator='==', filter_id=1)
+        df_filter2 = DataFrameFilter(column='size', value=2, operator='>', filter_id=2)
+        df_filter_manager = DataFrameFilterManager([df_filter1, df_filter2])
+        self.assertEqual([3], self.engine.filter_df(self.df, df_filter_manager).index.tolist())
+        self.assertEqual(2, self.cache.misses)
+
+        df_filter_manager.add_filter(DataFrameFilter(column='color', value='e', operator='contains', filter_id=3))
+        self.assertEqual([3], self.engine.filter_df(self.df, df_filter_manager).index.tolist())
+        self.assertEqual(2, self.cache.hits)
+        self.assertEqual(3, self.cache.misses)
+
+        df_filter3 = DataFrameFilter(column='color', value='e', operator='contains', filter_id=4, match_case=True)
+        self.engine.get_filter_mask(self.df, df_filter3)
+        self.assertEqual(4, self.cache.misses)
+
+    def test_bump_frame_version(self):
+        df_filter_manager = DataFrameFilterManager([DataFrameFilter(column='size', value=2, operator='>')])
+        self.assertEqual(2, len(self.engine.filter_df(self.df, df_filter_manager)))
+        self.df.loc[0, 'size'] = 10
+        bump_frame_version(self.df)
+        self.assertEqual(3, len(self.engine.filter_df(self.df, df_filter_manager)))
+
+    def test_filter_df_with_engine_instance(self):
+        filtered_df = txd.filter_df(self.df, columns='color', values='red', operator='==', engine=self.engine)
+        self.assertEqual([1, 3], filtered_df.index.tolist())
+        txd.filter_df(self.df, columns='color', values='red', operator='==', engine=self.engine)
+        self.assertEqual(1, self.cache.hits)
+
+
+
+class TestDataFrameMaskEngineStrViews(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'host': ['Web-01', None, 'db-02', 'straße', 1.5, 'WEB-03'],
+                                'size': [1, 2, 3, 4, 5, 6]})
+        self.engine = DataFrameMaskEngine(keep_group_masks=False)
+
+    def test_same_as_query(self):
+        for df_filter in [DataFrameFilter(column='host', value='web', operator='contains'),
+                          DataFrameFilter(column='host', value='STRASSE', operator='contains'),
+                          DataFrameFilter(column='host', value='NaN', operator='contains'),
+                          DataFrameFilter(column='host', value='Web', operator='contains', match_case=True),
+                          DataFrameFilter(column='host', value='^w', operator='contains', regex=True),
+                          DataFrameFilter(column='host', value='0', operator='startswith'),
+                          DataFrameFilter(column='size', value='1', operator='endswith')]:
+            df_filter_manager = DataFrameFilterManager([df_filter])
+            pd.testing.assert_frame_equal(self.df.query(df_filter_manager.build_query()),
+                                          self.engine.filter_df(self.df, df_filter_manager), str(df_filter))
+
+    def test_views_are_shared_and_rebuilt_on_change(self):
+        df_filter_manager = DataFrameFilterManager([
+            DataFrameFilter(column='host', value='web', operator='contains', joiner='or', filter_id=1),
+            DataFrameFilter(column='host', value='db', operator='contains', joiner='or', filter_id=1),
+            DataFrameFilter(column='host', value='w', operator='startswith', filter_id=2)])
+        self.engine.filter_df(self.df, df_filter_manager)
+        self.assertEqual(2, len(self.engine.index_cache))
+        self.assertEqual(2, self.engine.index_cache.misses)
+        self.engine.filter_df(self.df, df_filter_manager)
+        self.assertEqual(2, self.engine.index_cache.misses)
+
+        self.df.loc[1, 'host'] = 'web-04'
+        bump_frame_version(self.df)
+        df_filter_manager.remove_filters_by_id(2)
+        self.assertEqual([0, 1, 2, 5], self.engine.filter_df(self.df, df_filter_manager).index.tolist())
+        self.assertEqual(4, self.engine.index_cache.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+import unittest
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_index import FactorizedColumn, InvertedColumnIndex, SortedColumnIndex, check_lookup_values, \
+    is_range_group
+from transude.data_frame_mask_engine import DataFrameMaskEngine, apply_str_operator
+from transude.data_frame_version import bump_frame_version
+
+
+class TestSortedColumnIndex(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'int': [5, 3, 9, 1, 3, 7],
+            'float': [2.5, np.nan, 0.5, 2.5, 9.0, -1.0],
+            'when': pd.to_datetime(['2022-03-01', None, '2022-01-01', '2022-02-01', '2022-02-01', '2022-05-01']),
+            'text': ['a', 'b', 'c', 'd', 'e', 'f'],
+        })
+
+    def test_get_range_mask(self):
+        for column, values in [('int', [0, 3, 3.5, 9, 10]), ('float', [-1.0, 2.5, 3, 100]),
+                               ('when', ['2022-02-01', pd.Timestamp('2022-02-15'), '2021-12-31'])]:
+            sorted_index = SortedColumnIndex(self.df[column])
+            for value in values:
+                for operator in ['>', '<', '>=', '<=']:
+                    expected = self.df.eval(f"{column} {operator} @value").tolist()
+                    df_filter = DataFrameFilter(column=column, value=value, operator=operator)
+                    self.assertEqual(expected, sorted_index.get_filters_mask([df_filter]).tolist(),
+                                     f"{column} {operator} {value!r}")
+
+    def test_get_filters_mask_between(self):
+        sorted_index = SortedColumnIndex(self.df['int'])
+        df_filters = [DataFrameFilter(column='int', value=3, operator='>=', filter_id=1),
+                      DataFrameFilter(column='int', value=7, operator='<=', filter_id=1),
+                      DataFrameFilter(column='int', value=3, operator='>', filter_id=1)]
+        self.assertEqual([True, False, False, False, False, True], sorted_index.get_filters_mask(df_filters).tolist())
+
+    def test_unsupported(self):
+        with self.assertRaises(TypeError):
+            SortedColumnIndex(self.df['text'])
+        with self.assertRaises(TypeError):
+            SortedColumnIndex(self.df['int']).convert_value('3')
+        with self.assertRaises(TypeError):
+            SortedColumnIndex(self.df['float']).convert_value(np.nan)
+        with self.assertRaises(TypeError):
+            SortedColumnIndex(self.df['when']).convert_value(pd.Timestamp('2022-01-01', tz='UTC'))
+
+    def test_is_range_group(self):
+        df_filter1 = DataFrameFilter(column='int', value=3, operator='>=', filter_id=1)
+        df_filter2 = DataFrameFilter(column='int', value=7, operator='<', filter_id=1)
+        self.assertTrue(is_range_group([df_filter1, df_filter2]))
+        df_filter2.joiner = 'or'
+        self.assertFalse(is_range_group([df_filter1, df_filter2]))
+        self.assertFalse(is_range_group([df_filter1, DataFrameFilter(column='int', value=7, operator='==')]))
+
+
+class TestInvertedColumnIndex(unittest.TestCase):
+    def setUp(self):
+        self.columns = {
+            'object': (pd.Series(['a', None, 'b', 'a', 'c']), ['a', 'c', 'x']),
+            'string': (pd.Series(['a', None, 'b', 'a', 'c'], dtype='string'), ['a', 'c']),
+            'Int64': (pd.Series([1, None, 3, 1, 4], dtype='Int64'), [1, 4.0]),
+            'float': (pd.Series([1.0, np.nan, 3.0, 1.0, 4.5]), [1, 4.5]),
+            'category': (pd.Series(['a', None, 'b', 'a', 'c'], dtype='category'), ['a', 'x']),
+            'bool': (pd.Series([True, False, True, True, False]), [False]),
+        }
+
+    def test_get_mask(self):
+        for name, (series, values) in self.columns.items():
+            inverted_index = InvertedColumnIndex(series)
+            for negated in [False, True]:
+                expected = np.zeros(len(series), dtype=bool) if not negated else np.ones(len(series), dtype=bool)
+                for value in values:
+                    if negated:
+                        # DataFrame.query finds missing strings unequal to every value
+                        expected &= (series != value).to_numpy(dtype=bool, na_value=name == 'string')
+                    else:
+                        expected |= (series == value).to_numpy(dtype=bool, na_value=False)
+                self.assertEqual(expected.tolist(), inverted_index.get_mask(values, negated).tolist(),
+                                 f"{name} {negated}")
+
+    def test_get_positions(self):
+        inverted_index = InvertedColumnIndex(pd.Series(['b', 'a', 'b', None, 'a']))
+        self.assertEqual([0, 2], inverted_index.get_positions(['b']).tolist())
+        self.assertEqual([0, 2, 1, 4], inverted_index.get_positions(['a', 'b', 'a']).tolist())
+        self.assertEqual([], inverted_index.get_positions(['x']).tolist())
+        self.assertEqual(np.int32, inverted_index.positions.dtype)
+        self.assertGreater(inverted_index.nbytes, 0)
+
+    def test_check_lookup_values(self):
+        check_lookup_values(np.dtype('int64'), [1, 2.5])
+        with self.assertRaises(TypeError):
+            check_lookup_values(np.dtype('int64'), [True])
+        with self.assertRaises(TypeError):
+            check_lookup_values(np.dtype('bool'), [1])
+        with self.assertRaises(TypeError):
+            check_lookup_values(np.dtype('datetime64[ns]'), ['2022-01-01'])
+        with self.assertRaises(TypeError):
+            InvertedColumnIndex(pd.Series([True, False])).get_mask([1])
+
+
+class TestFactorizedColumn(unittest.TestCase):
+    def test_get_mask(self):
+        columns = {
+            'object': pd.Series(['web-01', None, 'DB-02', 'web-01', np.nan, 'cache']),
+            'string': pd.Series(['web-01', None, 'DB-02', 'web-01', None, 'cache'], dtype='string'),
+            'category': pd.Series(['web-01', None, 'DB-02', 'web-01', None, 1], dtype='category'),
+            'int': pd.Series([101, 2, 101, 30, 2, 1]),
+            'bool': pd.Series([True, False, True, True, False, False]),
+        }
+        df_filters = [DataFrameFilter(column='col', value='b', operator='contains'),
+                      DataFrameFilter(column='col', value='DB', operator='contains', match_case=True),
+                      DataFrameFilter(column='col', value='^w.b|1$', operator='contains', regex=True),
+                      DataFrameFilter(column='col', value='na', operator='contains'),
+                      DataFrameFilter(column='col', value='w', operator='startswith'),
+                      DataFrameFilter(column='col', value='1', operator='endswith'),
+                      DataFrameFilter(column='col', value='[cT]', operator='match')]
+        for name, series in columns.items():
+            factorized_column = FactorizedColumn(series)
+            for df_filter in df_filters:
+                self.assertEqual(apply_str_operator(series, df_filter).tolist(),
+                                 factorized_column.get_mask(lambda values: apply_str_operator(values, df_filter))
+                                 .tolist(), f"{name} {df_filter}")
+
+    def test_is_factorizable(self):
+        self.assertTrue(FactorizedColumn.is_factorizable(pd.Series(['a', None, 'b'])))
+        self.assertTrue(FactorizedColumn.is_factorizable(pd.Series([1, 2, 1])))
+        self.assertFalse(FactorizedColumn.is_factorizable(pd.Series([1, 1.0, True, 'a'])))
+        self.assertFalse(FactorizedColumn.is_factorizable(pd.Series([0.0, -0.0])))
+        with self.assertRaises(TypeError):
+            FactorizedColumn(pd.Series([1.5, 2.5]))
+
+
+class TestDataFrameMaskEngineInvertedIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'region': rng.choice(['north', 'south', 'east', 'west'], 1000),
+                                'status': rng.choice([1, 2, 3], 1000)})
+        self.engine = DataFrameMaskEngine(inverted_index_columns=['region', 'status'])
+
+    def test_same_as_scan(self):
+        df_filters = [DataFrameFilter(column='region', value='north', operator='==', joiner='or', filter_id=1),
+                      DataFrameFilter(column='region', value='east', operator='==', joiner='or', filter_id=1),
+                      DataFrameFilter(column='status', value=2, operator='!=', filter_id=2)]
+        df_filter_manager = DataFrameFilterManager(df_filters)
+        pd.testing.assert_frame_equal(self.df.query(df_filter_manager.build_query()),
+                                      self.engine.filter_df(self.df, df_filter_manager))
+        self.assertEqual(2, len(self.engine.index_cache))
+
+    def test_string_dtype_with_missing_values(self):
+        df = pd.DataFrame({'region': pd.array(['north', None, 'south', 'north', None, 'east'], dtype='string'),
+                           'count': pd.array([1, None, 2, 1, None, 3], dtype='Int64')})
+        engine = DataFrameMaskEngine(inverted_index_columns=['region', 'count'])
+        for df_filters in [[DataFrameFilter(column='region', value='north', operator='!=')],
+                           [DataFrameFilter(column='region', value=value, operator='!=', filter_id=1)
+                            for value in ['north', 'east']],
+                           [DataFrameFilter(column='count', value=1, operator='!=')]]:
+            df_filter_manager = DataFrameFilterManager(df_filters)
+            pd.testing.assert_frame_equal(df.query(df_filter_manager.build_query()),
+                                          engine.filter_df(df, df_filter_manager))
+        df_filter = DataFrameFilter(column='region', value=['north', 'east'], operator='not in')
+        self.assertEqual([1, 2, 4], np.flatnonzero(engine.evaluate_filter(df, df_filter)).tolist())
+
+    def test_falls_back_to_scan(self):
+        df_filter = DataFrameFilter(column='status', value=True, operator='==')
+        self.assertEqual((self.df['status'] == True).tolist(), self.engine.evaluate_filter(self.df, df_filter).tolist())
+
+
+class TestDataFrameMaskEngineFactorizedColumns(unittest.TestCase):
+    def test_same_as_scan(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'host': rng.choice(['web-01', 'web-02', 'db-01', None], 1000),
+                           'level': pd.Categorical(rng.choice(['INFO', 'WARN', 'ERROR'], 1000)),
+                           'mixed': pd.Series([1, 'one', 1.0, True] * 250, dtype=object)})
+        engine = DataFrameMaskEngine(factorized_columns=['host', 'mixed'])
+        for column, value in [('host', 'WEB'), ('level', 'r'), ('mixed', '.0')]:
+            df_filter_manager = DataFrameFilterManager([DataFrameFilter(column=column, value=value, operator='contains')])
+            pd.testing.assert_frame_equal(df.query(df_filter_manager.build_query()),
+                                          engine.filter_df(df, df_filter_manager))
+        self.assertIsInstance(engine.get_factorized_column(df, 'host'), FactorizedColumn)
+        self.assertIsInstance(engine.get_factorized_column(df, 'level'), FactorizedColumn)
+        self.assertIsNone(engine.get_factorized_column(df, 'mixed'))
+
+
+class TestDataFrameMaskEngineSortedIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'price': rng.integers(0, 100, 1000), 'qty': rng.random(1000)})
+        self.engine = DataFrameMaskEngine(sorted_index_columns=['price', 'qty'])
+
+    def test_same_as_scan(self):
+        df_filters = [DataFrameFilter(column='price', value=20, operator='>=', filter_id=1),
+                      DataFrameFilter(column='price', value=60, operator='<', filter_id=1),
+                      DataFrameFilter(column='qty', value=0.5, operator='>', filter_id=2)]
+        df_filter_manager = DataFrameFilterManager(df_filters)
+        pd.testing.assert_frame_equal(self.df.query(df_filter_manager.build_query()),
+                                      self.engine.filter_df(self.df, df_filter_manager))
+        self.assertEqual(2, len(self.engine.index_cache))
+
+    def test_index_is_built_once_and_rebuilt_on_change(self):
+        df_filter = DataFrameFilter(column='price', value=50, operator='<')
+        self.engine.evaluate_filter(self.df, df_filter)
+        self.engine.evaluate_filter(self.df, df_filter)
+        self.assertEqual(1, self.engine.index_cache.misses)
+        self.assertEqual(1, self.engine.index_cache.hits)
+
+        self.df.loc[:, 'price'] = 0
+        bump_frame_version(self.df)
+        self.assertTrue(self.engine.evaluate_filter(self.df, df_filter).all())
+        self.assertEqual(2, self.engine.index_cache.misses)
+
+    def test_falls_back_to_scan(self):
+        df = pd.DataFrame({'price': ['1', '2', '3']})
+        df_filter = DataFrameFilter(column='price', value='2', operator='>')
+        self.assertEqual([False, False, True], self.engine.evaluate_filter(df, df_filter).tolist())
+        self.assertEqual(0, len(self.engine.index_cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,383 @@
+import numpy as np
+import pandas as pd
+import unittest
+import transude as txd
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_mask_engine import DataFrameMaskEngine, combine_masks, get_contains_regexes, \
+    get_literal_pattern, is_contains_group, plan_terms, split_terms
+
+
+class TestDataFrameMaskEngine(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'id': [1, 2, 3, 4, 5, 6],
+            'color': ['blue', 'red', 'Green', None, 'blue', 'RED'],
+            'size': ['small', 'medium', 'large', 'small', 'medium', 'large'],
+            'price': [1.5, 2.5, np.nan, 4.5, 5.5, 6.5],
+        })
+        self.engine = DataFrameMaskEngine()
+
+    def assert_same_as_query(self, df_filters):
+        df_filter_manager = DataFrameFilterManager(df_filters)
+        expected = self.df.query(df_filter_manager.build_query())
+        pd.testing.assert_frame_equal(expected, self.engine.filter_df(self.df, df_filter_manager))
+
+    def test_comparison_operators(self):
+        for operator in ['==', '!=', '>', '<', '>=', '<=']:
+            self.assert_same_as_query([DataFrameFilter(column='id', value=3, operator=operator)])
+            self.assert_same_as_query([DataFrameFilter(column='price', value=4.5, operator=operator)])
+
+    def test_str_operators(self):
+        self.assert_same_as_query([DataFrameFilter(column='color', value='re', operator='contains')])
+        self.assert_same_as_query([DataFrameFilter(column='color', value='re', operator='contains', match_case=True)])
+        self.assert_same_as_query([DataFrameFilter(column='color', value='^r.d', operator='contains', regex=True)])
+        self.assert_same_as_query([DataFrameFilter(column='color', value='an', operator='contains')])
+        self.assert_same_as_query([DataFrameFilter(column='color', value='b', operator='startswith')])
+        self.assert_same_as_query([DataFrameFilter(column='color', value='ue', operator='endswith')])
+        self.assert_same_as_query([DataFrameFilter(column='color', value='[bG]', operator='match')])
+        self.assert_same_as_query([DataFrameFilter(column='id', value='1', operator='contains')])
+
+    def test_string_dtype(self):
+        self.df['color'] = self.df['color'].astype('string')
+        df_filter = DataFrameFilter(column='color', value='re', operator='contains', data_frame=self.df)
+        mask = self.engine.get_filter_mask(self.df, df_filter)
+        self.assertEqual([False, True, True, False, False, True], mask.tolist())
+
+    def test_string_dtype_with_missing_values(self):
+        self.df['color'] = self.df['color'].astype('string')
+        for engine in [self.engine, DataFrameMaskEngine(optimize=True)]:
+            self.engine = engine
+            for operator in ['==', '!=', '>', '<']:
+                self.assert_same_as_query([DataFrameFilter(column='color', value='blue', operator=operator)])
+            self.assert_same_as_query([DataFrameFilter(column='color', value='blue', operator='!=', filter_id=1),
+                                       DataFrameFilter(column='color', value='red', operator='!=', filter_id=1),
+                                       DataFrameFilter(column='id', value=1, operator='>', filter_id=1)])
+            df_filter = DataFrameFilter(column='color', value=['blue', 'red'], operator='not in')
+            self.assertEqual([2, 3, 5], np.flatnonzero(self.engine.evaluate_filter(self.df, df_filter)).tolist())
+
+    def test_groups_and_joiners(self):
+        self.assert_same_as_query([
+            DataFrameFilter(column='color', value='blue', operator='==', joiner='or', filter_id=1),
+            DataFrameFilter(column='color', value='red', operator='==', joiner='or', filter_id=1),
+            DataFrameFilter(column='size', value='small', operator='==', filter_id=2),
+        ])
+        self.assert_same_as_query([
+            DataFrameFilter(column='id', value=2, operator='>', filter_id=1),
+            DataFrameFilter(column='id', value=2, operator='==', filter_id=2, group_joiner='or'),
+            DataFrameFilter(column='size', value='large', operator='==', filter_id=3, group_joiner='and'),
+            DataFrameFilter(column='color', value='re', operator='contains', filter_id=4, group_joiner='|'),
+        ])
+
+    def test_disabled_filters(self):
+        df_filters = [
+            DataFrameFilter(column='id', value=2, operator='>', filter_id=1, in_use=False),
+            DataFrameFilter(column='id', value=5, operator='<', filter_id=1),
+            DataFrameFilter(column='size', value='large', operator='!=', filter_id=2, in_use=False),
+        ]
+        self.assert_same_as_query(df_filters)
+        self.assertIs(self.df, self.engine.filter_df(self.df, DataFrameFilterManager([df_filters[2]])))
+
+    def test_membership_test(self):
+        frames = {
+            'object': pd.Series(['a', None, 'b', 'c']),
+            'string': pd.Series(['a', None, 'b', 'c'], dtype='string'),
+            'Int64': pd.Series([1, None, 3, 4], dtype='Int64'),
+            'float': pd.Series([1.0, np.nan, 3.0, 4.5]),
+            'category': pd.Series(['a', None, 'b', 'c'], dtype='category'),
+            'datetime': pd.to_datetime(pd.Series(['2022-01-01', None, '2022-03-01', '2022-04-01'])),
+        }
+        values = {'object': ['a', 'c', 1], 'string': ['a', 'c'], 'Int64': [1, 4.0], 'float': [1, 4.5],
+                  'category': ['a', 'x'], 'datetime': ['2022-01-01', pd.Timestamp('2022-04-01')]}
+        for name, series in frames.items():
+            df = pd.DataFrame({'col': series})
+            for operator, joiner in [('==', 'or'), ('!=', 'and')]:
+                df_filters = [DataFrameFilter(column='col', value=value, operator=operator, joiner=joiner, filter_id=1)
+                              for value in values[name]]
+                expected = DataFrameMaskEngine().get_mask(df, DataFrameFilterManager(df_filters[:1]))
+                for df_filter in df_filters[1:]:
+                    mask = self.engine.evaluate_filter(df, df_filter)
+                    expected = expected | mask if operator == '==' else expected & mask
+                self.assertEqual(expected.tolist(), self.engine.get_group_mask(df, df_filters).tolist(),
+                                 f"{name} {operator}")
+                df_filter = DataFrameFilter(column='col', value=values[name] + [None],
+                                            operator='in' if operator == '==' else 'not in')
+                self.assertEqual(expected.tolist(), self.engine.get_group_mask(df, [df_filter]).tolist(),
+                                 f"{name} {df_filter.operator}")
+                self.assertEqual(expected.tolist(), self.engine.evaluate_filter(df, df_filter).tolist())
+
+    def test_membership_test_fallback(self):
+        df = pd.DataFrame({'when': pd.to_datetime(['2022-01-01', '2022-02-01'])})
+        df_filters = [DataFrameFilter(column='when', value=value, operator='==', joiner='or', filter_id=1)
+                      for value in [True, '2022-02-01']]
+        self.assertEqual([False, True], self.engine.get_group_mask(df, df_filters).tolist())
+
+    def test_combine_masks(self):
+        a = np.array([True, True, False, False])
+        b = np.array([True, False, True, False])
+        c = np.array([False, False, False, True])
+        self.assertEqual((a & b | c).tolist(), combine_masks([a, b, c], ['and', 'or']).tolist())
+        self.assertEqual((a | b & c).tolist(), combine_masks([a, b, c], ['|', '&']).tolist())
+        with self.assertRaises(ValueError):
+            combine_masks([a, b], ['xor'])
+
+    def test_filter_df_engine(self):
+        for engine in ['query', 'mask']:
+            filtered_df = txd.filter_df(self.df, columns='size', values=['small', 'large'], operator='==',
+                                        joiner='or', group_joiner='or', engine=engine)
+            self.assertEqual([1, 3, 4, 6], filtered_df['id'].tolist())
+        with self.assertRaises(ValueError):
+            txd.filter_df(self.df, columns='size', values='small', operator='==', engine='invalid')
+
+    def test_filter_df_mask_engine_datetime(self):
+        df = pd.DataFrame({'when': pd.to_datetime(['2022-01-01', '2022-02-01', '2022-03-01'])})
+        filtered_df = txd.filter_df(df, columns='when', values='2022-01-15', operator='>', engine='mask')
+        self.assertEqual(2, len(filtered_df))
+
+
+class TestDataFrameMaskEngineGroupMasks(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'id': range(10), 'parity': ['even', 'odd'] * 5})
+        self.df_filters = [DataFrameFilter(column='id', value=2, operator='>', filter_id=1),
+                           DataFrameFilter(column='id', value=8, operator='<', filter_id=1),
+                           DataFrameFilter(column='parity', value='even', operator='==', filter_id=2),
+                           DataFrameFilter(column='id', value=4, operator='!=', filter_id=3)]
+        self.df_filter_manager = DataFrameFilterManager(self.df_filters)
+        self.engine = CountingMaskEngine(keep_group_masks=True)
+
+    def test_only_changed_group_is_evaluated(self):
+        self.assertEqual([6], self.engine.filter_df(self.df, self.df_filter_manager)['id'].tolist())
+        self.assertEqual(4, self.engine.evaluations)
+
+        self.df_filter_manager.disable_filters_by_id(2)
+        self.assertEqual([3, 5, 6, 7], self.engine.filter_df(self.df, self.df_filter_manager)['id'].tolist())
+        self.assertEqual(4, self.engine.evaluations)
+
+        self.df_filter_manager.enable_filters_by_id(2)
+        self.assertEqual([6], self.engine.filter_df(self.df, self.df_filter_manager)['id'].tolist())
+        self.assertEqual(5, self.engine.evaluations)
+
+        self.df_filter_manager.remove_filters_by_id(3)
+        self.assertEqual([4, 6], self.engine.filter_df(self.df, self.df_filter_manager)['id'].tolist())
+        self.assertEqual(5, self.engine.evaluations)
+
+    def test_direct_filter_mutation(self):
+        self.engine.filter_df(self.df, self.df_filter_manager)
+        self.df_filters[1].in_use = False
+        self.assertEqual([6, 8], self.engine.filter_df(self.df, self.df_filter_manager)['id'].tolist())
+        self.assertEqual(5, self.engine.evaluations)
+
+    def test_new_data_frame(self):
+        self.engine.filter_df(self.df, self.df_filter_manager)
+        self.assertEqual([], self.engine.filter_df(self.df.head(5), self.df_filter_manager)['id'].tolist())
+        self.assertEqual(8, self.engine.evaluations)
+
+    def test_edited_data_frame(self):
+        df = pd.DataFrame({'a': [1, 2, 3]})
+        df_filter_manager = DataFrameFilterManager([DataFrameFilter(column='a', value=2, operator='==')])
+        self.assertEqual([1], DataFrameMaskEngine().filter_df(df, df_filter_manager).index.tolist())
+        self.assertEqual([1], self.engine.filter_df(df, df_filter_manager).index.tolist())
+        df.loc[0, 'a'] = 2
+        # Group masks are not kept by default, and kept ones are only reused by the engine that evaluated them
+        for engine in [DataFrameMaskEngine(), CountingMaskEngine(keep_group_masks=True)]:
+            self.assertEqual([0, 1], engine.filter_df(df, df_filter_manager).index.tolist())
+        df['a'] = [3, 3, 3]
+        self.assertEqual([], DataFrameMaskEngine().filter_df(df, df_filter_manager).index.tolist())
+        # Kept masks are keyed on the DataFrame version, which in-place edits must bump
+        txd.bump_frame_version(df)
+        self.assertEqual([], self.engine.filter_df(df, df_filter_manager).index.tolist())
+
+    def test_group_workers(self):
+        expected = self.engine.filter_df(self.df, self.df_filter_manager)
+        for keep_group_masks in [False, True]:
+            df_filter_manager = DataFrameFilterManager(self.df_filters)
+            with DataFrameMaskEngine(keep_group_masks=keep_group_masks, group_workers=3) as engine:
+                pd.testing.assert_frame_equal(expected, engine.filter_df(self.df, df_filter_manager))
+                executor = engine._executor
+                self.assertIsNotNone(executor)
+                df_filter_manager.disable_filters_by_id(3)
+                pd.testing.assert_frame_equal(self.df.query(df_filter_manager.build_query()),
+                                              engine.filter_df(self.df, df_filter_manager))
+                self.assertIs(executor, engine.get_executor())
+                df_filter_manager.enable_filters_by_id(3)
+            self.assertIsNone(engine._executor)
+        with self.assertRaises(ValueError):
+            DataFrameMaskEngine(group_workers=0)
+
+
+class TestDataFrameMaskEngineContainsGroups(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'text': ['Disk full on web-01', 'STRASSE closed', None, 'cpu at 100%', 'a.b', '',
+                                         'Timeout (db)', 4.5, 'ok']})
+        self.engine = CountingMaskEngine()
+
+    def assert_same_as_query(self, values, data_frame=None, factorized=False, **kwargs):
+        data_frame = self.df if data_frame is None else data_frame
+        df_filters = [DataFrameFilter(column='text', value=value, operator='contains', joiner='or', filter_id=1,
+                                      **kwargs) for value in values]
+        df_filter_manager = DataFrameFilterManager(df_filters)
+        self.engine.factorized_columns = ['text'] if factorized else []
+        pd.testing.assert_frame_equal(data_frame.query(df_filter_manager.build_query()),
+                                      self.engine.filter_df(data_frame, df_filter_manager), f"{values} {kwargs}")
+
+    def test_same_as_query(self):
+        values = ['full', 'straße', 'nan', '100%', '.', '(db', 'x', 'y', 'z']
+        patterns = ['^d', 'WEB-0[0-9]', r'\d{3}', 'ok$', '(?:time)out', 'x', 'y', 'z']
+        string_df = self.df.astype({'text': 'string'})
+        for data_frame in [self.df, string_df, self.df.astype({'text': 'category'})]:
+            for factorized in [False, True]:
+                for match_case in [False, True]:
+                    self.assert_same_as_query(values, data_frame, factorized, match_case=match_case)
+                    self.assert_same_as_query(patterns, data_frame, factorized, match_case=match_case, regex=True)
+                    self.assert_same_as_query(values + [''], data_frame, factorized, match_case=match_case)
+        self.assertEqual(0, self.engine.evaluations)
+
+    def test_mixed_filters(self):
+        df_filters = [DataFrameFilter(column='text', value=value, operator='contains', joiner='or', filter_id=1,
+                                      match_case=i % 2 == 0, regex=i % 3 == 0) for i, value in
+                      enumerate(['d', 'Full', 'S+E', 'web', 'CPU', 'a.b', 'O', '[)]', 'closed', 'Ok'])]
+        df_filter_manager = DataFrameFilterManager(df_filters)
+        pd.testing.assert_frame_equal(self.df.query(df_filter_manager.build_query()),
+                                      self.engine.filter_df(self.df, df_filter_manager))
+        self.assertEqual(0, self.engine.evaluations)
+        self.assertEqual(3, len(get_contains_regexes(df_filters)))
+
+    def test_falls_back(self):
+        with self.assertWarns(UserWarning):
+            self.assert_same_as_query([r'(o)\1', 'a', 'b', 'c', 'd', 'e', 'f', 'g'], regex=True)
+        self.assertEqual(8, self.engine.evaluations)
+        self.assert_same_as_query(['(?i)ok', 'a', 'b', 'c', 'd', 'e', 'f', 'g'], regex=True)
+        self.assertEqual(16, self.engine.evaluations)
+        self.assert_same_as_query(['a', 'b'])
+        self.assertEqual(18, self.engine.evaluations)
+
+    def test_is_contains_group(self):
+        df_filter1 = DataFrameFilter(column='text', value='a', operator='contains', filter_id=1)
+        df_filter2 = DataFrameFilter(column='text', value='b', operator='contains', joiner='or', filter_id=1)
+        self.assertTrue(is_contains_group([df_filter1, df_filter2]))
+        self.assertFalse(is_contains_group([df_filter1]))
+        df_filter2.joiner = 'and'
+        self.assertFalse(is_contains_group([df_filter1, df_filter2]))
+
+    def test_string_dtype_known_to_some_filters(self):
+        df = pd.DataFrame({'text': pd.array(['x', 'ab', None], dtype='string')})
+        # Only the first filter knows the column is a 'string' column, the query of the others matches '<NA>' as 'nan'
+        df_filters = [DataFrameFilter(column='text', value=value, operator='contains', joiner='or', filter_id=1,
+                                      data_frame=df if i == 0 else None)
+                      for i, value in enumerate(['b', 'n', 'c', 'd', 'e', 'f', 'g', 'h', 'i'])]
+        self.assertFalse(is_contains_group(df_filters))
+        df_filter_manager = DataFrameFilterManager(df_filters)
+        self.assertEqual([1, 2], df.query(df_filter_manager.build_query()).index.tolist())
+        pd.testing.assert_frame_equal(df.query(df_filter_manager.build_query()),
+                                      self.engine.filter_df(df, df_filter_manager))
+
+    def test_get_literal_pattern(self):
+        self.assertEqual('(?:ab(?:c)?|b)', get_literal_pattern(['ab', 'abc', 'b', 'ab']))
+        self.assertEqual('(?:a\\.b)?', get_literal_pattern(['', 'a.b']))
+
+
+class TestDataFrameMaskEngineOptimize(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'id': range(12),
+                                'host': ['web-01', 'db-01', None, 'WEB-02', 'cache', 'web-03'] * 2,
+                                'price': [1.5, np.nan, 3.0, 4.5, 5.0, 6.5] * 2})
+        self.df_filters = [DataFrameFilter(column='host', value='W.B', operator='contains', regex=True, filter_id=1),
+                           DataFrameFilter(column='id', value=6, operator='<', filter_id=1),
+                           DataFrameFilter(column='id', value=6, operator='<', filter_id=1),
+                           DataFrameFilter(column='host', value='db', operator='startswith', joiner='or', filter_id=1),
+                           DataFrameFilter(column='price', value=4.0, operator='>', filter_id=2),
+                           DataFrameFilter(column='host', value='cache', operator='==', filter_id=3,
+                                           group_joiner='or')]
+        self.df_filter_manager = DataFrameFilterManager(self.df_filters)
+        self.engine = RowCountingMaskEngine(optimize=True)
+
+    def test_same_as_query(self):
+        expected = self.df.query(self.df_filter_manager.build_query())
+        for keep_group_masks in [False, True]:
+            self.engine.keep_group_masks = keep_group_masks
+            pd.testing.assert_frame_equal(expected, self.engine.filter_df(self.df, self.df_filter_manager))
+            pd.testing.assert_frame_equal(expected, self.engine.filter_df(self.df, self.df_filter_manager))
+
+    def test_short_circuits(self):
+        self.engine.filter_df(self.df, DataFrameFilterManager(self.df_filters[:4]))
+        # 'startswith' is the cheaper term and runs on all rows, the regular expression only on the rows it did not
+        # match with id < 6
+        self.assertEqual({('host', 'contains'): 5}, self.engine.rows)
+
+    def test_plan_terms(self):
+        terms = split_terms(self.df_filters[:4], [df_filter.joiner for df_filter in self.df_filters[1:4]])
+        self.assertEqual([self.df_filters[:3], self.df_filters[3:4]], terms)
+        plan, cost, selectivity = self.engine.plan_group(self.df, self.df_filters[:4])
+        self.assertEqual([self.df_filters[3:4], self.df_filters[1:2] + self.df_filters[:1]], plan)
+        self.assertGreater(cost, 0)
+        self.assertLess(selectivity, 1)
+        plan, _, _ = plan_terms([[1, 2], [2, 1, 1], [3]], lambda operand: operand, lambda operand: (operand, 0.5))
+        self.assertEqual([[3], [1, 2]], plan)
+
+
+class TestDataFrameMaskEngineFacets(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'region': ['north', 'south', 'east', None, 'north', 'south', 'west', 'north'],
+                                'status': pd.Categorical(['ok', 'ok', 'down', 'ok', 'down', 'ok', 'ok', 'ok'],
+                                                         categories=['ok', 'down', 'unknown']),
+                                'latency': [10, 250, 30, 400, 15, 20, 500, 45]})
+        self.df_filters = [DataFrameFilter(column='region', value='north', operator='==', filter_id=1),
+                           DataFrameFilter(column='region', value='south', operator='==', joiner='or', filter_id=1),
+                           DataFrameFilter(column='status', value='ok', operator='==', filter_id=2),
+                           DataFrameFilter(column='latency', value=100, operator='<', filter_id=3)]
+        self.df_filter_manager = DataFrameFilterManager(self.df_filters)
+
+    def get_expected(self, column):
+        df_filters = [df_filter for df_filter in self.df_filters if df_filter.column != column]
+        query = DataFrameFilterManager(df_filters).build_query()
+        data_frame = self.df.query(query) if query else self.df
+        return data_frame[column].value_counts(dropna=False)
+
+    def test_same_as_query(self):
+        engine = CountingMaskEngine(keep_group_masks=True)
+        facet_counts = self.df_filter_manager.get_facet_counts(self.df, ['region', 'status', 'latency'], engine=engine)
+        evaluations = engine.evaluations
+        self.assertGreater(evaluations, 0)
+        for column, counts in facet_counts.items():
+            expected = self.get_expected(column)
+            self.assertEqual(expected.sum(), counts.sum())
+            self.assertEqual(expected.tolist(), counts.reindex(expected.index).tolist())
+        self.assertEqual({'ok': 3, 'down': 1, 'unknown': 0}, facet_counts['status'].to_dict())
+        self.assertEqual(['east', 'north', 'south', 'west'], facet_counts['region'].index[:4].tolist())
+        self.assertEqual(0, facet_counts['region']['west'])
+        self.assertTrue(pd.isna(facet_counts['region'].index[-1]))
+
+        self.df_filter_manager.disable_filters_by_id(2)
+        # The masks of the remaining groups are kept by the manager
+        self.df_filter_manager.get_facet_counts(self.df, ['status'], engine=engine)
+        self.assertEqual(evaluations, engine.evaluations)
+
+    def test_without_filters(self):
+        counts = DataFrameFilterManager().get_facet_counts(self.df, ['latency'])['latency']
+        self.assertEqual(len(self.df), counts.sum())
+        self.assertEqual(sorted(self.df['latency']), counts.index.tolist())
+
+
+class RowCountingMaskEngine(DataFrameMaskEngine):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.rows = {}
+
+    def evaluate_filter_rows(self, data_frame, df_filter, positions):
+        key = (df_filter.column, df_filter.operator)
+        self.rows[key] = self.rows.get(key, 0) + len(positions)
+        return super().evaluate_filter_rows(data_frame, df_filter, positions)
+
+
+class CountingMaskEngine(DataFrameMaskEngine):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.evaluations = 0
+
+    def evaluate_filter(self, data_frame, df_filter):
+        self.evaluations += 1
+        return super().evaluate_filter(data_frame, df_filter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import unittest
+import transude as txd
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_parallel_engine import DataFrameParallelEngine, is_shareable
+
+
+class TestDataFrameParallelEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engines = [DataFrameParallelEngine(workers=3, min_rows=0, engine=engine) for engine in ['query', 'mask']]
+
+    @classmethod
+    def tearDownClass(cls):
+        for engine in cls.engines:
+            engine.close()
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        size = 1001
+        self.df = pd.DataFrame({
+            'id': np.arange(size),
+            'price': np.where(rng.random(size) < 0.1, np.nan, rng.random(size) * 100),
+            'when': pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 365, size), unit='D'),
+            'host': rng.choice(['web-01', 'web-02', 'db-01', None], size),
+            'level': pd.Categorical(rng.choice(['INFO', 'WARN', 'ERROR'], size)),
+            'count': pd.array(np.where(rng.random(size) < 0.1, None, rng.integers(0, 10, size)), dtype='Int64'),
+        }, index=rng.permutation(size))
+        df_filters = [DataFrameFilter(column='price', value=50.0, operator='<', filter_id=1),
+                      DataFrameFilter(column='price', value=90.0, operator='>', joiner='or', filter_id=1),
+                      DataFrameFilter(column='host', value='WEB', operator='contains', filter_id=2,
+                                      data_frame=self.df),
+                      DataFrameFilter(column='level', value='ERROR', operator='!=', filter_id=3),
+                      DataFrameFilter(column='count', value=3, operator='>=', filter_id=4, group_joiner='or'),
+                      DataFrameFilter(column='id', value=17, operator='==', filter_id=5, group_joiner='or')]
+        self.df_filter_manager = DataFrameFilterManager(df_filters)
+
+    def test_same_as_serial(self):
+        expected = txd.filter_df_via_manager(self.df, self.df_filter_manager)
+        for engine in self.engines:
+            pd.testing.assert_frame_equal(expected, txd.filter_df_via_manager(self.df, self.df_filter_manager,
+                                                                              engine=engine), repr(engine))
+            pd.testing.assert_frame_equal(expected, engine.filter_serially(self.df, self.df_filter_manager))
+
+    def test_datetime_with_mask_engine(self):
+        df_filter_manager = DataFrameFilterManager([
+            DataFrameFilter(column='when', value=pd.Timestamp('2022-06-01'), operator='>=')])
+        expected = txd.filter_df_via_manager(self.df, df_filter_manager, engine='mask')
+        pd.testing.assert_frame_equal(expected, self.engines[1].filter_df(self.df, df_filter_manager))
+
+    def test_no_filters_and_empty_frame(self):
+        engine = self.engines[0]
+        self.assertIs(self.df, engine.filter_df(self.df, DataFrameFilterManager()))
+        empty_df = self.df.iloc[:0]
+        pd.testing.assert_frame_equal(empty_df, engine.filter_df(empty_df, self.df_filter_manager))
+        small_df = self.df.iloc[:2]
+        pd.testing.assert_frame_equal(txd.filter_df_via_manager(small_df, self.df_filter_manager),
+                                      engine.filter_df(small_df, self.df_filter_manager))
+
+    def test_min_rows(self):
+        with DataFrameParallelEngine(workers=2) as engine:
+            pd.testing.assert_frame_equal(txd.filter_df_via_manager(self.df, self.df_filter_manager),
+                                          engine.filter_df(self.df, self.df_filter_manager))
+            self.assertIsNone(engine._executor)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            DataFrameParallelEngine(workers=0)
+        with self.assertRaises(ValueError):
+            DataFrameParallelEngine(engine='polars')
+
+    def test_is_shareable(self):
+        self.assertTrue(is_shareable(self.df['price']))
+        self.assertTrue(is_shareable(self.df['when']))
+        self.assertFalse(is_shareable(self.df['host']))
+        self.assertFalse(is_shareable(self.df['count']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import datetime
+import os
+import tempfile
+import pandas as pd
+import unittest
+import transude as txd
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_polars_engine import DataFramePolarsEngine, convert_value
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+
+@unittest.skipIf(pl is None, "polars is not installed")
+class TestDataFramePolarsEngine(unittest.TestCase):
+    def setUp(self):
+        self.pd_df = pd.DataFrame({
+            'id': [1, 2, 3, 4, 5, 6],
+            'color': ['blue', 'red', 'Green', 'a.b', 'blue', 'RED'],
+            'price': [1.5, 2.5, 3.5, 4.5, 5.5, 6.5],
+            'when': pd.to_datetime(['2022-01-01', '2022-02-01', '2022-03-01', '2022-04-01', '2022-05-01',
+                                    '2022-06-01']),
+        })
+        self.pl_df = pl.from_pandas(self.pd_df)
+        self.engine = DataFramePolarsEngine()
+
+    def assert_same_as_query(self, df_filters):
+        df_filter_manager = DataFrameFilterManager(df_filters)
+        expected = self.pd_df.query(df_filter_manager.build_query())['id'].tolist()
+        self.assertEqual(expected, self.engine.filter_df(self.pl_df, df_filter_manager)['id'].to_list(),
+                         df_filter_manager.build_query())
+
+    def test_same_as_query(self):
+        for df_filter in [DataFrameFilter(column='price', value=2.5, operator='>'),
+                          DataFrameFilter(column='id', value=3, operator='<='),
+                          DataFrameFilter(column='color', value='red', operator='!='),
+                          DataFrameFilter(column='color', value='re', operator='contains'),
+                          DataFrameFilter(column='color', value='re', operator='contains', match_case=True),
+                          DataFrameFilter(column='color', value='.', operator='contains'),
+                          DataFrameFilter(column='color', value='^[bg]', operator='contains', regex=True),
+                          DataFrameFilter(column='color', value='b', operator='startswith'),
+                          DataFrameFilter(column='color', value='d', operator='endswith'),
+                          DataFrameFilter(column='color', value='[a-z]', operator='match'),
+                          DataFrameFilter(column='id', value='1', operator='endswith'),
+                          DataFrameFilter(column='color', value=['blue', 'red', 'purple'], operator='in'),
+                          DataFrameFilter(column='id', value=[1, 4], operator='not in')]:
+            self.assert_same_as_query([df_filter])
+
+    def test_groups_and_joiners(self):
+        self.assert_same_as_query([
+            DataFrameFilter(column='color', value='blue', operator='==', joiner='or', filter_id=1),
+            DataFrameFilter(column='color', value='red', operator='==', joiner='or', filter_id=1),
+            DataFrameFilter(column='price', value=5.0, operator='<', filter_id=2, group_joiner='and'),
+            DataFrameFilter(column='id', value=6, operator='==', filter_id=3, group_joiner='or')])
+        self.assert_same_as_query([
+            DataFrameFilter(column='id', value=1, operator='==', filter_id=1),
+            DataFrameFilter(column='id', value=2, operator='==', joiner='or', filter_id=1),
+            DataFrameFilter(column='price', value=1.0, operator='>', joiner='and', filter_id=1)])
+
+    def test_membership_test(self):
+        df_filters = [DataFrameFilter(column='id', value=value, operator='!=', filter_id=1) for value in [2, 4, 9]]
+        self.assert_same_as_query(df_filters)
+        df_filters = txd.build_df_filters(columns='id', values=['2', '4', '9'], operator='==', joiner='or')
+        for df_filter in df_filters:
+            df_filter.filter_id = 1
+        self.assertEqual([2, 4], self.engine.filter_df(self.pl_df, DataFrameFilterManager(df_filters))['id'].to_list())
+
+    def test_string_values(self):
+        df_filters = txd.build_df_filters(columns=['price', 'when'], values=['2', '2022-04-01'], operator='>')
+        self.assertEqual([5, 6], self.engine.filter_df(self.pl_df, DataFrameFilterManager(df_filters))['id'].to_list())
+        df_filter = DataFrameFilter(column='when', value=pd.Timestamp('2022-05-01'), operator='>=')
+        self.assertEqual([5, 6], self.engine.filter_df(self.pl_df, DataFrameFilterManager([df_filter]))['id'].to_list())
+
+    def test_convert_value(self):
+        self.assertEqual(3, convert_value('3', pl.Int64))
+        self.assertEqual(2.5, convert_value('2.5', pl.Int32))
+        self.assertEqual(True, convert_value('True', pl.Boolean))
+        self.assertEqual(datetime.date(2022, 1, 1), convert_value('2022-01-01', pl.Date))
+        self.assertEqual('3', convert_value('3', pl.String))
+        self.assertEqual('3', convert_value('3', None))
+
+    def test_lazy_frame(self):
+        df_filter_manager = DataFrameFilterManager([DataFrameFilter(column='price', value=3.0, operator='>'),
+                                                    DataFrameFilter(column='color', value='b', operator='contains')])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.parquet')
+            self.pl_df.write_parquet(path)
+            lazy_frame = self.engine.filter_df(pl.scan_parquet(path), df_filter_manager)
+            self.assertIsInstance(lazy_frame, pl.LazyFrame)
+            self.assertIn('SELECTION', lazy_frame.explain().upper().split('PARQUET SCAN')[-1])
+            self.assertEqual([4, 5], lazy_frame.collect()['id'].to_list())
+
+    def test_filter_df(self):
+        self.assertEqual([2, 6], txd.filter_df(self.pl_df, columns='color', values='red', operator='contains')['id']
+                         .to_list())
+        lazy_frame = txd.filter_df(self.pl_df.lazy(), columns='id', values=4, operator='>=')
+        self.assertEqual([4, 5, 6], lazy_frame.collect()['id'].to_list())
+        df_filter_manager = DataFrameFilterManager()
+        self.assertIs(self.pl_df, txd.filter_df_via_manager(self.pl_df, df_filter_manager, engine=self.engine))
+        with self.assertRaises(TypeError):
+            self.engine.filter_df(self.pd_df, df_filter_manager)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+import pandas as pd
+import unittest
+import transude as txd
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_session import DataFrameFilterSession
+
+
+class TestDataFrameFilterSession(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'id': range(10), 'parity': ['even', 'odd'] * 5})
+        self.df_filter_manager = DataFrameFilterManager([
+            DataFrameFilter(column='parity', value='even', operator='==')])
+        self.calls = []
+        self.active = 0
+        self.overlapped = False
+        self.lock = threading.Lock()
+
+    def record(self, value, duration=0.0):
+        with self.lock:
+            self.active += 1
+            self.overlapped |= self.active > 1
+        time.sleep(duration)
+        with self.lock:
+            self.active -= 1
+            self.calls.append(value)
+        return value
+
+    async def test_async_filter_functions(self):
+        expected = txd.filter_df_via_manager(self.df, self.df_filter_manager)
+        pd.testing.assert_frame_equal(expected, await txd.filter_df_via_manager_async(self.df,
+                                                                                       self.df_filter_manager))
+        pd.testing.assert_frame_equal(expected, await txd.filter_df_async(self.df, 'parity', 'even', '=='))
+        async with DataFrameFilterSession() as session:
+            pd.testing.assert_frame_equal(expected, await txd.filter_df_via_manager_async(
+                self.df, self.df_filter_manager, engine='mask', session=session))
+            pd.testing.assert_frame_equal(expected, await txd.filter_df_async(self.df, 'parity', 'even', '==',
+                                                                              session=session))
+
+    async def test_debounce_supersedes_pending_requests(self):
+        async with DataFrameFilterSession(debounce=0.05) as session:
+            results = await asyncio.gather(*[session.run(self.record, i) for i in range(5)], return_exceptions=True)
+        self.assertEqual([4], self.calls)
+        self.assertEqual(4, results[-1])
+        self.assertTrue(all(isinstance(result, asyncio.CancelledError) for result in results[:-1]))
+
+    async def test_running_request_is_not_overlapped(self):
+        async with DataFrameFilterSession() as session:
+            first = asyncio.ensure_future(session.run(self.record, 1, 0.1))
+            await asyncio.sleep(0.02)
+            second = asyncio.ensure_future(session.run(self.record, 2, 0.0))
+            third = asyncio.ensure_future(session.run(self.record, 3, 0.0))
+            self.assertEqual(3, await third)
+            for superseded in (first, second):
+                with self.assertRaises(asyncio.CancelledError):
+                    await superseded
+        # The running request finished, the queued one never started, and no two requests ran at the same time
+        self.assertEqual([1, 3], self.calls)
+        self.assertFalse(self.overlapped)
+
+    async def test_exceptions(self):
+        async with DataFrameFilterSession() as session:
+            with self.assertRaises(ZeroDivisionError):
+                await session.run(lambda: 1 / 0)
+            self.assertEqual(1, await session.run(self.record, 1))
+        with self.assertRaises(ValueError):
+            DataFrameFilterSession(debounce=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import unittest
+import transude as txd
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_statistics import ColumnStatistics, DataFrameStatistics, to_number
+
+
+class TestDataFrameStatistics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        size = 50_000
+        self.df = pd.DataFrame({
+            'id': np.arange(size),
+            'price': np.where(rng.random(size) < 0.1, np.nan, rng.normal(100, 10, size)),
+            'when': pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 365, size), unit='D'),
+            'host': rng.choice(['web-01', 'web-02', 'db-01', None], size, p=[0.5, 0.3, 0.1, 0.1]),
+            'level': pd.Categorical(rng.choice(['INFO', 'WARN', 'ERROR'], size)),
+            'count': pd.array(np.where(rng.random(size) < 0.2, None, rng.integers(0, 5, size)), dtype='Int64'),
+        })
+        self.statistics = DataFrameStatistics(sample_size=5_000)
+
+    def assert_close(self, df_filter_manager, tolerance=0.02):
+        expected = len(self.df.query(df_filter_manager.build_query()))
+        estimated = self.statistics.estimate_rows(self.df, df_filter_manager)
+        self.assertAlmostEqual(expected / len(self.df), estimated / len(self.df), delta=tolerance,
+                               msg=df_filter_manager.build_query())
+
+    def test_estimate_filter_rows(self):
+        for column, value, operator in [('id', 17, '=='), ('id', 1_000, '<'), ('price', 110.0, '>='),
+                                        ('price', 100.0, '!='), ('when', '2022-06-01', '>'), ('host', 'db-01', '!='),
+                                        ('host', 'WEB', 'contains'), ('level', 'ERROR', '=='), ('count', 2, '>'),
+                                        ('count', 3, '!='), ('host', 'a', '>'), ('host', ['web-02', 'db-01'], 'in'),
+                                        ('id', list(range(5_000)), 'not in')]:
+            self.assert_close(DataFrameFilterManager([DataFrameFilter(column=column, value=value, operator=operator)]))
+        self.assertEqual(1, self.statistics.estimate_filter_rows(self.df, DataFrameFilter(column='id', value=17,
+                                                                                          operator='==')))
+        self.assertEqual(0, self.statistics.estimate_filter_rows(self.df, DataFrameFilter(column='id', value=-1,
+                                                                                          operator='==')))
+
+    def test_estimate_rows(self):
+        self.assert_close(DataFrameFilterManager([
+            DataFrameFilter(column='host', value='web-01', operator='==', filter_id=1),
+            DataFrameFilter(column='host', value='db-01', operator='==', joiner='or', filter_id=1),
+            DataFrameFilter(column='price', value=100.0, operator='<', filter_id=2),
+            DataFrameFilter(column='id', value=100, operator='<', filter_id=3, group_joiner='or')]))
+        self.assert_close(DataFrameFilterManager([
+            DataFrameFilter(column='host', value='web-01', operator='!=', filter_id=1),
+            DataFrameFilter(column='host', value='db-01', operator='!=', filter_id=1)]))
+        self.assertEqual(len(self.df), self.statistics.estimate_rows(self.df, DataFrameFilterManager()))
+
+    def test_cached_per_frame_version(self):
+        statistics = self.statistics.get_column_statistics(self.df, 'price')
+        self.assertIs(statistics, self.statistics.get_column_statistics(self.df, 'price'))
+        txd.bump_frame_version(self.df)
+        self.assertIsNot(statistics, self.statistics.get_column_statistics(self.df, 'price'))
+
+    def test_column_statistics(self):
+        statistics = ColumnStatistics(self.df['host'], sample_size=5_000)
+        self.assertEqual(self.df['host'].isna().sum(), statistics.null_count)
+        self.assertEqual(3, statistics.distinct)
+        self.assertEqual(('db-01', 'web-02'), (statistics.min, statistics.max))
+        self.assertEqual('web-01', next(iter(statistics.top_values)))
+        self.assertIsNone(statistics.histogram)
+
+        statistics = ColumnStatistics(self.df['id'], sample_size=5_000, bins=10)
+        self.assertEqual(len(self.df), statistics.distinct)
+        self.assertEqual(11, len(statistics.histogram))
+        self.assertEqual((0, len(self.df) - 1), (statistics.histogram[0], statistics.histogram[-1]))
+
+        statistics = ColumnStatistics(pd.Series([], dtype=float))
+        self.assertEqual(0.0, statistics.estimate_selectivity(DataFrameFilter(column='x', value=1.0, operator='>')))
+
+    def test_column_statistics_of_mostly_missing_numbers(self):
+        # The sample of 5,000 rows misses the only number
+        df = pd.DataFrame({'price': np.full(200_001, np.nan)})
+        df.loc[100_000, 'price'] = 5.0
+        statistics = ColumnStatistics(df['price'], sample_size=5_000)
+        self.assertEqual((5.0, 5.0), (statistics.histogram[0], statistics.histogram[-1]))
+        self.assertEqual(0.0, statistics.estimate_selectivity(DataFrameFilter(column='price', value=6.0,
+                                                                              operator='>')))
+        df_filter_manager = DataFrameFilterManager([DataFrameFilter(column='price', value=1.0, operator='>')])
+        engine = txd.DataFrameMaskEngine(optimize=True, statistics=self.statistics)
+        pd.testing.assert_frame_equal(df.iloc[[100_000]], engine.filter_df(df, df_filter_manager))
+
+    def test_to_number(self):
+        self.assertEqual(1.5, to_number(1.5, 'f'))
+        self.assertIsNone(to_number('1.5', 'f'))
+        self.assertIsNone(to_number(True, 'i'))
+        self.assertEqual(pd.Timestamp('2022-01-01').value, to_number('2022-01-01', 'M'))
+        self.assertIsNone(to_number('not a date', 'M'))
+
+    def test_mask_engine(self):
+        df_filter_manager = DataFrameFilterManager([
+            DataFrameFilter(column='host', value='web', operator='contains', regex=True, filter_id=1),
+            DataFrameFilter(column='id', value=100, operator='>', filter_id=1)])
+        engine = txd.DataFrameMaskEngine(optimize=True, statistics=self.statistics)
+        plan, _, _ = engine.plan_group(self.df, df_filter_manager.data_frame_filters)
+        # Nearly all rows have id > 100, so the regular expression runs first despite its cost
+        self.assertEqual(['host', 'id'], [df_filter.column for df_filter in plan[0]])
+        pd.testing.assert_frame_equal(self.df.query(df_filter_manager.build_query()),
+                                      engine.filter_df(self.df, df_filter_manager))
+
+
+if __name__ == '__main__':
+    unittest.main()
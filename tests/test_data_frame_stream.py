@@ -0,0 +1,75 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import unittest
+import transude as txd
+from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter_manager import DataFrameFilterManager
+from transude.data_frame_stream import get_file_format, read_chunks, write_chunks
+
+
+class TestDataFrameStream(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'id': np.arange(1000),
+                                'host': rng.choice(['web-01', 'web-02', 'db-01'], 1000),
+                                'latency': rng.integers(0, 500, 1000)})
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.directory.name, 'data.csv')
+        self.jsonl_path = os.path.join(self.directory.name, 'data.jsonl')
+        self.df.to_csv(self.csv_path, index=False)
+        self.df.to_json(self.jsonl_path, orient='records', lines=True)
+        self.df_filter_manager = DataFrameFilterManager([
+            DataFrameFilter(column='host', value='WEB', operator='contains', filter_id=1),
+            DataFrameFilter(column='latency', value=250, operator='>=', filter_id=2)])
+        self.expected = txd.filter_df_via_manager(self.df, self.df_filter_manager)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_filter_df_chunks_via_manager(self):
+        for source in [self.csv_path, self.jsonl_path, (self.df.iloc[i:i + 300] for i in range(0, 1000, 300))]:
+            for engine in ['query', 'mask']:
+                chunks = list(txd.filter_df_chunks_via_manager(source, self.df_filter_manager, engine=engine,
+                                                               chunksize=300))
+                self.assertEqual(4, len(chunks))
+                pd.testing.assert_frame_equal(self.expected, pd.concat(chunks))
+                if not isinstance(source, str):
+                    break
+
+    def test_filter_df_chunks(self):
+        chunks = txd.filter_df_chunks(self.csv_path, columns=['latency', 'host'], values=['250', 'db-01'],
+                                      operator='>=', chunksize=300)
+        expected = self.df[(self.df['latency'] >= 250) & (self.df['host'] >= 'db-01')]
+        pd.testing.assert_frame_equal(expected, pd.concat(chunks))
+
+        chunks = list(txd.filter_df_chunks(self.csv_path, columns='id', values='7', operator='==', chunksize=300))
+        self.assertEqual([7], pd.concat(chunks)['id'].tolist())
+        self.assertEqual([1, 0, 0, 0], [len(chunk) for chunk in chunks])
+
+    def test_write_chunks(self):
+        for name in ['filtered.csv', 'filtered.jsonl', 'filtered.tsv']:
+            path = os.path.join(self.directory.name, name)
+            chunks = txd.filter_df_chunks_via_manager(self.csv_path, self.df_filter_manager, chunksize=300)
+            self.assertEqual(len(self.expected), write_chunks(chunks, path))
+            pd.testing.assert_frame_equal(self.expected.reset_index(drop=True), pd.concat(read_chunks(path))
+                                          .reset_index(drop=True))
+
+        written = []
+        self.assertEqual(len(self.expected),
+                         write_chunks(txd.filter_df_chunks_via_manager(self.csv_path, self.df_filter_manager),
+                                      written.append))
+        self.assertEqual(1, len(written))
+        with self.assertRaises(ValueError):
+            write_chunks([], os.path.join(self.directory.name, 'filtered.csv.gz'))
+
+    def test_get_file_format(self):
+        self.assertEqual('csv', get_file_format('data.csv.gz'))
+        self.assertEqual('jsonl', get_file_format('data.ndjson'))
+        with self.assertRaises(ValueError):
+            get_file_format('data.parquet')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
+import copy
+import gc
 import itertools
+import pickle
+import numpy as np
 import pandas as pd
 import unittest
 import transude as txd
 from datetime import datetime
-from transude.data_frame_filter import DataFrameFilter
+from transude.data_frame_filter import DataFrameFilter, AND_JOINERS, OR_JOINERS
 from transude.data_frame_filter_manager import DataFrameFilterManager
 from transude.data_frame_filter_factory import DataFrameFilterFactory
 
@@ -46,6 +50,39 @@ class TestPandasDataFrameFilter(unittest.TestCase):
                          f"filter_id={df_filter.filter_id}, match_case=False, regex=False, data_frame=None, "
                          f"omit_on_clear=False, common_name=None, group_joiner=&)", repr(df_filter))
 
+        df = pd.DataFrame({'col1': ['val1', 'val2']})
+        df_filter = DataFrameFilter(column='col1', value='val1', operator='==', data_frame=df)
+        self.assertIn("data_frame=DataFrame(shape=(2, 1))", repr(df_filter))
+
+    def test_data_frame_not_kept_alive(self):
+        df = pd.DataFrame({'col1': pd.array(['val1', 'val2'], dtype='string')})
+        df_filter = DataFrameFilter(column='col1', value='val1', operator='contains', data_frame=df)
+        self.assertFalse(hasattr(df_filter, '__dict__'))
+        self.assertIs(df, copy.copy(df_filter).data_frame)
+        pickled_filter = pickle.loads(pickle.dumps(df_filter))
+        self.assertIsNone(pickled_filter.data_frame)
+        self.assertEqual(df_filter.get_query(), pickled_filter.get_query())
+
+        del df
+        gc.collect()
+        self.assertIsNone(df_filter.data_frame)
+        # The dtype of the column is kept
+        self.assertEqual("col1.str.contains('val1', case=False, regex=False)", df_filter.get_query())
+        df_filter.column = 'col2'
+        self.assertEqual("col2.astype('str').str.contains('val1', case=False, regex=False)", df_filter.get_query())
+
+    def test_membership_operators(self):
+        df_filter = DataFrameFilter(column='col1', value=['val1', None, 'val2'], operator='in')
+        self.assertIsInstance(df_filter.value, np.ndarray)
+        self.assertEqual("col1 in ['val1', 'val2']", df_filter.get_query())
+        self.assertEqual(df_filter.get_signature(),
+                         DataFrameFilter(column='col1', value=['val1', None, 'val2'], operator='in').get_signature())
+        df_filter = DataFrameFilter(column='col1', value=np.array([1, 2]), operator='not in')
+        self.assertEqual("col1 not in [1, 2]", df_filter.get_query())
+        self.assertEqual(('col1', [1, 2], True),
+                         (lambda column, values, negated: (column, values.tolist(), negated))(
+                             *DataFrameFilterManager.get_membership_test([df_filter])))
+
     def test_str(self):
         df_filter = DataFrameFilter(column='col1', value='val1', operator='==')
         self.assertEqual("col1 == 'val1'", str(df_filter))
@@ -302,6 +339,147 @@ class TestPandasDataFrameQueryBuilder(unittest.TestCase):
 
         self.assertEqual("((col1 == 'val1')) and ((col2 == 'val2')) or ((col3 == 'val3'))", df_query_builder.build_query())
 
+    def test_build_query_with_shared_filter_id(self):
+        df_filter1 = DataFrameFilter(column='col1', value='val1', operator='==', joiner='or', filter_id=1)
+        df_filter2 = DataFrameFilter(column='col1', value='val2', operator='==', joiner='or', filter_id=1)
+        df_filter3 = DataFrameFilter(column='col1', value='val3', operator='==', joiner='or', filter_id=1)
+        df_filter4 = DataFrameFilter(column='col2', value='val4', operator='==', filter_id=2)
+        df_query_builder = DataFrameFilterManager([df_filter1, df_filter2, df_filter3, df_filter4])
+        self.assertEqual("((col1 == 'val1') or (col1 == 'val2') or (col1 == 'val3')) & ((col2 == 'val4'))",
+                         df_query_builder.build_query())
+
+        df_filter3.in_use = False
+        self.assertEqual("((col1 == 'val1') or (col1 == 'val2')) & ((col2 == 'val4'))", df_query_builder.build_query())
+        self.assertEqual([[df_filter1, df_filter2], [df_filter4]], df_query_builder.get_filter_groups())
+
+    def test_build_query_with_non_adjacent_filter_id(self):
+        df_filter1 = DataFrameFilter(column='col1', value='val1', operator='==', filter_id=1)
+        df_filter2 = DataFrameFilter(column='col2', value='val2', operator='==', filter_id=2)
+        df_filter3 = DataFrameFilter(column='col1', value='val3', operator='==', joiner='or', filter_id=1)
+        df_query_builder = DataFrameFilterManager([df_filter1, df_filter2, df_filter3])
+        self.assertEqual([[df_filter1, df_filter3], [df_filter2]], df_query_builder.get_filter_groups())
+        self.assertEqual([df_filter1, df_filter3, df_filter2], df_query_builder.data_frame_filters)
+        self.assertEqual("((col1 == 'val1') or (col1 == 'val3')) & ((col2 == 'val2'))", df_query_builder.build_query())
+
+        df_filter4 = DataFrameFilter(column='col1', value='val4', operator='==', joiner='or', filter_id=1)
+        df_query_builder.add_filter(df_filter4)
+        df_query_builder.disable_filters_by_id(2)
+        self.assertEqual([[df_filter1, df_filter3, df_filter4]], df_query_builder.get_filter_groups())
+        df_query_builder.remove_filters_by_id(1)
+        self.assertEqual([df_filter2], df_query_builder.data_frame_filters)
+
+    def test_data_frame_filters_write_through(self):
+        df_filter1 = DataFrameFilter(column='col1', value='val1', operator='==', filter_id=1)
+        df_filter2 = DataFrameFilter(column='col2', value='val2', operator='==', filter_id=2)
+        df_filter3 = DataFrameFilter(column='col1', value='val3', operator='==', joiner='or', filter_id=1)
+        df_query_builder = DataFrameFilterManager([df_filter1, df_filter2])
+        data_frame_filters = df_query_builder.data_frame_filters
+        self.assertIs(data_frame_filters, df_query_builder.data_frame_filters)
+
+        # Changes in place are put back in query order
+        data_frame_filters.append(df_filter3)
+        self.assertEqual([df_filter1, df_filter3, df_filter2], data_frame_filters)
+        self.assertEqual([[df_filter1, df_filter3], [df_filter2]], df_query_builder.get_filter_groups())
+        del data_frame_filters[0]
+        self.assertEqual("((col1 == 'val3')) & ((col2 == 'val2'))", df_query_builder.build_query())
+        data_frame_filters[1:] = []
+        data_frame_filters += [df_filter1]
+        self.assertEqual([[df_filter3, df_filter1]], df_query_builder.get_filter_groups())
+        data_frame_filters.sort(key=lambda df_filter: df_filter.value)
+        self.assertEqual([df_filter1, df_filter3], df_query_builder.data_frame_filters)
+
+        # Changes through the manager show in the list while it is referenced
+        df_query_builder.add_filter(df_filter2)
+        df_query_builder.remove_filters_by_id(1)
+        self.assertEqual([df_filter2], data_frame_filters)
+        df_query_builder.clear_filters()
+        self.assertEqual([], data_frame_filters)
+
+        # Copies are plain lists
+        data_frame_filters.append(df_filter1)
+        for copied in [data_frame_filters.copy(), copy.copy(data_frame_filters), data_frame_filters[:],
+                       pickle.loads(pickle.dumps(data_frame_filters))]:
+            self.assertIs(list, type(copied))
+            copied.append(df_filter2)
+            self.assertEqual([df_filter1], df_query_builder.data_frame_filters)
+        copied_builder = copy.deepcopy(df_query_builder)
+        copied_builder.data_frame_filters.append(df_filter2)
+        self.assertEqual(2, len(copied_builder.data_frame_filters))
+        self.assertEqual([df_filter1], data_frame_filters)
+        self.assertEqual(1, len(pickle.loads(pickle.dumps(df_query_builder)).data_frame_filters))
+
+    def test_build_query_with_membership_test(self):
+        values = [f'val{i}' for i in range(DataFrameFilterManager.membership_threshold)]
+        df_filters = DataFrameFilterFactory(columns='col1', values=values, operator='==', joiner='or',
+                                            filter_id=1).create_filters()
+        df_filters.append(DataFrameFilter(column='col2', value='val4', operator='==', filter_id=2))
+        df_query_builder = DataFrameFilterManager(df_filters)
+        self.assertEqual(f"((col1 in {values!r})) & ((col2 == 'val4'))", df_query_builder.build_query())
+        self.assertEqual(1, len(self.df.query(df_query_builder.build_query())))
+
+        df_filters = DataFrameFilterFactory(columns='col1', values=values, operator='!=', filter_id=1).create_filters()
+        df_query_builder = DataFrameFilterManager(df_filters)
+        self.assertEqual(f"((col1 not in {values!r}))", df_query_builder.build_query())
+        self.assertEqual(0, len(self.df.query(df_query_builder.build_query())))
+
+        df_filters[1].joiner = 'or'
+        self.assertIsNone(DataFrameFilterManager.get_membership_test(df_filters))
+        self.assertNotIn(' in ', df_query_builder.build_query())
+
+    def test_get_membership_test(self):
+        df_filter1 = DataFrameFilter(column='col1', value='val1', operator='==', joiner='or', filter_id=1)
+        df_filter2 = DataFrameFilter(column='col1', value='val2', operator='==', joiner='|', filter_id=1)
+        df_filter3 = DataFrameFilter(column='col2', value='val2', operator='==', joiner='or', filter_id=1)
+        df_filter4 = DataFrameFilter(column='col1', value=None, operator='==', joiner='or', filter_id=1)
+        self.assertEqual(('col1', ['val1', 'val2'], False),
+                         DataFrameFilterManager.get_membership_test([df_filter1, df_filter2]))
+        self.assertIsNone(DataFrameFilterManager.get_membership_test([df_filter1]))
+        self.assertIsNone(DataFrameFilterManager.get_membership_test([df_filter1, df_filter3]))
+        self.assertIsNone(DataFrameFilterManager.get_membership_test([df_filter1, df_filter4]))
+
+    def test_build_query_cached(self):
+        df_filter1 = DataFrameFilter(column='col1', value='val1', operator='==', filter_id=1)
+        df_filter2 = DataFrameFilter(column='col2', value='val4', operator='==', filter_id=2, data_frame=self.df)
+        df_query_builder = DataFrameFilterManager([df_filter1])
+        query = df_query_builder.build_query()
+        self.assertIs(query, df_query_builder.build_query())
+        # Changes to filters of other managers do not rebuild the query
+        DataFrameFilter(column='col1', value='val1', operator='==').in_use = False
+        self.assertIs(query, df_query_builder.build_query())
+
+        version = df_query_builder.version
+        df_query_builder.add_filter(df_filter2)
+        self.assertLess(version, df_query_builder.version)
+        self.assertEqual("((col1 == 'val1')) & ((col2 == 'val4'))", df_query_builder.build_query())
+        # Filters changed directly, and filters added to the list directly, are picked up too
+        df_filter1.in_use = False
+        self.assertEqual("((col2 == 'val4'))", df_query_builder.build_query())
+        df_filter2.value = 'val5'
+        self.assertEqual("((col2 == 'val5'))", df_query_builder.build_query())
+        df_query_builder.data_frame_filters.append(DataFrameFilter(column='col1', value='val2', operator='=='))
+        self.assertEqual("((col2 == 'val5')) & ((col1 == 'val2'))", df_query_builder.build_query())
+        df_query_builder.data_frame_filters.reverse()
+        self.assertEqual("((col1 == 'val2')) & ((col2 == 'val5'))", df_query_builder.build_query())
+        df_query_builder.enable_filters()
+        self.assertEqual("((col1 == 'val2')) & ((col2 == 'val5')) & ((col1 == 'val1'))",
+                         df_query_builder.build_query())
+        df_filter1.filter_id = 2
+        self.assertEqual("((col1 == 'val2')) & ((col2 == 'val5') and (col1 == 'val1'))",
+                         df_query_builder.build_query())
+        df_filter3 = DataFrameFilter(column='col1', value='val3', operator='==', filter_id=3)
+        df_query_builder.data_frame_filters = [df_filter3] + df_query_builder.data_frame_filters
+        self.assertEqual("((col1 == 'val3')) & ((col1 == 'val2')) & ((col2 == 'val5') and (col1 == 'val1'))",
+                         df_query_builder.build_query())
+
+        df_filter2.operator = 'contains'
+        self.assertEqual("((col2.astype('str').str.contains('val5', case=False, regex=False)))",
+                         DataFrameFilterManager([df_filter2]).build_query())
+        df_query_builder = DataFrameFilterManager([df_filter2])
+        df_query_builder.build_query()
+        self.df['col2'] = self.df['col2'].astype('string')
+        txd.bump_frame_version(self.df)
+        self.assertEqual("((col2.str.contains('val5', case=False, regex=False)))", df_query_builder.build_query())
+
     def test_build_query_with_contains_operator_and_match_case(self):
         df_query_builder = DataFrameFilterManager()
         df_filter1 = DataFrameFilter(column='col1', value='val1', operator='contains', match_case=True)
@@ -456,6 +634,66 @@ class TestPandasDataFrameFilterFactory(unittest.TestCase):
         with self.assertRaises(ValueError):
             factory = DataFrameFilterFactory(columns='col1', values='val1', operator='invalid', data_frame=self.df)
 
+    def test_create_filters_in_bulk(self):
+        for column, values, expected in [('col1', ['val1', 3], ['val1', '3']), ('col3', ['1', 3], [1, 3]),
+                                         ('col4', ['1.1', 3.3], [1.1, 3.3]),
+                                         ('col6', ['2022-01-01', datetime(2022, 3, 3)],
+                                          [datetime(2022, 1, 1), datetime(2022, 3, 3)])]:
+            factory = DataFrameFilterFactory(columns=column, values=values, operator='==', joiner='or', filter_id=1,
+                                             data_frame=self.df, bulk=True)
+            filters = factory.create_filters()
+            self.assertEqual(1, len(filters))
+            self.assertEqual('in', filters[0].operator)
+            self.assertEqual(self.df[column].dtype, filters[0].value.dtype)
+            self.assertEqual(expected, pd.Index(filters[0].value).tolist())
+            filters_per_value = DataFrameFilterFactory(columns=column, values=values, operator='==', joiner='or',
+                                                       filter_id=1, data_frame=self.df).create_filters()
+            pd.testing.assert_frame_equal(txd.filter_df_via_manager(self.df, DataFrameFilterManager(filters_per_value),
+                                                                    engine='mask'),
+                                          txd.filter_df_via_manager(self.df, DataFrameFilterManager(filters),
+                                                                    engine='mask'))
+
+        filters = DataFrameFilterFactory(columns=['col1', 'col3', 'col1'], values=['val1', 2, 'val2'],
+                                         operator='not in').create_filters()
+        self.assertEqual(['col1', 'col3'], [df_filter.column for df_filter in filters])
+        self.assertEqual([['val1', 'val2'], ['2']], [df_filter.value.tolist() for df_filter in filters])
+        self.assertEqual("((col1 not in ['val1', 'val2'])) & ((col3 not in ['2']))",
+                         DataFrameFilterManager(filters).build_query())
+        with self.assertRaises(ValueError):
+            DataFrameFilterFactory(columns='col3', values=[1], operator='>', bulk=True)
+        with self.assertRaises(ValueError):
+            DataFrameFilterFactory(columns='col3', values=['x'], operator='==', joiner='or', filter_id=1,
+                                   data_frame=self.df, bulk=True).create_filters()
+
+    def test_create_filters_in_bulk_only_for_membership_tests(self):
+        for operator, joiner, filter_id in [('==', 'or', 1), ('==', '|', 1), ('!=', 'and', 1), ('!=', '&', 1),
+                                            ('==', 'and', 1), ('!=', 'or', 1), ('==', 'or', None),
+                                            ('!=', 'and', None)]:
+            arguments = dict(columns=['col3', 'col3', 'col4'], values=[1, 2, 2.2], operator=operator, joiner=joiner,
+                             filter_id=filter_id, data_frame=self.df)
+            filters_per_value = DataFrameFilterFactory(**arguments).create_filters()
+            expected = txd.filter_df_via_manager(self.df, DataFrameFilterManager(filters_per_value), engine='mask')
+            if filter_id is None or joiner not in (OR_JOINERS if operator == '==' else AND_JOINERS):
+                with self.assertRaises(ValueError):
+                    DataFrameFilterFactory(**arguments, bulk=True)
+                continue
+            filters = DataFrameFilterFactory(**arguments, bulk=True).create_filters()
+            self.assertEqual(2, len(filters))
+            for engine in ('mask', 'query'):
+                pd.testing.assert_frame_equal(expected, txd.filter_df_via_manager(
+                    self.df, DataFrameFilterManager(filters), engine=engine))
+
+    def test_create_filters_in_bulk_with_values_out_of_range(self):
+        df = pd.DataFrame({'small': np.array([0, 1, 200, 255], dtype=np.uint8), 'id': [1, 2, 3, 4]})
+        for operator, joiner, expected in [('==', 'or', [2]), ('!=', 'and', [1, 3, 4])]:
+            filters = DataFrameFilterFactory(columns='small', values=[-255, 1, 456, '1.5', 2 ** 64], operator=operator,
+                                             joiner=joiner, filter_id=1, data_frame=df, bulk=True).create_filters()
+            # -255 would wrap around to 1 and 456 to 200 in a uint8 column
+            self.assertEqual([1], filters[0].value.tolist())
+            for engine in ('mask', 'query'):
+                self.assertEqual(expected, txd.filter_df_via_manager(df, DataFrameFilterManager(filters),
+                                                                     engine=engine)['id'].tolist())
+
     def test_construct_query_builder_with_filters(self):
         factory = DataFrameFilterFactory(columns='col1', values=['val1', 'val2'], operator='==', joiner='or', data_frame=self.df)
         df_filters = factory.create_filters()
@@ -1,14 +1,66 @@
+import asyncio
+import functools
 import pandas as pd
 from datetime import datetime
-from typing import Union, List
+from typing import Iterator, Union, List
+from .data_frame_arrow_engine import DataFrameArrowEngine, is_arrow_table
+from .data_frame_batch_engine import BatchTyping, DataFrameBatchEngine
+from .data_frame_cache import DataFrameCache
 from .data_frame_filter import DataFrameFilter
 from .data_frame_filter_factory import DataFrameFilterFactory
 from .data_frame_filter_manager import DataFrameFilterManager
+from .data_frame_mask_engine import DataFrameMaskEngine
+from .data_frame_parallel_engine import DataFrameParallelEngine
+from .data_frame_polars_engine import DataFramePolarsEngine, is_polars_frame
+from .data_frame_session import DataFrameFilterSession
+from .data_frame_statistics import DataFrameStatistics
+from .data_frame_stream import SourceTyping, read_chunks, write_chunks
+from .data_frame_version import get_frame_version, bump_frame_version
 
 ValueMultiTyping = Union[Union[str, List[str]], Union[str, List[int]], Union[str, List[float]],
                          Union[str, List[bool]], Union[str, List[datetime.date]]]
 
 
+EngineTyping = Union[str, DataFrameMaskEngine, DataFramePolarsEngine, DataFrameArrowEngine, DataFrameParallelEngine]
+
+
+def _is_data_frame(data_frame) -> bool:
+    """
+    Returns whether the given object is a data frame that can be filtered.
+
+    :param data_frame:  The object to check.
+    :return:            True for pandas DataFrames, Polars DataFrames and LazyFrames, and PyArrow Tables.
+    """
+    return isinstance(data_frame, pd.DataFrame) or is_polars_frame(data_frame) or is_arrow_table(data_frame)
+
+
+def _apply_manager(data_frame: pd.DataFrame,
+                   df_filter_manager: DataFrameFilterManager,
+                   engine: EngineTyping) -> pd.DataFrame:
+    """
+    Applies the filters of a DataFrameFilterManager to a data frame using the given engine. Polars frames and PyArrow
+    Tables are always filtered with a DataFramePolarsEngine or DataFrameArrowEngine unless one is given.
+
+    :param data_frame:          The data frame to filter.
+    :param df_filter_manager:   A DataFrameFilterManager object.
+    :param engine:              The engine to use, either 'query', 'mask', 'arrow' or an engine instance.
+    :return:                    The filtered data frame.
+    """
+    if isinstance(engine, (DataFrameMaskEngine, DataFramePolarsEngine, DataFrameArrowEngine,
+                           DataFrameParallelEngine)):
+        return engine.filter_df(data_frame, df_filter_manager)
+    elif is_polars_frame(data_frame):
+        return DataFramePolarsEngine().filter_df(data_frame, df_filter_manager)
+    elif is_arrow_table(data_frame) or engine == 'arrow':
+        return DataFrameArrowEngine().filter_df(data_frame, df_filter_manager)
+    elif engine == 'query':
+        query = df_filter_manager.build_query()
+        return data_frame if not query else data_frame.query(query)
+    elif engine == 'mask':
+        return DataFrameMaskEngine(keep_group_masks=False).filter_df(data_frame, df_filter_manager)
+    raise ValueError(f"Invalid engine: {engine}")
+
+
 def filter_df(data_frame: pd.DataFrame,
               columns: Union[str, List[str]],
               values: ValueMultiTyping,
@@ -18,7 +70,8 @@ def filter_df(data_frame: pd.DataFrame,
               regex: bool = False,
               omit_on_clear: bool = False,
               common_name: str = None,
-              group_joiner: str = None) -> pd.DataFrame:
+              group_joiner: str = None,
+              engine: EngineTyping = 'query') -> pd.DataFrame:
     """
     Filters a data frame based on a list of columns and values.
 
@@ -32,59 +85,226 @@ def filter_df(data_frame: pd.DataFrame,
     :param omit_on_clear:   Option to omit on clear.
     :param common_name:     Specified common description.
     :param group_joiner:    The group joiner to use.
+    :param engine:          The engine to use, either 'query', 'mask', 'arrow' or an engine instance.
     :return:                The filtered data frame.
     """
-    if isinstance(data_frame, pd.DataFrame):
+    if _is_data_frame(data_frame):
         df_factory = DataFrameFilterFactory(columns=columns,
                                             values=values,
                                             operator=operator,
                                             joiner=joiner,
-                                            data_frame=data_frame,
+                                            data_frame=data_frame if isinstance(data_frame, pd.DataFrame) else None,
                                             match_case=match_case,
                                             regex=regex,
                                             omit_on_clear=omit_on_clear,
                                             common_name=common_name,
                                             group_joiner=group_joiner)
         df_filters = df_factory.create_filters()
-        query_builder = DataFrameFilterManager(df_filters)
-        query = query_builder.build_query()
-        return data_frame if not query else data_frame.query(query)
+        return _apply_manager(data_frame, DataFrameFilterManager(df_filters), engine)
     else:
         raise TypeError(f"Unrecognized data frame type: {type(data_frame)}")
 
 
 def filter_df_from_df_filters(data_frame: pd.DataFrame,
-                              df_filters: List[DataFrameFilter]) -> pd.DataFrame:
+                              df_filters: List[DataFrameFilter],
+                              engine: EngineTyping = 'query') -> pd.DataFrame:
     """
     Filters a data frame based on a list of DataFrameFilter objects.
 
     :param data_frame:  The data frame to filter.
     :param df_filters:  A list of DataFrameFilter objects.
+    :param engine:  The engine to use, either 'query', 'mask', 'arrow' or an engine instance.
     :return:  The filtered data frame.
     """
-    if isinstance(data_frame, pd.DataFrame):
-        query_builder = DataFrameFilterManager(df_filters)
-        query = query_builder.build_query()
-        return data_frame if not query else data_frame.query(query)
+    if _is_data_frame(data_frame):
+        return _apply_manager(data_frame, DataFrameFilterManager(df_filters), engine)
     else:
         raise TypeError(f"Unrecognized data frame type: {type(data_frame)}")
 
 
-def filter_df_via_manager(data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager) -> pd.DataFrame:
+def filter_df_via_manager(data_frame: pd.DataFrame,
+                          df_filter_manager: DataFrameFilterManager,
+                          engine: EngineTyping = 'query') -> pd.DataFrame:
     """
     Filters a data frame based on a DataFrameFilterManager object.
 
     :param data_frame:  The data frame to filter.
     :param df_filter_manager:  A DataFrameFilterManager object.
+    :param engine:  The engine to use, either 'query', 'mask', 'arrow' or an engine instance.
     :return:  The filtered data frame.
     """
-    if isinstance(data_frame, pd.DataFrame):
-        query = df_filter_manager.build_query()
-        return data_frame if not query else data_frame.query(query)
+    if _is_data_frame(data_frame):
+        return _apply_manager(data_frame, df_filter_manager, engine)
     else:
         raise TypeError(f"Unrecognized data frame type: {type(data_frame)}")
 
 
+async def filter_df_async(data_frame: pd.DataFrame,
+                          columns: Union[str, List[str]],
+                          values: ValueMultiTyping,
+                          operator: str,
+                          joiner: str = 'and',
+                          match_case: bool = False,
+                          regex: bool = False,
+                          omit_on_clear: bool = False,
+                          common_name: str = None,
+                          group_joiner: str = None,
+                          engine: EngineTyping = 'query',
+                          session: DataFrameFilterSession = None) -> pd.DataFrame:
+    """
+    Filters a data frame based on a list of columns and values on an executor, see filter_df().
+
+    :param data_frame:      The data frame to filter.
+    :param columns:         The columns to filter on.
+    :param values:          The values to filter on.
+    :param operator:        The operator to use.
+    :param joiner:          The joiner to use.
+    :param match_case:      Option to match case.
+    :param regex:           Option to use regex.
+    :param omit_on_clear:   Option to omit on clear.
+    :param common_name:     The common name to use.
+    :param group_joiner:    The group joiner to use.
+    :param engine:          The engine to use, either 'query', 'mask', 'arrow' or an engine instance.
+    :param session:         A DataFrameFilterSession whose newer requests supersede this one. Defaults to running on
+                            the default executor of the event loop.
+    :return:                The filtered data frame.
+    """
+    func = functools.partial(filter_df, data_frame, columns, values, operator, joiner, match_case, regex,
+                             omit_on_clear, common_name, group_joiner, engine)
+    if session is not None:
+        return await session.run(func)
+    return await asyncio.get_running_loop().run_in_executor(None, func)
+
+
+async def filter_df_via_manager_async(data_frame: pd.DataFrame,
+                                      df_filter_manager: DataFrameFilterManager,
+                                      engine: EngineTyping = 'query',
+                                      session: DataFrameFilterSession = None) -> pd.DataFrame:
+    """
+    Filters a data frame based on a DataFrameFilterManager object on an executor, see filter_df_via_manager(). Modify
+    the manager only to submit a newer request of the same session while the request is in flight.
+
+    :param data_frame:  The data frame to filter.
+    :param df_filter_manager:  A DataFrameFilterManager object.
+    :param engine:  The engine to use, either 'query', 'mask', 'arrow' or an engine instance.
+    :param session:  A DataFrameFilterSession whose newer requests supersede this one. Defaults to running on the
+                     default executor of the event loop.
+    :return:  The filtered data frame.
+    """
+    func = functools.partial(filter_df_via_manager, data_frame, df_filter_manager, engine)
+    if session is not None:
+        return await session.run(func)
+    return await asyncio.get_running_loop().run_in_executor(None, func)
+
+
+def filter_dfs_via_managers(data_frame: pd.DataFrame,
+                            df_filter_managers: BatchTyping,
+                            engine: DataFrameBatchEngine = None) -> List[pd.DataFrame]:
+    """
+    Filters a data frame for each of many DataFrameFilterManager objects, evaluating filters and filter groups shared
+    by several managers once.
+
+    :param data_frame:  The data frame to filter.
+    :param df_filter_managers:  A list of DataFrameFilterManager objects or of lists of DataFrameFilter objects.
+    :param engine:  A DataFrameBatchEngine to reuse cached masks between calls. Defaults to a new one.
+    :return:  The filtered data frame of each manager.
+    """
+    if not isinstance(data_frame, pd.DataFrame):
+        raise TypeError(f"Unrecognized data frame type: {type(data_frame)}")
+    if engine is None:
+        engine = DataFrameBatchEngine()
+    return engine.filter_dfs(data_frame, df_filter_managers)
+
+
+def filter_df_chunks(source: SourceTyping,
+                     columns: Union[str, List[str]],
+                     values: ValueMultiTyping,
+                     operator: str,
+                     joiner: str = 'and',
+                     match_case: bool = False,
+                     regex: bool = False,
+                     omit_on_clear: bool = False,
+                     common_name: str = None,
+                     group_joiner: str = None,
+                     engine: EngineTyping = 'query',
+                     chunksize: int = 100_000,
+                     **read_kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Filters a data frame too large for memory chunk by chunk based on a list of columns and values. The filters are
+    built once, with values coerced to the dtypes of the first chunk.
+
+    :param source:          The path of a CSV or JSON lines file, or an iterable of data frame chunks.
+    :param columns:         The columns to filter on.
+    :param values:          The values to filter on.
+    :param operator:        The operator to use.
+    :param joiner:          The joiner to use.
+    :param match_case:      Option to match case.
+    :param regex:           Option to use regex.
+    :param omit_on_clear:   Option to omit on clear.
+    :param common_name:     Specified common description.
+    :param group_joiner:    The group joiner to use.
+    :param engine:          The engine to use, either 'query', 'mask', 'arrow' or an engine instance.
+    :param chunksize:       The number of rows per chunk read from a file.
+    :param read_kwargs:     Keyword arguments passed to pandas.read_csv() or pandas.read_json(), such as dtype.
+    :return:                An iterator over the filtered chunks.
+    """
+    df_filter_manager = None
+    for chunk in read_chunks(source, chunksize, **read_kwargs):
+        if df_filter_manager is None:
+            # An empty copy of the first chunk carries its dtypes without keeping its rows in memory
+            df_filters = build_df_filters(columns=columns,
+                                          values=values,
+                                          operator=operator,
+                                          joiner=joiner,
+                                          data_frame=chunk.iloc[:0].copy(),
+                                          match_case=match_case,
+                                          regex=regex,
+                                          omit_on_clear=omit_on_clear,
+                                          common_name=common_name,
+                                          group_joiner=group_joiner)
+            df_filter_manager = DataFrameFilterManager(df_filters)
+        yield _apply_manager(chunk, df_filter_manager, engine)
+
+
+def filter_df_chunks_via_manager(source: SourceTyping,
+                                 df_filter_manager: DataFrameFilterManager,
+                                 engine: EngineTyping = 'query',
+                                 chunksize: int = 100_000,
+                                 **read_kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Filters a data frame too large for memory chunk by chunk based on a DataFrameFilterManager object.
+
+    :param source:  The path of a CSV or JSON lines file, or an iterable of data frame chunks.
+    :param df_filter_manager:  A DataFrameFilterManager object.
+    :param engine:  The engine to use, either 'query', 'mask', 'arrow' or an engine instance.
+    :param chunksize:  The number of rows per chunk read from a file.
+    :param read_kwargs:  Keyword arguments passed to pandas.read_csv() or pandas.read_json(), such as dtype.
+    :return:  An iterator over the filtered chunks.
+    """
+    for chunk in read_chunks(source, chunksize, **read_kwargs):
+        yield _apply_manager(chunk, df_filter_manager, engine)
+
+
+def filter_parquet_via_manager(source: Union[str, List[str]],
+                               df_filter_manager: DataFrameFilterManager,
+                               read_columns: List[str] = None,
+                               partitioning: str = 'hive') -> pd.DataFrame:
+    """
+    Reads the rows of a Parquet file or dataset matching a DataFrameFilterManager object. The filters are pushed down
+    into the scan, which prunes partitions and skips row groups using their min/max statistics.
+
+    :param source:  The path of a Parquet file or directory, or a list of Parquet files.
+    :param df_filter_manager:  A DataFrameFilterManager object.
+    :param read_columns:  The columns to read. Defaults to all columns.
+    :param partitioning:  The partitioning of the directory, see pyarrow.dataset.dataset().
+    :return:  The filtered data frame.
+    """
+    engine = DataFrameArrowEngine()
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(source, format='parquet', partitioning=partitioning)
+    return engine.filter_dataset(dataset, df_filter_manager, read_columns).to_pandas()
+
+
 def build_df_filters(columns: Union[str, List[str]],
                      values: ValueMultiTyping,
                      operator: str,
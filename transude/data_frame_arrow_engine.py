@@ -0,0 +1,237 @@
+import numpy as np
+import pandas as pd
+from typing import Any, List
+from .data_frame_filter import DataFrameFilter, to_value_list
+from .data_frame_filter_manager import DataFrameFilterManager
+from .data_frame_mask_engine import DataFrameMaskEngine, combine_masks
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+
+def is_arrow_table(data_frame: Any) -> bool:
+    """
+    Returns whether the given object is a PyArrow Table.
+
+    :param data_frame: Any
+    The object to check.
+    :return: bool
+    """
+    return pa is not None and isinstance(data_frame, pa.Table)
+
+
+def is_arrow_string_type(data_type: 'pa.DataType') -> bool:
+    """
+    Returns whether the given Arrow type is a string type.
+
+    :param data_type: pa.DataType
+    The type to check.
+    :return: bool
+    """
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type) or \
+        pa.types.is_string_view(data_type)
+
+
+def get_types(schema: 'pa.Schema') -> dict:
+    """
+    Returns the types of the columns of an Arrow schema by name.
+
+    :param schema: pa.Schema
+    The schema of a Table or dataset.
+    :return: dict
+    """
+    return dict(zip(schema.names, schema.types))
+
+
+def convert_value(value: Any, data_type: 'pa.DataType | None') -> 'pa.Scalar':
+    """
+    Converts the value of a DataFrameFilter to an Arrow scalar that can be compared with a column of the given type.
+    Values built without a DataFrame are strings, so strings are cast to the type of non-string columns, like
+    DataFrameFilterFactory does for pandas DataFrames.
+
+    :param value: Any
+    The value to convert.
+    :param data_type: pa.DataType | None
+    The type of the column, or None if unknown.
+    :return: pa.Scalar
+    """
+    if isinstance(value, pd.Timestamp):
+        value = value.to_datetime64() if value.tz is None else value.to_pydatetime()
+    if not isinstance(value, str) or data_type is None or is_arrow_string_type(data_type):
+        return pa.scalar(value)
+    if pa.types.is_integer(data_type):
+        try:
+            return pa.scalar(int(value))
+        except ValueError:
+            return pa.scalar(float(value))
+    return pa.scalar(value).cast(data_type)
+
+
+class DataFrameArrowEngine:
+    """
+    This class compiles DataFrameFilters into pyarrow.compute expressions, which are evaluated on the Arrow buffers of
+    PyArrow Tables and of pandas DataFrames with Arrow-backed columns (see dtype_backend='pyarrow') without converting
+    values to Python objects. Missing values never match a filter, as with the nullable dtypes of pandas. Unlike
+    astype('str'), Arrow formats whole floats without a fractional part when applying string operators to them.
+    """
+    comparison_operators = DataFrameMaskEngine.comparison_operators
+
+    def __init__(self):
+        """
+        Initializes a DataFrameArrowEngine instance.
+
+        :raises ImportError: if PyArrow is not installed.
+        """
+        if pa is None:
+            raise ImportError("DataFrameArrowEngine requires pyarrow to be installed")
+
+    def __repr__(self) -> str:
+        return "DataFrameArrowEngine()"
+
+    @staticmethod
+    def get_field(column: str, schema: dict = None) -> 'tuple[pc.Expression, pa.DataType | None]':
+        """
+        Get the expression referring to a column and the type of its values. Dictionary-encoded columns, such as
+        those of categorical pandas columns, are decoded to their value type.
+
+        :param column: str
+        The column to refer to.
+        :param schema: dict (default: None)
+        The types of the columns of the frame to filter.
+        :return: tuple[pc.Expression, pa.DataType | None]
+        """
+        field = pc.field(column)
+        data_type = schema.get(column) if schema is not None else None
+        if data_type is not None and pa.types.is_dictionary(data_type):
+            data_type = data_type.value_type
+            field = field.cast(data_type)
+        return field, data_type
+
+    def get_filter_expression(self, df_filter: DataFrameFilter, schema: dict = None) -> 'pc.Expression':
+        """
+        Compile a single DataFrameFilter into a pyarrow.compute expression.
+
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to compile.
+        :param schema: dict (default: None)
+        The types of the columns of the frame to filter, used to convert string values to the types of their columns.
+        :return: pc.Expression
+        """
+        if DataFrameFilter.is_valid_membership_operator(df_filter.operator):
+            return self.get_group_expression([df_filter], schema)
+        field, data_type = self.get_field(df_filter.column, schema)
+        if not DataFrameFilter.is_valid_str_operator(df_filter.operator):
+            return self.comparison_operators[df_filter.operator](field, convert_value(df_filter.value, data_type))
+        if data_type is None or not is_arrow_string_type(data_type):
+            field = field.cast(pa.string())
+        if df_filter.operator == 'startswith':
+            return pc.starts_with(field, pattern=df_filter.value)
+        if df_filter.operator == 'endswith':
+            return pc.ends_with(field, pattern=df_filter.value)
+        if df_filter.operator == 'match':
+            return pc.match_substring_regex(field, pattern=f"^(?:{df_filter.value})")
+        match_substring = pc.match_substring_regex if df_filter.regex else pc.match_substring
+        return match_substring(field, pattern=df_filter.value, ignore_case=not df_filter.match_case)
+
+    def get_group_expression(self, df_filters: List[DataFrameFilter], schema: dict = None) -> 'pc.Expression':
+        """
+        Compile a group of DataFrameFilters sharing a filter ID into a pyarrow.compute expression.
+
+        :param df_filters: List[DataFrameFilter]
+        The in-use DataFrameFilters of the group, in query order.
+        :param schema: dict (default: None)
+        The types of the columns of the frame to filter.
+        :return: pc.Expression
+        """
+        membership_test = DataFrameFilterManager.get_membership_test(df_filters)
+        if membership_test is not None:
+            column, values, negated = membership_test
+            field, data_type = self.get_field(column, schema)
+            value_set = pa.array([convert_value(value, data_type).as_py() for value in to_value_list(values)])
+            expression = pc.is_in(field, value_set=value_set)
+            # is_in is False rather than missing for missing values, which must not match a negated test either
+            return ~expression & field.is_valid() if negated else expression
+        expressions = [self.get_filter_expression(df_filter, schema) for df_filter in df_filters]
+        return combine_masks(expressions, [df_filter.joiner for df_filter in df_filters[1:]])
+
+    def get_expression(self, df_filter_manager: DataFrameFilterManager, schema: dict = None) -> 'pc.Expression | None':
+        """
+        Compile all in-use DataFrameFilters of a DataFrameFilterManager into a pyarrow.compute expression.
+
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :param schema: dict (default: None)
+        The types of the columns of the frame to filter.
+        :return: pc.Expression | None
+        The combined expression, or None if no filters are in use.
+        """
+        groups = df_filter_manager.get_filter_groups()
+        if not groups:
+            return None
+        expressions = [self.get_group_expression(group, schema) for group in groups]
+        return combine_masks(expressions, [group[0].group_joiner for group in groups[1:]])
+
+    def get_mask(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager) -> np.ndarray | None:
+        """
+        Evaluate all in-use DataFrameFilters of a DataFrameFilterManager against a pandas DataFrame into a boolean
+        mask. Arrow-backed columns are evaluated in place, other columns are converted to Arrow first.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: np.ndarray | None
+        The combined mask, or None if no filters are in use.
+        """
+        groups = df_filter_manager.get_filter_groups()
+        if not groups:
+            return None
+        columns = list(dict.fromkeys(df_filter.column for group in groups for df_filter in group))
+        table = pa.Table.from_pandas(data_frame[columns], preserve_index=False)
+        expression = self.get_expression(df_filter_manager, get_types(table.schema))
+        mask = ds.dataset(table).to_table(columns={'mask': expression}).column('mask')
+        return pc.fill_null(mask, False).to_numpy(zero_copy_only=False)
+
+    def filter_dataset(self, dataset: 'ds.Dataset', df_filter_manager: DataFrameFilterManager,
+                       columns: List[str] = None) -> 'pa.Table':
+        """
+        Read the rows of a pyarrow.dataset Dataset, such as a partitioned Parquet dataset, that match the in-use
+        DataFrameFilters of a DataFrameFilterManager. The filters are pushed down into the scan, so partitions that
+        cannot match are pruned, Parquet row groups whose min/max statistics cannot match are skipped, and only the
+        remaining rows are read.
+
+        :param dataset: ds.Dataset
+        The dataset to read.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :param columns: List[str] (default: None)
+        The columns to read. Defaults to all columns.
+        :return: pa.Table
+        """
+        expression = self.get_expression(df_filter_manager, get_types(dataset.schema))
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def filter_df(self, data_frame: 'pd.DataFrame | pa.Table',
+                  df_filter_manager: DataFrameFilterManager) -> 'pd.DataFrame | pa.Table':
+        """
+        Filter a pandas DataFrame or PyArrow Table using the in-use DataFrameFilters of a DataFrameFilterManager.
+
+        :param data_frame: pd.DataFrame | pa.Table
+        The frame to filter.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: pd.DataFrame | pa.Table
+        The filtered frame, of the same type as the given frame.
+        :raises TypeError: if the frame is neither a pandas DataFrame nor a PyArrow Table.
+        """
+        if isinstance(data_frame, pd.DataFrame):
+            mask = self.get_mask(data_frame, df_filter_manager)
+            return data_frame if mask is None else data_frame.loc[mask]
+        if not is_arrow_table(data_frame):
+            raise TypeError(f"Unrecognized data frame type: {type(data_frame)}")
+        expression = self.get_expression(df_filter_manager, get_types(data_frame.schema))
+        return data_frame if expression is None else data_frame.filter(expression)
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from typing import Hashable, List, Union
+from .data_frame_cache import DataFrameCache
+from .data_frame_filter import DataFrameFilter
+from .data_frame_filter_manager import DataFrameFilterManager
+from .data_frame_mask_engine import DataFrameMaskEngine, combine_masks, get_group_signature
+from .data_frame_version import get_frame_version
+
+BatchTyping = List[Union[DataFrameFilterManager, List[DataFrameFilter]]]
+
+
+class DataFrameBatchEngine:
+    """
+    This class filters one DataFrame for many DataFrameFilterManagers at once, such as one per connected session.
+    Filter groups are deduplicated across the managers by their signature and each distinct group is evaluated once,
+    the masks of filters shared by different groups are evaluated once through the mask cache of the engine, and
+    managers combining the same groups the same way share their mask. The work therefore grows with the number of
+    distinct filters and groups rather than with the number of managers.
+    """
+
+    def __init__(self, engine: DataFrameMaskEngine = None):
+        """
+        Initializes a DataFrameBatchEngine instance.
+
+        :param engine: DataFrameMaskEngine (default: None)
+        The engine evaluating the distinct filter groups. Defaults to a DataFrameMaskEngine with a mask cache that is
+        cleared after each batch, so that nothing is reused across DataFrame edits. Filters shared by different groups
+        are evaluated once per group if the engine has no mask cache.
+        """
+        self._clear_mask_cache = engine is None
+        if engine is None:
+            engine = DataFrameMaskEngine(mask_cache=DataFrameCache())
+        self.engine = engine
+
+    def __repr__(self) -> str:
+        return f"DataFrameBatchEngine(engine={self.engine!r})"
+
+    def get_masks(self, data_frame: pd.DataFrame, df_filter_managers: BatchTyping) -> List[np.ndarray | None]:
+        """
+        Evaluate the in-use DataFrameFilters of many DataFrameFilterManagers into one boolean mask per manager.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param df_filter_managers: List[DataFrameFilterManager | List[DataFrameFilter]]
+        The DataFrameFilterManagers, or lists of DataFrameFilters, to evaluate.
+        :return: List[np.ndarray | None]
+        The combined mask of each manager, or None for managers without filters in use. Managers with the same
+        filters may share a mask, which must not be modified.
+        """
+        df_filter_managers = [df_filter_manager if isinstance(df_filter_manager, DataFrameFilterManager) else
+                              DataFrameFilterManager(df_filter_manager) for df_filter_manager in df_filter_managers]
+        frame_version = get_frame_version(data_frame)
+        manager_groups = [df_filter_manager.get_filter_groups() for df_filter_manager in df_filter_managers]
+        group_masks = {}
+        distinct_groups = {}
+        for df_filter_manager, groups in zip(df_filter_managers, manager_groups):
+            for group in groups:
+                signature = get_group_signature(group)
+                if signature in group_masks or signature in distinct_groups:
+                    continue
+                mask = None
+                if self.engine.keep_group_masks:
+                    mask = df_filter_manager.get_group_mask(group[0].filter_id,
+                                                          self.engine.get_group_mask_key(frame_version, signature))
+                if mask is None:
+                    distinct_groups[signature] = group
+                else:
+                    group_masks[signature] = mask
+        try:
+            group_masks.update(self.evaluate_groups(data_frame, distinct_groups))
+        finally:
+            if self._clear_mask_cache:
+                self.engine.mask_cache.clear()
+
+        masks = []
+        manager_masks = {}
+        for df_filter_manager, groups in zip(df_filter_managers, manager_groups):
+            if not groups:
+                masks.append(None)
+                continue
+            signatures = [get_group_signature(group) for group in groups]
+            group_joiners = [group[0].group_joiner for group in groups[1:]]
+            if self.engine.keep_group_masks:
+                for group, signature in zip(groups, signatures):
+                    df_filter_manager.set_group_mask(group[0].filter_id,
+                                                     self.engine.get_group_mask_key(frame_version, signature),
+                                                     group_masks[signature])
+            key = (tuple(signatures), tuple(group_joiners))
+            if key not in manager_masks:
+                mask = combine_masks([group_masks[signature] for signature in signatures], group_joiners)
+                manager_masks[key] = mask
+            masks.append(manager_masks[key])
+        return masks
+
+    def evaluate_groups(self, data_frame: pd.DataFrame,
+                        groups: dict[Hashable, List[DataFrameFilter]]) -> dict[Hashable, np.ndarray]:
+        """
+        Evaluate distinct filter groups into boolean masks, concurrently if the engine has several group workers.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param groups: dict[Hashable, List[DataFrameFilter]]
+        The in-use DataFrameFilters of each group by the signature of the group.
+        :return: dict[Hashable, np.ndarray]
+        The mask of each group by the signature of the group.
+        """
+        if self.engine.group_workers > 1 and len(groups) > 1:
+            masks = self.engine.get_executor().map(lambda group: self.engine.get_group_mask(data_frame, group),
+                                                   groups.values())
+        else:
+            masks = (self.engine.get_group_mask(data_frame, group) for group in groups.values())
+        return dict(zip(groups, masks))
+
+    def filter_dfs(self, data_frame: pd.DataFrame, df_filter_managers: BatchTyping) -> List[pd.DataFrame]:
+        """
+        Filter a DataFrame for each of many DataFrameFilterManagers.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to filter.
+        :param df_filter_managers: List[DataFrameFilterManager | List[DataFrameFilter]]
+        The DataFrameFilterManagers, or lists of DataFrameFilters, to filter with.
+        :return: List[pd.DataFrame]
+        The filtered DataFrame of each manager.
+        """
+        return [data_frame if mask is None else data_frame.loc[mask]
+                for mask in self.get_masks(data_frame, df_filter_managers)]
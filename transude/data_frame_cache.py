@@ -0,0 +1,122 @@
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+def estimate_nbytes(series: pd.Series, sample_size: int = 1000) -> int:
+    """
+    Estimates the memory used by a Series including the Python objects it holds, such as strings. An exact count
+    visits every object, so the size of the objects is extrapolated from an evenly spaced sample of them instead.
+
+    :param series: pd.Series
+    The Series to estimate the size of.
+    :param sample_size: int (default: 1000)
+    The approximate number of objects to sample.
+    :return: int
+    """
+    nbytes = int(series.memory_usage(index=False))
+    if series.dtype != object or len(series) == 0:
+        return nbytes
+    sample = series.iloc[::max(1, len(series) // sample_size)]
+    object_nbytes = sample.memory_usage(index=False, deep=True) - sample.memory_usage(index=False)
+    return nbytes + int(object_nbytes * len(series) / len(sample))
+
+
+class DataFrameCache:
+    """
+    This class is a thread-safe LRU cache for values derived from DataFrames, such as boolean masks, bounded by a
+    memory budget in bytes.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 ** 2):
+        """
+        Initializes a DataFrameCache instance.
+
+        :param max_bytes: int (default: 128 MiB)
+        The memory budget of the cache. The least recently used entries are evicted once it is exceeded.
+
+        :var hits: int
+        The number of lookups that found an entry.
+        :var misses: int
+        The number of lookups that did not find an entry.
+        :var evictions: int
+        The number of entries evicted to stay within the memory budget.
+        """
+        if max_bytes < 0:
+            raise ValueError(f"Invalid max_bytes: {max_bytes}")
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"DataFrameCache(max_bytes={self.max_bytes}, nbytes={self.nbytes}, entries={len(self)}, " \
+               f"hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Get the value cached under the given key and mark it as most recently used.
+
+        :param key: Hashable
+        The key to look up.
+        :return: Any
+        The cached value, or None if the key is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, nbytes: int = None) -> Any:
+        """
+        Cache a value under the given key, evicting the least recently used entries to stay within the memory budget.
+        Cached NumPy arrays are made read-only so that callers cannot modify them in place.
+
+        :param key: Hashable
+        The key to cache the value under.
+        :param value: Any
+        The value to cache.
+        :param nbytes: int (default: None)
+        The size of the value in bytes. Defaults to value.nbytes.
+        :return: Any
+        The given value.
+        """
+        if nbytes is None:
+            nbytes = value.nbytes
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return value
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_nbytes
+                self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache. The hit, miss and eviction counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
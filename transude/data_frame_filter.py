@@ -1,13 +1,83 @@
 import datetime
 import itertools
+import weakref
+import numpy as np
 import pandas as pd
 
+AND_JOINERS = ('and', '&')
+OR_JOINERS = ('or', '|')
+MEMBERSHIP_OPERATORS = ('in', 'not in')
+
+
+def to_value_array(values) -> np.ndarray:
+    """
+    Converts the values of a multi-value DataFrameFilter to a NumPy array, inferring the dtype like pandas does, so
+    that mixed values are kept as objects rather than converted to strings.
+
+    :param values: The values, a single value or a list-like of values.
+    :return: np.ndarray
+    """
+    if isinstance(values, np.ndarray):
+        return values
+    return pd.Index(values if pd.api.types.is_list_like(values) else [values]).to_numpy()
+
+
+def get_value_key(value) -> object:
+    """
+    Returns a hashable key of the value of a DataFrameFilter, which is the value itself unless it holds several.
+
+    :param value: The value of a DataFrameFilter.
+    :return: object
+    """
+    if isinstance(value, np.ndarray):
+        return tuple(value.tolist()) if value.dtype.kind == 'O' else (value.dtype.str, value.tobytes())
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def to_value_list(values) -> list:
+    """
+    Converts the values of a membership test to a list of Python objects, with datetimes of NumPy arrays converted to
+    Timestamps.
+
+    :param values: The values, as a list or a NumPy array.
+    :return: list
+    """
+    return pd.Index(values).tolist() if isinstance(values, np.ndarray) else values
+
+
+def format_values(values) -> str:
+    """
+    Formats the values of a membership test as a list literal for DataFrame.query().
+
+    :param values: The values, as a list or a NumPy array.
+    :return: str
+    """
+    return f"[{', '.join(map(repr, to_value_list(values)))}]"
+
 
 class DataFrameFilter:
     """
     This class represents part of a DataFrame query.
+
+    Every assignment to an attribute stamps the filter with a new version, unique across all filters, so that queries
+    built from filters can be cached and rebuilt only when a filter changed (see DataFrameFilterManager.build_query).
+    Values must therefore be replaced rather than modified in place.
+
+    The operators 'in' and 'not in' test a column against many values at once, held in a NumPy array, and match the
+    same rows as comparing the column with each value using '==' joined by 'or', or '!=' joined by 'and'. Missing
+    values in the array never match.
+
+    A filter only refers weakly to its DataFrame, so that filters kept around do not keep DataFrames alive, and keeps
+    the dtype of its column for when the DataFrame is gone or the filter is pickled.
     """
+    __slots__ = ('column', 'value', 'operator', 'in_use', 'joiner', 'filter_id', 'match_case', 'regex',
+                 'omit_on_clear', 'common_name', 'group_joiner', 'version', '_data_frame', '_dtype', '_dtype_column')
     next_filter_id = itertools.count()
+    next_version = itertools.count()
+    # The version last stamped on any filter, to tell in constant time that no filter changed since
+    latest_version = None
 
     def __init__(self, column: str,
                  value: str | int | float | bool | datetime.datetime | pd.Timestamp,
@@ -27,7 +97,7 @@ class DataFrameFilter:
         :param column: str
         Name of the column in the DataFrame.
         :param value: str
-        Value to filter by.
+        Value to filter by, or the values for the operators 'in' and 'not in', which are stored as a NumPy array.
         :param operator: str
         Comparison operator to use.
         :param in_use: bool (default: True)
@@ -41,7 +111,7 @@ class DataFrameFilter:
         :param regex: bool (default: False)
         Whether the value is a regular expression.
         :param data_frame: pd.DataFrame (default: None)
-        DataFrame to filter.
+        DataFrame to filter, referred to weakly and used to tell the dtype of the column.
         :param omit_on_clear: bool (default: False)
         Option to omit this filter when clearing all filters.
         :param common_name: str (default: None)
@@ -57,6 +127,8 @@ class DataFrameFilter:
             filter_id = next(DataFrameFilter.next_filter_id) + 1
         if group_joiner is None:
             group_joiner = '&'
+        if DataFrameFilter.is_valid_membership_operator(operator):
+            value = to_value_array(value)
         self.column = column
         self.value = value
         self.operator = operator
@@ -70,13 +142,55 @@ class DataFrameFilter:
         self.common_name = common_name
         self.group_joiner = group_joiner
 
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        if name != 'version':
+            version = next(DataFrameFilter.next_version)
+            super().__setattr__('version', version)
+            DataFrameFilter.latest_version = version
+
+    def __getstate__(self) -> dict:
+        # DataFrames are not pickled along with filters, only the dtype of the column
+        state = {name: getattr(self, name) for name in self.__slots__ if name != '_data_frame'}
+        state['_dtype'], state['_dtype_column'] = self.get_dtype(), self.column
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_data_frame', None)
+
+    def __copy__(self) -> 'DataFrameFilter':
+        df_filter = DataFrameFilter.__new__(DataFrameFilter)
+        for name in self.__slots__:
+            object.__setattr__(df_filter, name, getattr(self, name))
+        return df_filter
+
+    @property
+    def data_frame(self) -> pd.DataFrame | None:
+        """
+        The DataFrame to filter, or None if none was given or it no longer exists.
+        """
+        return None if self._data_frame is None else self._data_frame()
+
+    @data_frame.setter
+    def data_frame(self, data_frame: pd.DataFrame | None):
+        self._data_frame = None if data_frame is None else weakref.ref(data_frame)
+        self._dtype = None
+        if data_frame is not None and self.column in data_frame:
+            self._dtype = data_frame[self.column].dtype
+        self._dtype_column = self.column
+
     def __repr__(self) -> str:
         """
         Returns a string representation of this DataFrameFilter instance.
         """
+        data_frame = self.data_frame
+        if data_frame is not None:
+            data_frame = f"DataFrame(shape={data_frame.shape})"
         return f"DataFrameFilter(column='{self.column}', value='{self.value}', " \
                f"operator='{self.operator}', joiner='{self.joiner}', filter_id={self.filter_id}, " \
-               f"match_case={self.match_case}, regex={self.regex}, data_frame={self.data_frame.__str__()}, " \
+               f"match_case={self.match_case}, regex={self.regex}, data_frame={data_frame}, " \
                f"omit_on_clear={self.omit_on_clear}, common_name={self.common_name}, group_joiner={self.group_joiner})"
 
     def __str__(self) -> str:
@@ -111,6 +225,18 @@ class DataFrameFilter:
         valid_non_str_operators = ['==', '>', '<', '>=', '<=', '!=']
         return operator in valid_non_str_operators
 
+    @staticmethod
+    def is_valid_membership_operator(operator: str) -> bool:
+        """
+        Returns whether the given operator is a valid operator testing against many values.
+
+        :param operator: str
+        The operator to check.
+
+        :return: bool
+        """
+        return operator in MEMBERSHIP_OPERATORS
+
     @staticmethod
     def is_valid_operator(operator: str) -> bool:
         """
@@ -121,7 +247,52 @@ class DataFrameFilter:
 
         :return: bool
         """
-        return DataFrameFilter.is_valid_str_operator(operator) or DataFrameFilter.is_valid_non_str_operator(operator)
+        return DataFrameFilter.is_valid_str_operator(operator) or \
+            DataFrameFilter.is_valid_non_str_operator(operator) or DataFrameFilter.is_valid_membership_operator(operator)
+
+    def has_string_dtype(self) -> bool:
+        """
+        Returns whether the column of this filter is known to have the pandas 'string' dtype or an Arrow string dtype,
+        which string operators can be applied to without converting the values to Python strings first.
+
+        :return: bool
+        """
+        dtype = self.get_dtype()
+        if dtype is None:
+            return False
+        return dtype.name == 'string' or (isinstance(dtype, pd.ArrowDtype) and dtype.kind == 'U')
+
+    def get_dtype(self):
+        """
+        Returns the dtype of the column of this filter in its DataFrame, or the dtype the column had when the DataFrame
+        was given if it no longer exists.
+
+        :return: The dtype, or None if no DataFrame with the column was given.
+        """
+        data_frame = self.data_frame
+        if data_frame is not None:
+            return data_frame[self.column].dtype
+        return self._dtype if self._dtype_column == self.column else None
+
+    def get_values(self) -> np.ndarray:
+        """
+        Returns the values of this DataFrameFilter, which must have the operator 'in' or 'not in', without missing
+        values.
+
+        :return: np.ndarray
+        """
+        values = to_value_array(self.value)
+        missing = pd.isna(values)
+        return values[~missing] if missing.any() else values
+
+    def get_signature(self) -> tuple:
+        """
+        Returns a hashable signature of everything that determines which rows this DataFrameFilter matches.
+
+        :return: tuple
+        """
+        return (self.column, self.operator, type(self.value), get_value_key(self.value), self.match_case, self.regex,
+                self.has_string_dtype())
 
     def get_query(self) -> str:
         """
@@ -134,7 +305,9 @@ class DataFrameFilter:
             value_clause = f"{repr(self.value)}, case={self.match_case}, regex={self.regex}"
             if self.operator != "contains":
                 value_clause = f"{repr(self.value)}"
-            if self.data_frame is not None and self.data_frame[self.column].dtype.name == 'string':
+            if self.has_string_dtype():
                 return f"{self.column}.str.{self.operator}({value_clause})"
             return f"{self.column}.astype('str').str.{self.operator}({value_clause})"
+        if DataFrameFilter.is_valid_membership_operator(self.operator):
+            return f"{self.column} {self.operator} {format_values(self.get_values())}"
         return f"{self.column} {self.operator} {repr(self.value)}"
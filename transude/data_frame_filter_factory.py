@@ -1,18 +1,57 @@
+import numpy as np
 import pandas as pd
 import datetime
 from typing import Union, List
-from .data_frame_filter import DataFrameFilter
+from .data_frame_filter import DataFrameFilter, AND_JOINERS, OR_JOINERS, to_value_array
 
 ValueSingleTyping = str | int | float | bool | datetime.datetime | pd.Timestamp
 ValueMultiTyping = Union[Union[ValueSingleTyping, List[str]], Union[ValueSingleTyping, List[int]],
                          Union[ValueSingleTyping, List[float]], Union[ValueSingleTyping, List[bool]],
                          Union[ValueSingleTyping, List[datetime.datetime]]]
+BULK_OPERATORS = {'==': 'in', '!=': 'not in', 'in': 'in', 'not in': 'not in'}
+# The joiners with which filters per value amount to a single membership test
+BULK_JOINERS = {'==': OR_JOINERS, '!=': AND_JOINERS}
+
+
+def coerce_values(values: list, dtype) -> np.ndarray:
+    """
+    Coerces the values of a membership test to the dtype of a column in one vectorized step, the way
+    DataFrameFilterFactory coerces values one at a time. Numbers an integer dtype cannot hold, i.e. fractional or out
+    of range numbers, are dropped rather than wrapped around, as no value of the column can equal them.
+
+    :param values: list
+    The values to coerce.
+    :param dtype: The dtype of the column, or None to convert the values to strings.
+    :return: np.ndarray
+    :raises ValueError: if a value cannot be coerced to the dtype.
+    """
+    if dtype is None or dtype == 'object':
+        return np.asarray(values, dtype=str).astype(object)
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+        numbers = np.asarray(values)
+        if numbers.dtype.kind in 'OUS':
+            numbers = pd.to_numeric(numbers)
+        info = np.iinfo(dtype)
+        numbers = numbers[(numbers >= info.min) & (numbers <= info.max)]
+        with np.errstate(invalid='ignore'):
+            coerced = numbers.astype(dtype)
+        # Dropping numbers changed by the cast catches fractions and the rounding of floats at the bounds
+        return coerced[coerced == numbers]
+    if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+        return np.asarray(values).astype(dtype)
+    if isinstance(dtype, np.dtype) and dtype.kind == 'M':
+        return pd.to_datetime(pd.Index(values)).to_numpy().astype(dtype)
+    return to_value_array(values)
 
 
 class DataFrameFilterFactory:
     """
     This class is used to create a list of properly formed DataFrameFilter instances given
     any columns, any values, a valid operator, and optional parameters.
+
+    In bulk mode, the values of each column are coerced to its dtype at once and held by a single filter with the
+    operator 'in' (for '==') or 'not in' (for '!='), instead of one filter per value. This matches the filters per
+    value only if they share a filter ID and are joined by 'or' (for '==') or 'and' (for '!=').
     """
     def __init__(self,
                  columns: Union[str, List[str]],
@@ -26,7 +65,8 @@ class DataFrameFilterFactory:
                  data_frame: pd.DataFrame = None,
                  omit_on_clear: bool = False,
                  common_name: str = None,
-                 group_joiner: str = None):
+                 group_joiner: str = None,
+                 bulk: bool = False):
         """
         Initializes a DataFrameFilterFactory instance.
 
@@ -55,11 +95,22 @@ class DataFrameFilterFactory:
         Specified common description of the filters.
         :param group_joiner: str (default: None)
         How these filters should join with other filters in the query.
+        :param bulk: bool (default: False)
+        Whether to create a single filter per column holding all of its values, which requires the operator 'in' or
+        'not in', or a filter_id and the operator '==' joined by 'or' or '!=' joined by 'and'. Operators 'in' and
+        'not in' always create filters in bulk.
+        :raises ValueError: if the operator is invalid, or the filters cannot be created in bulk.
         """
         if not DataFrameFilter.is_valid_operator(operator):
             raise ValueError(f"Invalid operator: {operator}")
         if joiner is None:
             joiner = "and"
+        if bulk or DataFrameFilter.is_valid_membership_operator(operator):
+            if operator not in BULK_OPERATORS:
+                raise ValueError(f"Invalid operator for creating filters in bulk: {operator}")
+            if operator in BULK_JOINERS and (joiner not in BULK_JOINERS[operator] or filter_id is None):
+                raise ValueError(f"Filters with the operator '{operator}' joined by '{joiner}' and filter_id "
+                                 f"{filter_id} are no membership test and cannot be created in bulk")
         if group_joiner is None:
             group_joiner = '&'
         self.columns = columns
@@ -74,6 +125,7 @@ class DataFrameFilterFactory:
         self.omit_on_clear = omit_on_clear
         self.common_name = common_name
         self.group_joiner = group_joiner
+        self.bulk = bulk or DataFrameFilter.is_valid_membership_operator(operator)
 
     def create_filters(self) -> List[DataFrameFilter]:
         """
@@ -85,6 +137,8 @@ class DataFrameFilterFactory:
             self.values = [self.values]
         if not isinstance(self.columns, list):
             self.columns = [self.columns] * len(self.values)
+        if self.bulk:
+            return self.create_bulk_filters()
 
         is_string_filter = DataFrameFilter.is_valid_str_operator(self.operator)
 
@@ -126,3 +180,30 @@ class DataFrameFilterFactory:
                                     common_name=self.common_name,
                                     group_joiner=self.group_joiner)
                     for column, value in zip(self.columns, self.values)]
+
+    def create_bulk_filters(self) -> List[DataFrameFilter]:
+        """
+        Creates one `DataFrameFilter` per column holding all values of the column, coerced to the dtype of the column
+        if a DataFrame was given and to strings otherwise.
+
+        :return: List[DataFrameFilter]
+        """
+        column_values = {}
+        for column, value in zip(self.columns, self.values):
+            column_values.setdefault(column, []).append(value)
+        filters = []
+        for column, values in column_values.items():
+            dtype = None
+            if self.data_frame is not None:
+                dtype = self.data_frame[column].dtype
+            filters.append(DataFrameFilter(column=column,
+                                           value=coerce_values(values, dtype),
+                                           operator=BULK_OPERATORS[self.operator],
+                                           in_use=self.in_use,
+                                           joiner=self.joiner,
+                                           filter_id=self.filter_id,
+                                           data_frame=self.data_frame,
+                                           omit_on_clear=self.omit_on_clear,
+                                           common_name=self.common_name,
+                                           group_joiner=self.group_joiner))
+        return filters
@@ -1,11 +1,85 @@
-from typing import Self, List
-from .data_frame_filter import DataFrameFilter
+import weakref
+import numpy as np
+import pandas as pd
+from typing import TYPE_CHECKING, Any, Callable, Self, Dict, List, Hashable, Tuple
+from .data_frame_filter import DataFrameFilter, AND_JOINERS, OR_JOINERS, format_values
+from .data_frame_version import get_frame_generation
+
+if TYPE_CHECKING:
+    from .data_frame_mask_engine import DataFrameMaskEngine
+
+
+def write_through(name: str) -> Callable[..., Any]:
+    """
+    Wraps a list method changing a DataFrameFilterList in place so that it also changes the filters of its manager.
+
+    :param name: str
+    The name of the list method.
+    :return: Callable[..., Any]
+    """
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.df_filter_manager.data_frame_filters = self
+        return result
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+class DataFrameFilterList(list):
+    """
+    This class is the list of DataFrameFilters returned by DataFrameFilterManager.data_frame_filters. Changing it in
+    place changes the filters of the manager, after which it is put back in query order, and the manager keeps it up
+    to date while it is referenced. Copies and slices of it are plain lists.
+    """
+    append = write_through('append')
+    extend = write_through('extend')
+    insert = write_through('insert')
+    remove = write_through('remove')
+    pop = write_through('pop')
+    clear = write_through('clear')
+    sort = write_through('sort')
+    reverse = write_through('reverse')
+    __setitem__ = write_through('__setitem__')
+    __delitem__ = write_through('__delitem__')
+    __iadd__ = write_through('__iadd__')
+    __imul__ = write_through('__imul__')
+
+    def __init__(self, df_filter_manager: 'DataFrameFilterManager', data_frame_filters: List[DataFrameFilter]):
+        """
+        Initializes a DataFrameFilterList instance.
+
+        :param df_filter_manager: DataFrameFilterManager
+        The manager whose filters the list holds.
+        :param data_frame_filters: List[DataFrameFilter]
+        The filters of the manager in query order.
+        """
+        super().__init__(data_frame_filters)
+        self.df_filter_manager = df_filter_manager
+
+    def __copy__(self) -> List[DataFrameFilter]:
+        return list(self)
+
+    def __reduce__(self) -> tuple:
+        return list, (list(self),)
+
+    def copy(self) -> List[DataFrameFilter]:
+        return list(self)
 
 
 class DataFrameFilterManager:
     """
     This class constructs proper string queries using DataFrameFilters for use with the pandas.DataFrame.query() method.
+
+    Groups of at least `membership_threshold` filters that amount to a membership test (see get_membership_test) are
+    written as a single `in`/`not in` clause to keep long queries within the limits of the query parser.
+
+    The built query is cached and only rebuilt once the filters changed, whether through the methods of the manager,
+    which bump its version, or by assigning to an attribute of a filter, which stamps the filter with a new version.
     """
+    membership_threshold = 16
 
     def __init__(self, data_frame_filters: List[DataFrameFilter] = None):
         """
@@ -17,20 +91,126 @@ class DataFrameFilterManager:
         :var data_frame_filters: List[DataFrameFilter]
         The DataFrameFilters to use in building the query.
         """
-        if data_frame_filters is None:
-            data_frame_filters = []
-        self._data_frame_filters = data_frame_filters
+        self._filter_groups = {}
+        self._filter_list = None
+        self._group_masks = {}
+        self._version = 0
+        self._query = None
+        if data_frame_filters is not None:
+            self.index_filters(data_frame_filters)
 
     def __repr__(self) -> str:
         return f"DataFrameQueryBuilder(data_frame_filters={self.data_frame_filters})"
 
+    def __getstate__(self) -> dict:
+        # The list handed out stays with this manager
+        return {**self.__dict__, '_filter_list': None}
+
     @property
-    def data_frame_filters(self) -> List[DataFrameFilter]:
-        return self._data_frame_filters
+    def data_frame_filters(self) -> DataFrameFilterList:
+        """
+        The DataFrameFilters in query order, i.e. grouped by filter ID in order of the first filter of each ID.
+        Changing the list in place changes the filters of this manager, see DataFrameFilterList.
+        """
+        filter_list = self._filter_list and self._filter_list()
+        if filter_list is None:
+            filter_list = DataFrameFilterList(self, self.get_filters())
+            self._filter_list = weakref.ref(filter_list)
+        return filter_list
 
     @data_frame_filters.setter
     def data_frame_filters(self, data_frame_filters: List[DataFrameFilter]):
-        self._data_frame_filters = data_frame_filters
+        data_frame_filters = list(data_frame_filters)
+        self._filter_groups.clear()
+        self.index_filters(data_frame_filters)
+        self.update_filter_list()
+        self._group_masks.clear()
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        """
+        The number of times the filters were changed through the methods of this manager.
+        """
+        return self._version
+
+    def index_filters(self, data_frame_filters: List[DataFrameFilter]) -> None:
+        """
+        Add DataFrameFilters to the groups of their filter IDs, which are kept in order of their first filter.
+
+        :param data_frame_filters: List[DataFrameFilter]
+        The DataFrameFilters to add.
+        """
+        for df_filter in data_frame_filters:
+            group = self._filter_groups.get(df_filter.filter_id)
+            if group is None:
+                self._filter_groups[df_filter.filter_id] = [df_filter]
+            else:
+                group.append(df_filter)
+
+    def get_filters(self) -> List[DataFrameFilter]:
+        """
+        Get the DataFrameFilters in query order as a new list.
+
+        :return: List[DataFrameFilter]
+        """
+        return [df_filter for group in self._filter_groups.values() for df_filter in group]
+
+    def update_filter_list(self) -> None:
+        """
+        Put the filters of the manager into the list handed out by data_frame_filters, if it is still referenced. This
+        is done whenever filters are added or removed, so the cost of copying the filters is only paid while the list
+        is kept.
+        """
+        filter_list = self._filter_list and self._filter_list()
+        if filter_list is not None:
+            list.__setitem__(filter_list, slice(None), self.get_filters())
+
+    def reindex_filters(self) -> None:
+        """
+        Regroup the DataFrameFilters if the filter ID of any of them was changed directly since it was added. This is
+        done whenever the groups are built, while methods taking a filter ID only look up the group of the ID.
+        """
+        if any(df_filter.filter_id != filter_id for filter_id, group in self._filter_groups.items()
+               for df_filter in group):
+            self.data_frame_filters = self.get_filters()
+
+    def get_group_mask(self, filter_id: int, key: Hashable) -> np.ndarray | None:
+        """
+        Get the mask last evaluated for the group of DataFrameFilters with the given filter ID.
+
+        :param filter_id: int
+        The filter ID of the group.
+        :param key: Hashable
+        The key the mask must have been stored under, identifying the DataFrame version and group state.
+        :return: np.ndarray | None
+        The stored mask, or None if no mask is stored for the group under the given key.
+        """
+        entry = self._group_masks.get(filter_id)
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1]
+
+    def set_group_mask(self, filter_id: int, key: Hashable, mask: np.ndarray) -> None:
+        """
+        Store the mask evaluated for the group of DataFrameFilters with the given filter ID, replacing any mask
+        previously stored for the group.
+
+        :param filter_id: int
+        The filter ID of the group.
+        :param key: Hashable
+        The key identifying the DataFrame version and group state the mask was evaluated for.
+        :param mask: np.ndarray
+        The mask of the group, made read-only when stored.
+        """
+        mask.flags.writeable = False
+        self._group_masks[filter_id] = (key, mask)
+
+    def clear_group_masks(self) -> None:
+        """
+        Remove all stored group masks.
+        """
+        self._group_masks.clear()
 
     def add_filter(self, data_frame_filter: DataFrameFilter) -> Self:
         """
@@ -40,7 +220,10 @@ class DataFrameFilterManager:
         The DataFrameFilter to add.
         :return: self
         """
-        self.data_frame_filters.append(data_frame_filter)
+        self.index_filters([data_frame_filter])
+        self.update_filter_list()
+        self._group_masks.pop(data_frame_filter.filter_id, None)
+        self._version += 1
         return Self
 
     def add_filters(self, data_frame_filters: List[DataFrameFilter]) -> Self:
@@ -51,8 +234,11 @@ class DataFrameFilterManager:
         The DataFrameFilters to add
         :return: self
         """
+        self.index_filters(data_frame_filters)
+        self.update_filter_list()
         for df_filter in data_frame_filters:
-            self.data_frame_filters.append(df_filter)
+            self._group_masks.pop(df_filter.filter_id, None)
+        self._version += 1
         return Self
 
     def remove_filter(self, data_frame_filter: DataFrameFilter) -> Self:
@@ -64,8 +250,18 @@ class DataFrameFilterManager:
         :return: self
         :raises ValueError: if the given DataFrameFilter is not in the list of filters.
         """
+        filter_id = data_frame_filter.filter_id
         try:
-            self.data_frame_filters.remove(data_frame_filter)
+            if data_frame_filter not in self._filter_groups.get(filter_id, []):
+                # The filter ID of the filter may have been changed since it was added
+                self.reindex_filters()
+            group = self._filter_groups.get(filter_id, [])
+            group.remove(data_frame_filter)
+            if not group:
+                del self._filter_groups[filter_id]
+            self.update_filter_list()
+            self._group_masks.pop(filter_id, None)
+            self._version += 1
             return Self
         except ValueError as exc:
             exc.add_note(f"Could not remove {data_frame_filter} from {self!r}")
@@ -73,27 +269,29 @@ class DataFrameFilterManager:
 
     def remove_filter_by_index(self, index: int) -> Self:
         """
-        Remove a DataFrameFilter from the list of filters by index.
+        Remove a DataFrameFilter from the list of filters by index, not counting default toggle filters.
 
         :param index: int
         The index of the DataFrameFilter to remove.
         :return: self
         :raises IndexError: if the given index is out of bounds.
         """
-        try:
-            diff = 0
-            for i, item in enumerate(self.data_frame_filters):
-                if item.omit_on_clear:
-                    diff += 1
-                elif i == index + diff:
-                    del self.data_frame_filters[i]
-                    break
-            if (index + diff) > len(self.data_frame_filters):
-                raise IndexError(f"Could not remove DataFrameFilter at index={index} from {self!r}")
-            return Self
-        except IndexError as exc:
-            exc.add_note(f"Could not remove DataFrameFilter at index={index} from {self!r}")
-            raise exc
+        if index >= 0:
+            remaining = index
+            for filter_id, group in self._filter_groups.items():
+                for i, df_filter in enumerate(group):
+                    if df_filter.omit_on_clear:
+                        continue
+                    if remaining == 0:
+                        del group[i]
+                        if not group:
+                            del self._filter_groups[filter_id]
+                        self.update_filter_list()
+                        self._group_masks.pop(filter_id, None)
+                        self._version += 1
+                        return Self
+                    remaining -= 1
+        raise IndexError(f"Could not remove DataFrameFilter at index={index} from {self!r}")
 
     def remove_filters_by_id(self, filter_id: int) -> Self:
         """
@@ -104,10 +302,11 @@ class DataFrameFilterManager:
         :return: self
         :raises ValueError: if no DataFrameFilters with the given filter ID are found.
         """
-        if not any(df_filter.filter_id == filter_id for df_filter in self.data_frame_filters):
+        if self._filter_groups.pop(filter_id, None) is None:
             raise ValueError(f"Filter with id {filter_id} not found")
-        self._data_frame_filters = [df_filter for df_filter in self.data_frame_filters if
-                                    df_filter.filter_id != filter_id]
+        self.update_filter_list()
+        self._group_masks.pop(filter_id, None)
+        self._version += 1
         return Self
 
     def clear_filters(self) -> Self:
@@ -116,11 +315,7 @@ class DataFrameFilterManager:
 
         :return: self
         """
-        df_filters = []
-        for df_filter in self.data_frame_filters:
-            if df_filter.omit_on_clear:
-                df_filters.append(df_filter)
-        self.data_frame_filters = df_filters
+        self.data_frame_filters = [df_filter for df_filter in self.get_filters() if df_filter.omit_on_clear]
         return Self
 
     def disable_filters(self) -> Self:
@@ -129,8 +324,9 @@ class DataFrameFilterManager:
 
         :return: self
         """
-        for df_filter in self.data_frame_filters:
+        for df_filter in self.get_filters():
             df_filter.in_use = False
+        self._version += 1
         return Self
 
     def disable_filters_by_id(self, filter_id: int) -> Self:
@@ -141,9 +337,10 @@ class DataFrameFilterManager:
         The filter ID of the DataFrameFilters to disable.
         :return: self
         """
-        for df_filter in self.data_frame_filters:
-            if df_filter.filter_id == filter_id:
-                df_filter.in_use = False
+        for df_filter in self._filter_groups.get(filter_id, []):
+            df_filter.in_use = False
+        self._group_masks.pop(filter_id, None)
+        self._version += 1
         return Self
 
     def enable_filters(self) -> Self:
@@ -152,8 +349,9 @@ class DataFrameFilterManager:
 
         :return: self
         """
-        for df_filter in self.data_frame_filters:
+        for df_filter in self.get_filters():
             df_filter.in_use = True
+        self._version += 1
         return Self
 
     def enable_filters_by_id(self, filter_id: int) -> Self:
@@ -164,46 +362,127 @@ class DataFrameFilterManager:
         The filter ID of the DataFrameFilters to enable.
         :return: self
         """
-        for df_filter in self.data_frame_filters:
-            if df_filter.filter_id == filter_id:
-                df_filter.in_use = True
+        for df_filter in self._filter_groups.get(filter_id, []):
+            df_filter.in_use = True
+        self._group_masks.pop(filter_id, None)
+        self._version += 1
         return Self
 
+    def get_filter_groups(self) -> List[List[DataFrameFilter]]:
+        """
+        Group the in-use DataFrameFilters in the list of filters by filter ID, whether or not filters sharing an ID
+        were added next to each other.
+
+        :return: List[List[DataFrameFilter]]
+        The groups of in-use DataFrameFilters in query order, i.e. in order of the first filter of each ID.
+        """
+        self.reindex_filters()
+        groups = []
+        for group in self._filter_groups.values():
+            group = [df_filter for df_filter in group if df_filter.in_use]
+            if group:
+                groups.append(group)
+        return groups
+
+    @staticmethod
+    def get_membership_test(df_filters: List[DataFrameFilter]) -> Tuple[str, list | np.ndarray, bool] | None:
+        """
+        Returns whether a group of DataFrameFilters amounts to a membership test, i.e. it compares a single column
+        against several values with '==' joined by 'or', or with '!=' joined by 'and', or consists of a single filter
+        with the operator 'in' or 'not in'.
+
+        :param df_filters: List[DataFrameFilter]
+        The in-use DataFrameFilters of the group, in query order.
+        :return: Tuple[str, list | np.ndarray, bool] | None
+        The column, the values and whether the test is negated, or None if the group is not a membership test.
+        """
+        if len(df_filters) == 1 and DataFrameFilter.is_valid_membership_operator(df_filters[0].operator):
+            return df_filters[0].column, df_filters[0].get_values(), df_filters[0].operator == 'not in'
+        if len(df_filters) < 2:
+            return None
+        column = df_filters[0].column
+        operator = df_filters[0].operator
+        if operator == '==':
+            joiners = OR_JOINERS
+        elif operator == '!=':
+            joiners = AND_JOINERS
+        else:
+            return None
+        for index, df_filter in enumerate(df_filters):
+            if df_filter.column != column or df_filter.operator != operator:
+                return None
+            if index and df_filter.joiner not in joiners:
+                return None
+            if pd.api.types.is_scalar(df_filter.value) and pd.isna(df_filter.value):
+                return None
+        return column, [df_filter.value for df_filter in df_filters], operator == '!='
+
+    def get_facet_counts(self, data_frame: pd.DataFrame, columns: List[str],
+                         engine: 'DataFrameMaskEngine' = None) -> Dict[str, pd.Series]:
+        """
+        Count the rows per value of each of the given columns under all in-use DataFrameFilters except the filter
+        groups referring to that column, i.e. how many rows each option of a filter control would leave given the
+        other filters. Each group is evaluated once for all columns (see DataFrameMaskEngine.get_facet_counts).
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to count the rows of.
+        :param columns: List[str]
+        The columns to count the rows per value of.
+        :param engine: DataFrameMaskEngine (default: None)
+        The engine evaluating the filters. Pass the same engine between calls to reuse its caches.
+        :return: Dict[str, pd.Series]
+        The number of rows per value of each column.
+        """
+        if engine is None:
+            # Imported here as the engine module depends on this one
+            from .data_frame_mask_engine import DataFrameMaskEngine
+            engine = DataFrameMaskEngine()
+        return engine.get_facet_counts(data_frame, self, columns)
+
+    def get_query_key(self) -> tuple:
+        """
+        Returns a key that changes whenever the query may have changed, in constant time: the version of this manager,
+        the version last stamped on any filter, the generation of DataFrame versions (the dtypes of the DataFrames
+        the filters refer to decide how string operators are written, see bump_frame_version) and the membership
+        threshold.
+
+        :return: tuple
+        """
+        return self._version, DataFrameFilter.latest_version, get_frame_generation(), self.membership_threshold
+
     def build_query(self) -> str:
         """
-        Build a proper string query using the DataFrameFilters in the list of filters.
+        Build a proper string query using the DataFrameFilters in the list of filters, or return the query last built
+        if the filters did not change since.
 
         :return: str
         The constructed query.
         """
+        key = self.get_query_key()
+        if self._query is not None:
+            cached_key, filter_versions, query = self._query
+            if cached_key == key:
+                return query
+            if cached_key[0] == key[0] and cached_key[2:] == key[2:] and \
+                    filter_versions == tuple(df_filter.version for df_filter in self.get_filters()):
+                # Only filters of other managers changed
+                self._query = (key, filter_versions, query)
+                return query
         query = ''
-        current_filter_id = None
-        next_filter_id = None
-        current_query = ''
-        group_query = ''
-
-        for index, df_filter in enumerate(self.data_frame_filters):
-            if not df_filter.in_use:
-                continue
-
-            current_filter_id = df_filter.filter_id
-            if index + 1 < len(self.data_frame_filters):
-                next_filter_id = self.data_frame_filters[index + 1].filter_id
-            else:
-                next_filter_id = None
 
-            if not group_query:
-                if current_query:
-                    group_query += f' {df_filter.group_joiner} '
-                group_query += f'(({df_filter.get_query()})'
-
-            if next_filter_id != current_filter_id:
-                group_query += f')'
-                current_query += group_query
-                group_query = ''
+        for group in self.get_filter_groups():
+            if query:
+                query += f' {group[0].group_joiner} '
+            membership_test = None
+            if len(group) >= self.membership_threshold:
+                membership_test = self.get_membership_test(group)
+            if membership_test is not None:
+                column, values, negated = membership_test
+                group_query = f"({column} {'not in' if negated else 'in'} {format_values(values)})"
             else:
-                group_query += f' {df_filter.joiner} ({df_filter.get_query()})'
-
-        if current_query:
-            query += f'{current_query}'
+                group_query = f'({group[0].get_query()})'
+                for df_filter in group[1:]:
+                    group_query += f' {df_filter.joiner} ({df_filter.get_query()})'
+            query += f'({group_query})'
+        self._query = (key, tuple(df_filter.version for df_filter in self.get_filters()), query)
         return query
@@ -0,0 +1,332 @@
+import datetime
+import numpy as np
+import pandas as pd
+from typing import Callable, List
+from .data_frame_filter import DataFrameFilter, AND_JOINERS
+
+RANGE_OPERATORS = ('>', '<', '>=', '<=')
+
+
+def is_range_group(df_filters: List[DataFrameFilter]) -> bool:
+    """
+    Returns whether a group of DataFrameFilters compares a single column with '>', '<', '>=' or '<=' joined by 'and',
+    such as the two ends of a slider.
+
+    :param df_filters: List[DataFrameFilter]
+    The in-use DataFrameFilters of the group, in query order.
+    :return: bool
+    """
+    column = df_filters[0].column
+    for index, df_filter in enumerate(df_filters):
+        if df_filter.column != column or df_filter.operator not in RANGE_OPERATORS:
+            return False
+        if index and df_filter.joiner not in AND_JOINERS:
+            return False
+    return True
+
+
+def check_lookup_values(dtype: np.dtype | pd.api.extensions.ExtensionDtype, values: list | np.ndarray) -> None:
+    """
+    Checks that looking up values in a column by hash finds the same rows as comparing the column with each value
+    using '=='.
+
+    :param dtype: np.dtype | pd.api.extensions.ExtensionDtype
+    The dtype of the column to look up values in.
+    :param values: list | np.ndarray
+    The values to look up.
+    :raises TypeError: if a lookup could find different rows than a comparison.
+    """
+    kind = dtype.kind
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'biufmM' and \
+            (values.dtype.kind == kind or values.dtype.kind in 'iuf' and kind in 'iuf'):
+        # Arrays of values of the kind of the column are looked up as they are compared
+        return
+    if isinstance(dtype, pd.PeriodDtype) or \
+            kind == 'M' and not all(isinstance(value, (datetime.datetime, np.datetime64)) for value in values) or \
+            kind == 'm' and not all(isinstance(value, (datetime.timedelta, np.timedelta64)) for value in values):
+        # Comparisons parse strings into datetimes, lookups do not
+        raise TypeError(f"Cannot look up {values!r} in a column of dtype {dtype}")
+    if kind == 'b' and not all(isinstance(value, (bool, np.bool_)) for value in values) or \
+            kind in 'iuf' and any(isinstance(value, (bool, np.bool_)) for value in values):
+        # Comparisons treat booleans as numbers, lookups do not
+        raise TypeError(f"Cannot look up {values!r} in a column of dtype {dtype}")
+
+
+def excludes_missing_when_unequal(dtype: np.dtype | pd.api.extensions.ExtensionDtype) -> bool:
+    """
+    Returns whether DataFrame.query leaves the missing values of a column out of the rows not equal to a value.
+    Nullable dtypes compare missing values as NA, which never matches, except for string dtypes, whose missing values
+    DataFrame.query finds unequal to every value like those of NumPy dtypes.
+
+    :param dtype: np.dtype | pd.api.extensions.ExtensionDtype
+    The dtype of the column.
+    :return: bool
+    """
+    if isinstance(dtype, pd.StringDtype):
+        return False
+    empty = pd.Series([], dtype=dtype)
+    return not isinstance((empty != empty).dtype, np.dtype)
+
+
+class SortedColumnIndex:
+    """
+    This class is a sorted index of a numeric, datetime or timedelta DataFrame column. It answers range comparisons
+    with binary searches instead of comparing every row.
+    """
+
+    def __init__(self, series: pd.Series):
+        """
+        Initializes a SortedColumnIndex instance.
+
+        :param series: pd.Series
+        The column to index. Must have a NumPy integer, unsigned integer, float, datetime64 or timedelta64 dtype.
+        :raises TypeError: if the column cannot be indexed.
+        """
+        if not SortedColumnIndex.is_indexable(series):
+            raise TypeError(f"Cannot build a sorted index over dtype {series.dtype}")
+        values = series.to_numpy()
+        positions = np.flatnonzero(~pd.isna(values))
+        index_dtype = np.int32 if len(values) < np.iinfo(np.int32).max else np.int64
+        self.dtype = values.dtype
+        self.size = len(values)
+        self.order = positions[np.argsort(values[positions], kind='stable')].astype(index_dtype)
+        self.sorted_values = values[self.order]
+
+    def __repr__(self) -> str:
+        return f"SortedColumnIndex(dtype={self.dtype}, size={self.size}, nbytes={self.nbytes})"
+
+    @property
+    def nbytes(self) -> int:
+        return self.order.nbytes + self.sorted_values.nbytes
+
+    @staticmethod
+    def is_indexable(series: pd.Series) -> bool:
+        """
+        Returns whether a sorted index can be built over the given column.
+
+        :param series: pd.Series
+        The column to check.
+        :return: bool
+        """
+        return isinstance(series.dtype, np.dtype) and series.dtype.kind in 'iufMm'
+
+    def convert_value(self, value: object) -> object:
+        """
+        Converts a value to the type of the indexed column the same way pandas does when comparing the column with it.
+
+        :param value: object
+        The value to convert.
+        :return: object
+        :raises TypeError: if the value is not compared with the column by value.
+        """
+        if self.dtype.kind in 'iuf' and isinstance(value, (int, float, np.integer, np.floating)) \
+                and not pd.isna(value):
+            if self.dtype.kind == 'f' or isinstance(value, (float, np.floating)):
+                return value
+            info = np.iinfo(self.dtype)
+            if info.min <= value <= info.max:
+                return value
+        converted = None
+        if self.dtype.kind == 'M' and isinstance(value, (str, datetime.datetime, np.datetime64)):
+            try:
+                timestamp = pd.Timestamp(value)
+            except ValueError as exc:
+                raise TypeError(f"Cannot compare {value!r} with dtype {self.dtype}") from exc
+            if timestamp is not pd.NaT and timestamp.tz is None:
+                converted = timestamp.to_datetime64()
+        elif self.dtype.kind == 'm' and isinstance(value, (datetime.timedelta, np.timedelta64)) \
+                and not pd.isna(value):
+            converted = pd.Timedelta(value).to_timedelta64()
+        # Binary search casts the value to the unit of the column, which must not lose precision
+        if converted is not None and converted.astype(self.dtype) == converted:
+            return converted.astype(self.dtype)
+        raise TypeError(f"Cannot compare {value!r} with dtype {self.dtype}")
+
+    def get_filters_mask(self, df_filters: List[DataFrameFilter]) -> np.ndarray:
+        """
+        Returns a boolean mask of the rows matching all of the given range DataFrameFilters on the indexed column.
+
+        :param df_filters: List[DataFrameFilter]
+        DataFrameFilters comparing the indexed column with '>', '<', '>=' or '<='.
+        :return: np.ndarray
+        :raises TypeError: if a value cannot be compared with the indexed column.
+        """
+        lower, lower_inclusive, upper, upper_inclusive = None, True, None, True
+        for df_filter in df_filters:
+            value = self.convert_value(df_filter.value)
+            inclusive = df_filter.operator.endswith('=')
+            if df_filter.operator.startswith('>'):
+                if lower is None or value > lower or value == lower and not inclusive:
+                    lower, lower_inclusive = value, inclusive
+            elif upper is None or value < upper or value == upper and not inclusive:
+                upper, upper_inclusive = value, inclusive
+        return self.get_range_mask(lower, lower_inclusive, upper, upper_inclusive)
+
+    def get_range_mask(self, lower: object = None, lower_inclusive: bool = True,
+                       upper: object = None, upper_inclusive: bool = True) -> np.ndarray:
+        """
+        Returns a boolean mask of the rows whose value is within the given range. Missing values are never within
+        the range.
+
+        :param lower: object (default: None)
+        The lower bound of the range, or None if the range has no lower bound.
+        :param lower_inclusive: bool (default: True)
+        Whether the lower bound itself is within the range.
+        :param upper: object (default: None)
+        The upper bound of the range, or None if the range has no upper bound.
+        :param upper_inclusive: bool (default: True)
+        Whether the upper bound itself is within the range.
+        :return: np.ndarray
+        :raises TypeError: if a bound cannot be compared with the indexed column.
+        """
+        start, stop = 0, len(self.sorted_values)
+        if lower is not None:
+            start = np.searchsorted(self.sorted_values, self.convert_value(lower),
+                                    side='left' if lower_inclusive else 'right')
+        if upper is not None:
+            stop = np.searchsorted(self.sorted_values, self.convert_value(upper),
+                                   side='right' if upper_inclusive else 'left')
+        mask = np.zeros(self.size, dtype=bool)
+        if start < stop:
+            mask[self.order[start:stop]] = True
+        return mask
+
+
+class InvertedColumnIndex:
+    """
+    This class is an inverted index of a DataFrame column that maps each distinct value to the positions of the rows
+    holding it. It answers '==' and '!=' filters, and groups of them forming a membership test, with lookups instead
+    of comparing every row. Best suited to columns with few distinct values.
+    """
+
+    def __init__(self, series: pd.Series):
+        """
+        Initializes an InvertedColumnIndex instance.
+
+        :param series: pd.Series
+        The column to index.
+        """
+        codes, uniques = pd.factorize(series)
+        valid = np.flatnonzero(codes >= 0)
+        index_dtype = np.int32 if len(codes) < np.iinfo(np.int32).max else np.int64
+        self.dtype = series.dtype
+        self.size = len(codes)
+        self.uniques = pd.Index(uniques)
+        self.positions = valid[np.argsort(codes[valid], kind='stable')].astype(index_dtype)
+        self.offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes[valid], minlength=len(uniques)), out=self.offsets[1:])
+        self.missing = np.flatnonzero(codes < 0).astype(index_dtype)
+        self.nullable = excludes_missing_when_unequal(self.dtype)
+
+    def __repr__(self) -> str:
+        return f"InvertedColumnIndex(dtype={self.dtype}, size={self.size}, " \
+               f"distinct={len(self.uniques)}, nbytes={self.nbytes})"
+
+    @property
+    def nbytes(self) -> int:
+        return self.positions.nbytes + self.offsets.nbytes + self.missing.nbytes + \
+            int(self.uniques.memory_usage(deep=True))
+
+    def get_positions(self, values: list) -> np.ndarray:
+        """
+        Returns the positions of the rows holding any of the given values.
+
+        :param values: list
+        The values to look up. Must not contain missing values.
+        :return: np.ndarray
+        The row positions, grouped by value.
+        :raises TypeError: if a lookup could find different rows than comparing the column with '=='.
+        """
+        check_lookup_values(self.dtype, values)
+        codes = self.uniques.get_indexer(values)
+        codes = np.unique(codes[codes >= 0])
+        return np.concatenate([self.positions[self.offsets[code]:self.offsets[code + 1]] for code in codes] or
+                              [self.positions[:0]])
+
+    def get_mask(self, values: list, negated: bool = False) -> np.ndarray:
+        """
+        Returns a boolean mask of the rows equal to any of the given values, or of the rows not equal to any of them
+        if negated.
+
+        :param values: list
+        The values to look up. Must not contain missing values.
+        :param negated: bool (default: False)
+        Whether to return the rows not equal to any of the values.
+        :return: np.ndarray
+        :raises TypeError: if a lookup could find different rows than comparing the column with '=='.
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.get_positions(values)] = True
+        if negated:
+            mask = ~mask
+            if self.nullable:
+                mask[self.missing] = False
+        return mask
+
+
+class FactorizedColumn:
+    """
+    This class is a factorization of a DataFrame column into its distinct values and a code per row. It allows
+    evaluating an expensive predicate, such as a string operation, once per distinct value and broadcasting the
+    result back to the rows.
+    """
+
+    def __init__(self, series: pd.Series):
+        """
+        Initializes a FactorizedColumn instance.
+
+        :param series: pd.Series
+        The column to factorize. Must be factorizable, see is_factorizable.
+        :raises TypeError: if the column cannot be factorized.
+        """
+        if not FactorizedColumn.is_factorizable(series):
+            raise TypeError(f"Cannot factorize a column of dtype {series.dtype}")
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series)
+            codes = codes.astype(np.int32 if len(uniques) < np.iinfo(np.int32).max else np.int64)
+        self.codes = codes
+        self.uniques = pd.Series(uniques)
+        self.missing = np.flatnonzero(codes < 0)
+        self.missing_values = series.iloc[self.missing].reset_index(drop=True)
+
+    def __repr__(self) -> str:
+        return f"FactorizedColumn(dtype={self.uniques.dtype}, size={len(self.codes)}, " \
+               f"distinct={len(self.uniques)}, nbytes={self.nbytes})"
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.missing.nbytes + int(self.uniques.memory_usage(deep=True)) + \
+            int(self.missing_values.memory_usage(deep=True))
+
+    @staticmethod
+    def is_factorizable(series: pd.Series) -> bool:
+        """
+        Returns whether a column can be factorized such that equal values always have the same string representation,
+        i.e. it is categorical, or holds only strings, integers or booleans besides missing values.
+
+        :param series: pd.Series
+        The column to check.
+        :return: bool
+        """
+        if isinstance(series.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            return True
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'iub':
+            return True
+        return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty')
+
+    def get_mask(self, evaluate: Callable[[pd.Series], np.ndarray]) -> np.ndarray:
+        """
+        Returns a boolean mask of the rows for which a predicate holds, evaluating it once per distinct value and
+        once per missing value.
+
+        :param evaluate: Callable[[pd.Series], np.ndarray]
+        Evaluates the predicate for each value of a Series into a boolean mask.
+        :return: np.ndarray
+        """
+        unique_mask = np.append(evaluate(self.uniques), False)
+        mask = unique_mask[self.codes]
+        if len(self.missing):
+            mask[self.missing] = evaluate(self.missing_values)
+        return mask
@@ -0,0 +1,1157 @@
+import itertools
+import math
+import operator
+import re
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Tuple
+from .data_frame_cache import DataFrameCache, estimate_nbytes
+from .data_frame_filter import DataFrameFilter, AND_JOINERS, OR_JOINERS
+from .data_frame_filter_manager import DataFrameFilterManager
+from .data_frame_index import RANGE_OPERATORS, FactorizedColumn, InvertedColumnIndex, SortedColumnIndex, \
+    check_lookup_values, excludes_missing_when_unequal, is_range_group
+from .data_frame_version import FrameVersion, get_frame_version
+
+if TYPE_CHECKING:
+    from .data_frame_statistics import DataFrameStatistics
+
+
+def to_bool_array(result: pd.Series | np.ndarray, na_value: bool = False) -> np.ndarray:
+    """
+    Converts the result of a comparison into a NumPy boolean mask.
+
+    :param result: pd.Series | np.ndarray
+    The result of a comparison or string operation.
+    :param na_value: bool (default: False)
+    The value of missing results.
+    :return: np.ndarray
+    """
+    if isinstance(result, pd.Series):
+        return result.to_numpy(dtype=bool, na_value=na_value)
+    return np.asarray(result, dtype=bool)
+
+
+def apply_str_operator(series: pd.Series, df_filter: DataFrameFilter, converted: bool = False) -> np.ndarray:
+    """
+    Applies the string operator of a DataFrameFilter to every value of a Series the same way its query does.
+
+    :param series: pd.Series
+    The values to apply the string operator to.
+    :param df_filter: DataFrameFilter
+    The DataFrameFilter with a string operator.
+    :param converted: bool (default: False)
+    Whether the values have already been converted with astype('str').
+    :return: np.ndarray
+    """
+    if not converted and not df_filter.has_string_dtype():
+        series = series.astype('str')
+    if df_filter.operator == 'contains':
+        result = series.str.contains(df_filter.value, case=df_filter.match_case, regex=df_filter.regex)
+    else:
+        result = getattr(series.str, df_filter.operator)(df_filter.value)
+    return to_bool_array(result)
+
+
+def is_case_folded_contains(df_filter: DataFrameFilter) -> bool:
+    """
+    Returns whether a DataFrameFilter is a literal case-insensitive 'contains', which pandas evaluates by looking for
+    the upper-cased value in the upper-cased string, so that it can be evaluated against an upper-cased column.
+
+    :param df_filter: DataFrameFilter
+    The DataFrameFilter to check.
+    :return: bool
+    """
+    return df_filter.operator == 'contains' and not df_filter.match_case and not df_filter.regex and \
+        isinstance(df_filter.value, str)
+
+
+def is_contains_group(df_filters: List[DataFrameFilter]) -> bool:
+    """
+    Returns whether a group of DataFrameFilters tests a single column for containing any of several strings, i.e.
+    whether they all use 'contains' with a string value and are joined by 'or'. The filters must also agree on whether
+    the column has a string dtype, as their queries convert the column with astype('str') otherwise, which turns
+    missing values into text that may match.
+
+    :param df_filters: List[DataFrameFilter]
+    The in-use DataFrameFilters of the group, in query order.
+    :return: bool
+    """
+    if len(df_filters) < 2 or \
+            not all(df_filter.column == df_filters[0].column and df_filter.operator == 'contains' and
+                    isinstance(df_filter.value, str) for df_filter in df_filters) or \
+            not all(df_filter.joiner in OR_JOINERS for df_filter in df_filters[1:]):
+        return False
+    has_string_dtype = df_filters[0].has_string_dtype()
+    return all(df_filter.has_string_dtype() == has_string_dtype for df_filter in df_filters[1:])
+
+
+def get_literal_pattern(values: List[str]) -> str:
+    """
+    Returns a regular expression matching any of the given literal strings, structured as a trie so that matching
+    takes a single step per character rather than a step per string.
+
+    :param values: List[str]
+    The literal strings to match.
+    :return: str
+    """
+    trie = {}
+    for value in values:
+        node = trie
+        for char in value:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def get_pattern(node: dict) -> str:
+        optional = '' in node
+        alternatives = [re.escape(char) + get_pattern(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ''
+        pattern = alternatives[0] if len(alternatives) == 1 and not optional else f"(?:{'|'.join(alternatives)})"
+        return pattern + '?' if optional else pattern
+
+    return get_pattern(trie)
+
+
+def get_contains_regexes(df_filters: List[DataFrameFilter]) -> List[Tuple[str, bool, int]]:
+    """
+    Combines the values of a group of 'contains' DataFrameFilters joined by 'or' into as few regular expressions as
+    possible while matching the same rows: one for case-sensitive filters, one for case-insensitive literal filters,
+    which pandas matches upper-cased, and one for case-insensitive regular expressions.
+
+    :param df_filters: List[DataFrameFilter]
+    The in-use DataFrameFilters of a group for which is_contains_group is True.
+    :return: List[Tuple[str, bool, int]]
+    The regular expressions, whether each is to be matched against upper-cased strings, and the flags of each.
+    :raises TypeError: if a regular expression cannot be combined with others, for instance because it has groups
+    that may be referred back to or global inline flags.
+    """
+    default_flags = re.compile('').flags
+    literals = {True: [], False: []}
+    patterns = {True: [], False: []}
+    for df_filter in df_filters:
+        if not df_filter.regex:
+            literals[df_filter.match_case].append(df_filter.value if df_filter.match_case else df_filter.value.upper())
+            continue
+        try:
+            compiled = re.compile(df_filter.value)
+        except re.error as e:
+            raise TypeError(f"Invalid regular expression: {df_filter.value!r}") from e
+        if compiled.groups or compiled.flags != default_flags:
+            raise TypeError(f"Cannot combine regular expression: {df_filter.value!r}")
+        patterns[df_filter.match_case].append(f"(?:{df_filter.value})")
+    try:
+        if literals[True]:
+            patterns[True].append(get_literal_pattern(list(dict.fromkeys(literals[True]))))
+        upper_pattern = get_literal_pattern(list(dict.fromkeys(literals[False]))) if literals[False] else None
+    except RecursionError as e:
+        raise TypeError("Cannot combine literal values") from e
+    regexes = []
+    if patterns[True]:
+        regexes.append(('|'.join(dict.fromkeys(patterns[True])), False, 0))
+    if upper_pattern is not None:
+        regexes.append((upper_pattern, True, 0))
+    if patterns[False]:
+        regexes.append(('|'.join(dict.fromkeys(patterns[False])), False, re.IGNORECASE))
+    return regexes
+
+
+def apply_contains_regexes(series: pd.Series, regexes: List[Tuple[str, bool, int]],
+                           upper_series: pd.Series = None) -> np.ndarray:
+    """
+    Matches strings against the regular expressions returned by get_contains_regexes, one pass per expression.
+
+    :param series: pd.Series
+    The strings to match, converted with astype('str') unless they have the string dtype.
+    :param regexes: List[Tuple[str, bool, int]]
+    The regular expressions to match.
+    :param upper_series: pd.Series (default: None)
+    The upper-cased strings. Computed from series if needed and not given.
+    :return: np.ndarray
+    """
+    mask = None
+    for pattern, upper, flags in regexes:
+        if upper:
+            if upper_series is None:
+                upper_series = series.str.upper()
+            result = to_bool_array(upper_series.str.contains(pattern, regex=True))
+        else:
+            result = to_bool_array(series.str.contains(pattern, flags=flags, regex=True))
+        mask = result if mask is None else mask | result
+    return mask
+
+
+def combine_masks(masks: List[np.ndarray], joiners: List[str]) -> np.ndarray:
+    """
+    Combines boolean masks the same way pandas.DataFrame.query() combines parenthesized terms, where 'and'/'&' bind
+    tighter than 'or'/'|'.
+
+    :param masks: List[np.ndarray]
+    The masks to combine, in query order.
+    :param joiners: List[str]
+    The joiner preceding each mask after the first.
+    :return: np.ndarray
+    :raises ValueError: if a joiner is not a valid joiner.
+    """
+    result = None
+    term = masks[0]
+    for mask, joiner in zip(masks[1:], joiners):
+        if joiner in AND_JOINERS:
+            term = term & mask
+        elif joiner in OR_JOINERS:
+            result = term if result is None else result | term
+            term = mask
+        else:
+            raise ValueError(f"Invalid joiner: {joiner}")
+    return term if result is None else result | term
+
+
+def split_terms(operands: list, joiners: List[str]) -> List[list]:
+    """
+    Splits operands into the terms joined by 'or', each a list of operands joined by 'and', grouping them the same way
+    combine_masks does.
+
+    :param operands: list
+    The operands, such as DataFrameFilters or filter groups, in query order.
+    :param joiners: List[str]
+    The joiner preceding each operand after the first.
+    :return: List[list]
+    :raises ValueError: if a joiner is not a valid joiner.
+    """
+    terms = [[operands[0]]]
+    for operand, joiner in zip(operands[1:], joiners):
+        if joiner in AND_JOINERS:
+            terms[-1].append(operand)
+        elif joiner in OR_JOINERS:
+            terms.append([operand])
+        else:
+            raise ValueError(f"Invalid joiner: {joiner}")
+    return terms
+
+
+def plan_terms(terms: List[list], get_signature: Callable[[Any], Hashable],
+               estimate: Callable[[Any], Tuple[float, float]]) -> Tuple[List[list], float, float]:
+    """
+    Plans the evaluation of terms joined by 'or', each a list of operands joined by 'and'. Duplicate operands within a
+    term and duplicate terms are removed, the operands of each term are ordered so that cheap operands likely to fail
+    come first, and the terms are ordered so that cheap terms likely to match come first. As 'and' and 'or' are
+    commutative and idempotent on boolean masks, the plan matches the same rows as the terms.
+
+    :param terms: List[list]
+    The terms to plan, as returned by split_terms.
+    :param get_signature: Callable[[Any], Hashable]
+    Returns a signature of an operand that is equal for operands matching the same rows.
+    :param estimate: Callable[[Any], Tuple[float, float]]
+    Returns the estimated cost per row of evaluating an operand and the estimated fraction of rows it matches.
+    :return: Tuple[List[list], float, float]
+    The planned terms, and the estimated cost per row and fraction of rows matched of the whole plan.
+    """
+    planned = {}
+    for term in terms:
+        operands = {}
+        for operand in term:
+            operands.setdefault(get_signature(operand), operand)
+        key = frozenset(operands)
+        if key in planned:
+            continue
+        estimates = {signature: estimate(operand) for signature, operand in operands.items()}
+        # Evaluating an operand costs its cost per row on the rows that survived the operands before it
+        order = sorted(operands, key=lambda signature: get_and_rank(*estimates[signature]))
+        cost, selectivity = 0.0, 1.0
+        for signature in order:
+            cost += selectivity * estimates[signature][0]
+            selectivity *= estimates[signature][1]
+        planned[key] = ([operands[signature] for signature in order], cost, selectivity)
+    plan = sorted(planned.values(), key=lambda term: get_or_rank(term[1], term[2]))
+    cost, unmatched = 0.0, 1.0
+    for _, term_cost, term_selectivity in plan:
+        cost += unmatched * term_cost
+        unmatched *= 1 - term_selectivity
+    return [operands for operands, _, _ in plan], cost, 1 - unmatched
+
+
+def get_and_rank(cost: float, selectivity: float) -> float:
+    """
+    Returns the rank of an operand joined by 'and'. Evaluating operands in ascending rank minimizes the expected cost
+    when each operand is only evaluated on the rows matched by the operands before it.
+
+    :param cost: float
+    The estimated cost per row of the operand.
+    :param selectivity: float
+    The estimated fraction of rows the operand matches.
+    :return: float
+    """
+    if cost <= 0:
+        return 0.0
+    return cost / (1 - selectivity) if selectivity < 1 else math.inf
+
+
+def get_or_rank(cost: float, selectivity: float) -> float:
+    """
+    Returns the rank of a term joined by 'or'. Evaluating terms in ascending rank minimizes the expected cost when each
+    term is only evaluated on the rows not matched by the terms before it.
+
+    :param cost: float
+    The estimated cost per row of the term.
+    :param selectivity: float
+    The estimated fraction of rows the term matches.
+    :return: float
+    """
+    if cost <= 0:
+        return 0.0
+    return cost / selectivity if selectivity > 0 else math.inf
+
+
+def evaluate_terms(terms: List[list], rows: np.ndarray,
+                   evaluate: Callable[[Any, np.ndarray], np.ndarray]) -> np.ndarray:
+    """
+    Evaluates terms joined by 'or', each a list of operands joined by 'and', short-circuiting row by row: each operand
+    is only evaluated on the rows matched by the operands before it in its term, and each term only on the rows not
+    matched by the terms before it.
+
+    :param terms: List[list]
+    The terms to evaluate, as returned by split_terms or plan_terms.
+    :param rows: np.ndarray
+    A boolean mask of the rows to evaluate the terms on.
+    :param evaluate: Callable[[Any, np.ndarray], np.ndarray]
+    Evaluates an operand on the rows of a boolean mask, returning a mask that is False outside of them.
+    :return: np.ndarray
+    A boolean mask of the rows matched by the terms, False outside of the given rows.
+    """
+    result = np.zeros(len(rows), dtype=bool)
+    for term in terms:
+        term_rows = rows & ~result
+        for operand in term:
+            if not term_rows.any():
+                break
+            term_rows = evaluate(operand, term_rows)
+        result |= term_rows
+    return result
+
+
+def get_group_signature(df_filters: List[DataFrameFilter]) -> tuple:
+    """
+    Returns a hashable signature of everything that determines which rows a group of DataFrameFilters matches.
+
+    :param df_filters: List[DataFrameFilter]
+    The in-use DataFrameFilters of the group, in query order.
+    :return: tuple
+    """
+    return tuple((df_filter.joiner, df_filter.get_signature()) for df_filter in df_filters)
+
+
+class DataFrameMaskEngine:
+    """
+    This class evaluates DataFrameFilters directly into NumPy boolean masks, bypassing the string parsing done by
+    pandas.DataFrame.query(). Groups of at least contains_group_threshold 'contains' filters on one column joined by
+    'or' are matched in a single pass with a combined regular expression.
+    """
+    contains_group_threshold = 8
+    _next_serial = itertools.count()
+    selectivities = {'==': 0.1,
+                     '!=': 0.9,
+                     '>': 1 / 3,
+                     '<': 1 / 3,
+                     '>=': 1 / 3,
+                     '<=': 1 / 3,
+                     'contains': 0.25,
+                     'startswith': 0.25,
+                     'endswith': 0.25,
+                     'match': 0.25,
+                     'in': 0.25,
+                     'not in': 0.75}
+    comparison_operators = {'==': operator.eq,
+                            '!=': operator.ne,
+                            '>': operator.gt,
+                            '<': operator.lt,
+                            '>=': operator.ge,
+                            '<=': operator.le}
+
+    def __init__(self,
+                 mask_cache: DataFrameCache = None,
+                 keep_group_masks: bool = False,
+                 index_cache: DataFrameCache = None,
+                 sorted_index_columns: List[str] = None,
+                 inverted_index_columns: List[str] = None,
+                 factorized_columns: List[str] = None,
+                 group_workers: int = 1,
+                 optimize: bool = False,
+                 statistics: 'DataFrameStatistics' = None):
+        """
+        Initializes a DataFrameMaskEngine instance.
+
+        :param mask_cache: DataFrameCache (default: None)
+        Cache for the masks of individual DataFrameFilters. Masks are keyed on the version of the DataFrame (see
+        get_frame_version) and the signature of the filter, so call bump_frame_version after mutating a DataFrame in
+        place. No masks are cached if None.
+        :param keep_group_masks: bool (default: False)
+        Whether to keep the mask of each filter group in its DataFrameFilterManager, so that re-filtering after
+        enabling, disabling or removing filters by ID only re-evaluates the groups that changed. Kept masks are keyed
+        on the version of the DataFrame, so call bump_frame_version after mutating a DataFrame in place, and are only
+        reused by the engine that evaluated them.
+        :param index_cache: DataFrameCache (default: None)
+        Cache for column indexes and for the string-converted and upper-cased views of columns used by string
+        operators, which are built on first use and rebuilt when the version of the DataFrame changes. Defaults to a
+        new DataFrameCache.
+        :param sorted_index_columns: List[str] (default: None)
+        Columns to answer '>', '<', '>=' and '<=' filters, and groups of them joined by 'and', for by binary search
+        over a sorted index instead of a full scan. Worthwhile for columns that are range filtered repeatedly, such as
+        the columns behind sliders.
+        :param inverted_index_columns: List[str] (default: None)
+        Columns to answer '==' and '!=' filters, and groups of them forming a membership test, for by looking up row
+        positions in an inverted index instead of a full scan. Worthwhile for columns with few distinct values, such
+        as status or region columns.
+        :param factorized_columns: List[str] (default: None)
+        Columns to evaluate string operators for once per distinct value instead of once per row, using a cached
+        factorization of the column. Worthwhile for text columns with many repeated values, such as host names.
+        Categorical columns are always evaluated once per category.
+        :param group_workers: int (default: 1)
+        The number of threads to evaluate the filter groups of a DataFrameFilterManager on concurrently before
+        combining their masks. Pays off for several groups over large DataFrames, as NumPy, pandas and Arrow kernels
+        release the GIL for much of their work. The thread pool is started on first use and reused until close() is
+        called.
+        :param optimize: bool (default: False)
+        Whether to plan the evaluation of filters and filter groups by their estimated cost and selectivity (see
+        get_filter_cost and estimate_selectivity), remove duplicate filters and groups, and short-circuit row by row:
+        filters joined by 'and' are only evaluated on the rows matched by the filters before them, and terms joined by
+        'or' only on the rows not matched yet. The result is the same, but stacks of expensive string filters get much
+        cheaper. Groups evaluated concurrently by group_workers are not short-circuited against each other.
+        :param statistics: DataFrameStatistics (default: None)
+        Column statistics to estimate the selectivity of filters from when optimizing. The selectivities of their
+        operators are used if None.
+        """
+        if group_workers < 1:
+            raise ValueError(f"Invalid group_workers: {group_workers}")
+        if index_cache is None:
+            index_cache = DataFrameCache()
+        if sorted_index_columns is None:
+            sorted_index_columns = []
+        if inverted_index_columns is None:
+            inverted_index_columns = []
+        if factorized_columns is None:
+            factorized_columns = []
+        self.mask_cache = mask_cache
+        self.keep_group_masks = keep_group_masks
+        self.index_cache = index_cache
+        self.sorted_index_columns = sorted_index_columns
+        self.inverted_index_columns = inverted_index_columns
+        self.factorized_columns = factorized_columns
+        self.group_workers = group_workers
+        self.optimize = optimize
+        self.statistics = statistics
+        self._serial = next(self._next_serial)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"DataFrameMaskEngine(mask_cache={self.mask_cache!r}, keep_group_masks={self.keep_group_masks}, " \
+               f"index_cache={self.index_cache!r}, sorted_index_columns={self.sorted_index_columns}, " \
+               f"inverted_index_columns={self.inverted_index_columns}, factorized_columns={self.factorized_columns}, " \
+               f"group_workers={self.group_workers}, optimize={self.optimize}, statistics={self.statistics!r})"
+
+    def __enter__(self) -> 'DataFrameMaskEngine':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shut down the thread pool evaluating filter groups, if it was started.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        """
+        Get the thread pool evaluating filter groups, starting it if needed.
+
+        :return: ThreadPoolExecutor
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.group_workers,
+                                                    thread_name_prefix='DataFrameMaskEngine')
+            return self._executor
+
+    def get_filter_mask(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter) -> np.ndarray:
+        """
+        Evaluate a single DataFrameFilter into a boolean mask, reusing a cached mask if possible.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filter against.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to evaluate.
+        :return: np.ndarray
+        """
+        return self._get_cached_mask(data_frame, df_filter.get_signature(),
+                                     lambda: self.evaluate_filter(data_frame, df_filter))
+
+    def _get_cached_mask(self, data_frame: pd.DataFrame, signature: Hashable,
+                         evaluate: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Get the mask cached for the given signature and DataFrame version, evaluating and caching it if needed.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the mask belongs to.
+        :param signature: Hashable
+        The signature of what the mask represents.
+        :param evaluate: Callable[[], np.ndarray]
+        Evaluates the mask on a cache miss.
+        :return: np.ndarray
+        """
+        if self.mask_cache is None:
+            return evaluate()
+        key = (get_frame_version(data_frame), signature)
+        mask = self.mask_cache.get(key)
+        if mask is None:
+            mask = self.mask_cache.put(key, evaluate())
+        return mask
+
+    def evaluate_filter(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter) -> np.ndarray:
+        """
+        Evaluate a single DataFrameFilter into a boolean mask without consulting the mask cache.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filter against.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to evaluate.
+        :return: np.ndarray
+        """
+        if df_filter.operator in RANGE_OPERATORS and df_filter.column in self.sorted_index_columns:
+            try:
+                return self.evaluate_range(data_frame, [df_filter])
+            except TypeError:
+                pass
+        if df_filter.operator in ('==', '!=') and df_filter.column in self.inverted_index_columns and \
+                not (pd.api.types.is_scalar(df_filter.value) and pd.isna(df_filter.value)):
+            try:
+                return self.get_inverted_index(data_frame, df_filter.column).get_mask([df_filter.value],
+                                                                                      df_filter.operator == '!=')
+            except TypeError:
+                pass
+        if DataFrameFilter.is_valid_str_operator(df_filter.operator):
+            return self.evaluate_str_filter(data_frame, df_filter)
+        if DataFrameFilter.is_valid_membership_operator(df_filter.operator):
+            return self.evaluate_values(data_frame, *DataFrameFilterManager.get_membership_test([df_filter]))
+        return self.evaluate_comparison(data_frame[df_filter.column], df_filter)
+
+    def evaluate_comparison(self, series: pd.Series, df_filter: DataFrameFilter) -> np.ndarray:
+        """
+        Evaluate a DataFrameFilter with a comparison operator into a boolean mask, matching missing values the same
+        way DataFrame.query does.
+
+        :param series: pd.Series
+        The values of the column of the filter to compare.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter with a comparison operator.
+        :return: np.ndarray
+        """
+        result = self.comparison_operators[df_filter.operator](series, df_filter.value)
+        return to_bool_array(result, df_filter.operator == '!=' and not excludes_missing_when_unequal(series.dtype))
+
+    def evaluate_values(self, data_frame: pd.DataFrame, column: str, values: list | np.ndarray,
+                        negated: bool) -> np.ndarray:
+        """
+        Evaluate a membership test into a boolean mask, with lookups if the values can be looked up in the column
+        (see evaluate_membership) and otherwise by comparing the column with each value.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the membership test against.
+        :param column: str
+        The column to test.
+        :param values: list | np.ndarray
+        The values to test for. Must not contain missing values.
+        :param negated: bool
+        Whether to test for rows not matching any of the values.
+        :return: np.ndarray
+        """
+        try:
+            return self.evaluate_membership(data_frame, column, values, negated)
+        except TypeError:
+            pass
+        series = data_frame[column]
+        mask = np.full(len(series), negated)
+        keep_missing = negated and not excludes_missing_when_unequal(series.dtype)
+        for value in values:
+            if negated:
+                mask &= to_bool_array(series != value, keep_missing)
+            else:
+                mask |= to_bool_array(series == value)
+        return mask
+
+    def evaluate_str_filter(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter,
+                            positions: np.ndarray = None) -> np.ndarray:
+        """
+        Evaluate a DataFrameFilter with a string operator into a boolean mask, once per distinct value if the column
+        is factorized and otherwise against the cached string views of the column.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filter against.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter with a string operator.
+        :param positions: np.ndarray (default: None)
+        The positions of the rows to evaluate the filter on. Defaults to all rows.
+        :return: np.ndarray
+        The mask of the rows at the given positions.
+        """
+        factorized_column = self.get_factorized_column(data_frame, df_filter.column)
+        if factorized_column is not None:
+            mask = factorized_column.get_mask(lambda values: apply_str_operator(values, df_filter))
+            return mask if positions is None else mask[positions]
+        if df_filter.has_string_dtype():
+            series = data_frame[df_filter.column]
+            return apply_str_operator(series if positions is None else series.iloc[positions], df_filter)
+        if is_case_folded_contains(df_filter):
+            upper_view = self.get_str_view(data_frame, df_filter.column, upper=True, positions=positions)
+            return to_bool_array(upper_view.str.contains(df_filter.value.upper(), regex=False))
+        return apply_str_operator(self.get_str_view(data_frame, df_filter.column, positions=positions), df_filter,
+                                  converted=True)
+
+    def evaluate_contains_group(self, data_frame: pd.DataFrame, df_filters: List[DataFrameFilter],
+                                positions: np.ndarray = None) -> np.ndarray:
+        """
+        Evaluate a group of 'contains' DataFrameFilters on a single column joined by 'or' by matching a combined
+        regular expression in a single pass instead of one pass per filter.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param df_filters: List[DataFrameFilter]
+        The in-use DataFrameFilters of a group for which is_contains_group is True.
+        :param positions: np.ndarray (default: None)
+        The positions of the rows to evaluate the filters on. Defaults to all rows.
+        :return: np.ndarray
+        The mask of the rows at the given positions.
+        :raises TypeError: if the filters cannot be combined.
+        """
+        column = df_filters[0].column
+        has_string_dtype = df_filters[0].has_string_dtype()
+        if has_string_dtype and data_frame[column].dtype.storage != 'python':
+            # Other storages match with a different regular expression engine and case folding
+            raise TypeError(f"Cannot combine filters on column {column!r} with {data_frame[column].dtype} storage")
+        regexes = get_contains_regexes(df_filters)
+        factorized_column = self.get_factorized_column(data_frame, column)
+        if factorized_column is not None:
+            mask = factorized_column.get_mask(
+                lambda values: apply_contains_regexes(values if has_string_dtype else values.astype('str'), regexes))
+            return mask if positions is None else mask[positions]
+        if has_string_dtype:
+            series = data_frame[column]
+            return apply_contains_regexes(series if positions is None else series.iloc[positions], regexes)
+        upper_series = None
+        if any(upper for _, upper, _ in regexes):
+            upper_series = self.get_str_view(data_frame, column, upper=True, positions=positions)
+        return apply_contains_regexes(self.get_str_view(data_frame, column, positions=positions), regexes,
+                                      upper_series)
+
+    def get_str_view(self, data_frame: pd.DataFrame, column: str, upper: bool = False,
+                     positions: np.ndarray = None) -> pd.Series:
+        """
+        Get a column converted with astype('str'), or additionally upper-cased, converting it if it is not cached
+        for the current version of the DataFrame.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame holding the column.
+        :param column: str
+        The column to get the string view of.
+        :param upper: bool (default: False)
+        Whether to get the upper-cased view.
+        :param positions: np.ndarray (default: None)
+        The positions of the rows to get the view of. Defaults to all rows. Views of some rows are taken from the
+        cached view of the column if there is one, and otherwise converted without being cached.
+        :return: pd.Series
+        """
+        key = (get_frame_version(data_frame), 'upper_view' if upper else 'str_view', column)
+        view = self.index_cache.get(key)
+        if positions is not None:
+            if view is not None:
+                return view.iloc[positions]
+            if upper:
+                return self.get_str_view(data_frame, column, positions=positions).str.upper()
+            return data_frame[column].iloc[positions].astype('str')
+        if view is None:
+            if upper:
+                view = self.get_str_view(data_frame, column).str.upper()
+            else:
+                view = data_frame[column].astype('str')
+            view = self.index_cache.put(key, view, nbytes=estimate_nbytes(view))
+        return view
+
+    def get_sorted_index(self, data_frame: pd.DataFrame, column: str) -> SortedColumnIndex:
+        """
+        Get the sorted index of a column, building it if it is not cached for the current version of the DataFrame.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame holding the column.
+        :param column: str
+        The column to get the sorted index of.
+        :return: SortedColumnIndex
+        :raises TypeError: if the column cannot be indexed.
+        """
+        key = (get_frame_version(data_frame), 'sorted_index', column)
+        sorted_index = self.index_cache.get(key)
+        if sorted_index is None:
+            sorted_index = self.index_cache.put(key, SortedColumnIndex(data_frame[column]))
+        return sorted_index
+
+    def get_inverted_index(self, data_frame: pd.DataFrame, column: str) -> InvertedColumnIndex:
+        """
+        Get the inverted index of a column, building it if it is not cached for the current version of the DataFrame.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame holding the column.
+        :param column: str
+        The column to get the inverted index of.
+        :return: InvertedColumnIndex
+        """
+        key = (get_frame_version(data_frame), 'inverted_index', column)
+        inverted_index = self.index_cache.get(key)
+        if inverted_index is None:
+            inverted_index = self.index_cache.put(key, InvertedColumnIndex(data_frame[column]))
+        return inverted_index
+
+    def get_factorized_column(self, data_frame: pd.DataFrame, column: str) -> FactorizedColumn | None:
+        """
+        Get the factorization of a categorical column or of one of the factorized columns, factorizing it if it is
+        not cached for the current version of the DataFrame.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame holding the column.
+        :param column: str
+        The column to get the factorization of.
+        :return: FactorizedColumn | None
+        The factorization, or None if the column is not to be or cannot be factorized.
+        """
+        series = data_frame[column]
+        if column not in self.factorized_columns and not isinstance(series.dtype, pd.CategoricalDtype):
+            return None
+        key = (get_frame_version(data_frame), 'factorized', column)
+        factorized_column = self.index_cache.get(key)
+        if factorized_column is None:
+            if FactorizedColumn.is_factorizable(series):
+                factorized_column = self.index_cache.put(key, FactorizedColumn(series))
+            else:
+                # Remember that the column cannot be factorized to avoid checking it again
+                factorized_column = self.index_cache.put(key, False, nbytes=0)
+        return factorized_column or None
+
+    def evaluate_range(self, data_frame: pd.DataFrame, df_filters: List[DataFrameFilter]) -> np.ndarray:
+        """
+        Evaluate range DataFrameFilters on a single column joined by 'and' using the sorted index of the column.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param df_filters: List[DataFrameFilter]
+        DataFrameFilters comparing a single column with '>', '<', '>=' or '<='.
+        :return: np.ndarray
+        :raises TypeError: if the column cannot be indexed or a value cannot be compared with it.
+        """
+        column = df_filters[0].column
+        if not SortedColumnIndex.is_indexable(data_frame[column]):
+            raise TypeError(f"Cannot build a sorted index over column {column!r}")
+        return self.get_sorted_index(data_frame, column).get_filters_mask(df_filters)
+
+    def evaluate_membership(self, data_frame: pd.DataFrame, column: str, values: list | np.ndarray,
+                            negated: bool) -> np.ndarray:
+        """
+        Evaluate a membership test into a boolean mask with a single hashed lookup per row, or with lookups in the
+        inverted index of the column if it has one. The result is the same as
+        comparing the column against every value with '==' joined by 'or', or with '!=' joined by 'and' if negated.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the membership test against.
+        :param column: str
+        The column to test.
+        :param values: list | np.ndarray
+        The values to test for. Must not contain missing values.
+        :param negated: bool
+        Whether to test for rows not matching any of the values.
+        :return: np.ndarray
+        :raises TypeError: if the values cannot be looked up in the column the same way they would be compared.
+        """
+        if column in self.inverted_index_columns:
+            return self.get_inverted_index(data_frame, column).get_mask(values, negated)
+        series = data_frame[column]
+        check_lookup_values(series.dtype, values)
+        mask = to_bool_array(series.isin(values))
+        if not negated:
+            return mask
+        mask = ~mask
+        if len(values) and excludes_missing_when_unequal(series.dtype):
+            mask &= series.notna().to_numpy()
+        return mask
+
+    def get_filter_cost(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter) -> float:
+        """
+        Estimate the relative cost per row of evaluating a DataFrameFilter. Cached masks cost nothing, comparisons of
+        fixed-width or categorical columns and indexed lookups are cheapest, string operators evaluated once per
+        distinct value come next, comparisons of other columns after them, and string operators on text columns are
+        most expensive, regular expressions above all.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the filter is evaluated against.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to estimate the cost of.
+        :return: float
+        """
+        if self.mask_cache is not None and \
+                (get_frame_version(data_frame), df_filter.get_signature()) in self.mask_cache:
+            return 0.0
+        dtype = data_frame[df_filter.column].dtype
+        if DataFrameFilter.is_valid_str_operator(df_filter.operator):
+            if df_filter.column in self.factorized_columns or isinstance(dtype, pd.CategoricalDtype):
+                return 2.0
+            return 16.0 if df_filter.operator == 'match' or df_filter.regex else 8.0
+        if df_filter.column in self.sorted_index_columns or df_filter.column in self.inverted_index_columns or \
+                isinstance(dtype, pd.CategoricalDtype) or (isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM'):
+            return 1.0
+        return 4.0
+
+    def estimate_selectivity(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter) -> float:
+        """
+        Estimate the fraction of the rows of a DataFrame a DataFrameFilter matches, from the column statistics if the
+        engine has them and otherwise from the selectivities of its operator.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the filter is evaluated against.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to estimate the selectivity of.
+        :return: float
+        """
+        if self.statistics is not None:
+            return self.statistics.estimate_selectivity(data_frame, df_filter)
+        return self.selectivities.get(df_filter.operator, 0.5)
+
+    def estimate_filter(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter) -> Tuple[float, float]:
+        """
+        Estimate the cost per row of evaluating a DataFrameFilter and the fraction of rows it matches.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the filter is evaluated against.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to estimate.
+        :return: Tuple[float, float]
+        """
+        return self.get_filter_cost(data_frame, df_filter), self.estimate_selectivity(data_frame, df_filter)
+
+    def plan_group(self, data_frame: pd.DataFrame,
+                   df_filters: List[DataFrameFilter]) -> Tuple[List[List[DataFrameFilter]], float, float]:
+        """
+        Plan the short-circuited evaluation of a group of DataFrameFilters sharing a filter ID (see plan_terms).
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the filters are evaluated against.
+        :param df_filters: List[DataFrameFilter]
+        The in-use DataFrameFilters of the group, in query order.
+        :return: Tuple[List[List[DataFrameFilter]], float, float]
+        The planned terms, and the estimated cost per row and fraction of rows matched of the group.
+        """
+        terms = split_terms(df_filters, [df_filter.joiner for df_filter in df_filters[1:]])
+        return plan_terms(terms, DataFrameFilter.get_signature, lambda df_filter: self.estimate_filter(data_frame,
+                                                                                                       df_filter))
+
+    def evaluate_filter_rows(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter,
+                             positions: np.ndarray) -> np.ndarray:
+        """
+        Evaluate a single DataFrameFilter on the rows at the given positions only, without consulting the mask cache.
+        Filters answered by an index and filters with the operator 'in' or 'not in' are evaluated on all rows.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filter against.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to evaluate.
+        :param positions: np.ndarray
+        The positions of the rows to evaluate the filter on.
+        :return: np.ndarray
+        The mask of the rows at the given positions.
+        """
+        if DataFrameFilter.is_valid_str_operator(df_filter.operator):
+            return self.evaluate_str_filter(data_frame, df_filter, positions)
+        if df_filter.column in self.sorted_index_columns or df_filter.column in self.inverted_index_columns or \
+                DataFrameFilter.is_valid_membership_operator(df_filter.operator):
+            return self.evaluate_filter(data_frame, df_filter)[positions]
+        return self.evaluate_comparison(data_frame[df_filter.column].iloc[positions], df_filter)
+
+    def get_filter_mask_on_rows(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter,
+                                rows: np.ndarray) -> np.ndarray:
+        """
+        Evaluate a single DataFrameFilter on the rows of a boolean mask. Filters that are cheap or cached and filters
+        evaluated on all rows go through get_filter_mask, so that their masks can be cached; others are only evaluated
+        on the given rows.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filter against.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to evaluate.
+        :param rows: np.ndarray
+        A boolean mask of the rows to evaluate the filter on.
+        :return: np.ndarray
+        A boolean mask of the rows matched by the filter, False outside of the given rows.
+        """
+        positions = np.flatnonzero(rows)
+        if len(positions) == len(rows) or self.get_filter_cost(data_frame, df_filter) <= 1:
+            return self.get_filter_mask(data_frame, df_filter) & rows
+        mask = np.zeros(len(rows), dtype=bool)
+        mask[positions] = self.evaluate_filter_rows(data_frame, df_filter, positions)
+        return mask
+
+    def get_group_mask(self, data_frame: pd.DataFrame, df_filters: List[DataFrameFilter],
+                       rows: np.ndarray = None) -> np.ndarray:
+        """
+        Evaluate a group of DataFrameFilters sharing a filter ID into a boolean mask.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param df_filters: List[DataFrameFilter]
+        The in-use DataFrameFilters of the group, in query order.
+        :param rows: np.ndarray (default: None)
+        A boolean mask of the rows to evaluate the group on, outside of which the returned mask is False. Defaults to
+        all rows.
+        :return: np.ndarray
+        """
+        restricted = rows is not None and not rows.all()
+        membership_test = DataFrameFilterManager.get_membership_test(df_filters)
+        if membership_test is not None:
+            try:
+                mask = self._get_cached_mask(data_frame, ('in', get_group_signature(df_filters)),
+                                             lambda: self.evaluate_membership(data_frame, *membership_test))
+                return mask & rows if restricted else mask
+            except TypeError:
+                # The values cannot be hashed or compared with the column, evaluate the filters one by one instead
+                pass
+        if len(df_filters) > 1 and df_filters[0].column in self.sorted_index_columns and is_range_group(df_filters):
+            try:
+                mask = self._get_cached_mask(data_frame, ('range', get_group_signature(df_filters)),
+                                             lambda: self.evaluate_range(data_frame, df_filters))
+                return mask & rows if restricted else mask
+            except TypeError:
+                pass
+        if len(df_filters) >= self.contains_group_threshold and is_contains_group(df_filters):
+            try:
+                if not restricted:
+                    return self._get_cached_mask(data_frame, ('contains', get_group_signature(df_filters)),
+                                                 lambda: self.evaluate_contains_group(data_frame, df_filters))
+                positions = np.flatnonzero(rows)
+                mask = np.zeros(len(rows), dtype=bool)
+                mask[positions] = self.evaluate_contains_group(data_frame, df_filters, positions)
+                return mask
+            except TypeError:
+                pass
+        if self.optimize:
+            terms, _, _ = self.plan_group(data_frame, df_filters)
+            if rows is None:
+                rows = np.ones(len(data_frame), dtype=bool)
+            return evaluate_terms(terms, rows, lambda df_filter, term_rows:
+                                  self.get_filter_mask_on_rows(data_frame, df_filter, term_rows))
+        masks = [self.get_filter_mask(data_frame, df_filter) for df_filter in df_filters]
+        mask = combine_masks(masks, [df_filter.joiner for df_filter in df_filters[1:]])
+        return mask & rows if restricted else mask
+
+    def get_mask(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager) -> np.ndarray | None:
+        """
+        Evaluate all in-use DataFrameFilters of a DataFrameFilterManager into a boolean mask.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: np.ndarray | None
+        The combined mask, or None if no filters are in use.
+        """
+        groups = df_filter_manager.get_filter_groups()
+        if not groups:
+            return None
+        if self.optimize:
+            masks, keys = self.get_kept_group_masks(data_frame, df_filter_manager, groups)
+            if self.group_workers == 1 or sum(mask is None for mask in masks) <= 1:
+                return self.get_optimized_mask(data_frame, df_filter_manager, groups, masks, keys)
+        masks = self.get_group_masks(data_frame, df_filter_manager, groups)
+        return combine_masks(masks, [group[0].group_joiner for group in groups[1:]])
+
+    def get_kept_group_masks(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager,
+                             groups: List[List[DataFrameFilter]]) -> Tuple[List[np.ndarray | None],
+                                                                           List[Hashable] | None]:
+        """
+        Get the masks kept in a DataFrameFilterManager for its filter groups (see keep_group_masks).
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the masks must have been evaluated against.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :param groups: List[List[DataFrameFilter]]
+        The groups of in-use DataFrameFilters, in query order.
+        :return: Tuple[List[np.ndarray | None], List[Hashable] | None]
+        The kept mask of each group or None, and the key to keep the mask of each group under, or None if group masks
+        are not kept.
+        """
+        if not self.keep_group_masks:
+            return [None] * len(groups), None
+        frame_version = get_frame_version(data_frame)
+        keys = [self.get_group_mask_key(frame_version, get_group_signature(group)) for group in groups]
+        return [df_filter_manager.get_group_mask(group[0].filter_id, key) for group, key in zip(groups, keys)], keys
+
+    def get_group_mask_key(self, frame_version: FrameVersion, signature: tuple) -> Hashable:
+        """
+        Get the key to keep the mask of a filter group in its DataFrameFilterManager under (see keep_group_masks).
+
+        :param frame_version: FrameVersion
+        The version of the DataFrame the mask is evaluated against (see get_frame_version).
+        :param signature: tuple
+        The signature of the filter group (see get_group_signature).
+        :return: Hashable
+        The key, which is only equal for the same engine, DataFrame version and group signature.
+        """
+        return self._serial, frame_version, signature
+
+    def get_group_masks(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager,
+                        groups: List[List[DataFrameFilter]] = None) -> List[np.ndarray]:
+        """
+        Evaluate each group of in-use DataFrameFilters of a DataFrameFilterManager into a boolean mask over all rows,
+        reusing the masks kept in the manager and evaluating the other groups concurrently if there are several group
+        workers.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :param groups: List[List[DataFrameFilter]] (default: None)
+        The groups of in-use DataFrameFilters of the manager, if already known.
+        :return: List[np.ndarray]
+        The mask of each group, in query order.
+        """
+        if groups is None:
+            groups = df_filter_manager.get_filter_groups()
+        masks, keys = self.get_kept_group_masks(data_frame, df_filter_manager, groups)
+        pending = [i for i, mask in enumerate(masks) if mask is None]
+        if self.group_workers > 1 and len(pending) > 1:
+            evaluated = self.get_executor().map(lambda i: self.get_group_mask(data_frame, groups[i]), pending)
+        else:
+            evaluated = (self.get_group_mask(data_frame, groups[i]) for i in pending)
+        for i, mask in zip(pending, evaluated):
+            masks[i] = mask
+            if keys is not None:
+                df_filter_manager.set_group_mask(groups[i][0].filter_id, keys[i], mask)
+        return masks
+
+    def get_optimized_mask(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager,
+                           groups: List[List[DataFrameFilter]], masks: List[np.ndarray | None],
+                           keys: List[Hashable] = None) -> np.ndarray:
+        """
+        Evaluate filter groups into a boolean mask, planning and short-circuiting their evaluation (see optimize).
+        Groups evaluated on all rows are kept in the DataFrameFilterManager if keys are given, groups only evaluated on
+        some rows are not.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :param groups: List[List[DataFrameFilter]]
+        The groups of in-use DataFrameFilters, in query order.
+        :param masks: List[np.ndarray | None]
+        The kept mask of each group, or None for groups to evaluate.
+        :param keys: List[Hashable] (default: None)
+        The keys to keep the mask of each group under, or None to not keep them.
+        :return: np.ndarray
+        """
+        def estimate(i: int) -> Tuple[float, float]:
+            _, cost, selectivity = self.plan_group(data_frame, groups[i])
+            return (0.0 if masks[i] is not None else cost), selectivity
+
+        def evaluate(i: int, rows: np.ndarray) -> np.ndarray:
+            if masks[i] is None and rows.all():
+                masks[i] = self.get_group_mask(data_frame, groups[i])
+                if keys is not None:
+                    df_filter_manager.set_group_mask(groups[i][0].filter_id, keys[i], masks[i])
+            if masks[i] is not None:
+                return masks[i] & rows
+            return self.get_group_mask(data_frame, groups[i], rows)
+
+        terms = split_terms(list(range(len(groups))), [group[0].group_joiner for group in groups[1:]])
+        terms, _, _ = plan_terms(terms, lambda i: get_group_signature(groups[i]), estimate)
+        return evaluate_terms(terms, np.ones(len(data_frame), dtype=bool), evaluate)
+
+    def get_facet_counts(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager,
+                         columns: List[str]) -> Dict[str, pd.Series]:
+        """
+        Count the rows per value of each of the given columns under all in-use DataFrameFilters of a
+        DataFrameFilterManager except the filter groups referring to that column, i.e. how many rows each option of a
+        filter control would leave given the other filters. The mask of each group is evaluated once, and the mask of
+        each distinct set of remaining groups is combined once.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to count the rows of.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :param columns: List[str]
+        The columns to count the rows per value of.
+        :return: Dict[str, pd.Series]
+        The counts of each column, see count_values.
+        """
+        groups = df_filter_manager.get_filter_groups()
+        masks = self.get_group_masks(data_frame, df_filter_manager, groups) if groups else []
+        remaining_masks = {}
+        facet_counts = {}
+        for column in columns:
+            remaining = tuple(i for i, group in enumerate(groups)
+                              if all(df_filter.column != column for df_filter in group))
+            if remaining not in remaining_masks:
+                remaining_masks[remaining] = None if not remaining else combine_masks(
+                    [masks[i] for i in remaining], [groups[i][0].group_joiner for i in remaining[1:]])
+            facet_counts[column] = self.count_values(data_frame, column, remaining_masks[remaining])
+        return facet_counts
+
+    def count_values(self, data_frame: pd.DataFrame, column: str, mask: np.ndarray = None) -> pd.Series:
+        """
+        Count the rows of a DataFrame per value of a column with a single pass over the codes of a factorization of the
+        column, which is cached for the current version of the DataFrame.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to count the rows of.
+        :param column: str
+        The column to count the rows per value of.
+        :param mask: np.ndarray (default: None)
+        A boolean mask of the rows to count. Defaults to all rows.
+        :return: pd.Series
+        The number of rows per value, sorted by value if the values can be sorted, or per category for categorical
+        columns. Values of the column without rows in the mask are counted as 0, and missing values are counted under
+        a missing label if the column has any.
+        """
+        key = (get_frame_version(data_frame), 'value_codes', column)
+        factorization = self.index_cache.get(key)
+        if factorization is None:
+            series = data_frame[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Categories without rows are counted too, in the order of the categories
+                codes, labels = series.cat.codes.to_numpy(), pd.Index(series.cat.categories)
+            else:
+                try:
+                    codes, uniques = pd.factorize(series, sort=True)
+                except TypeError:
+                    # Values of mixed types cannot be sorted
+                    codes, uniques = pd.factorize(series)
+                labels = pd.Index(uniques)
+            if (codes < 0).any():
+                codes = np.where(codes < 0, len(labels), codes)
+                labels = labels.insert(len(labels), np.nan)
+            factorization = self.index_cache.put(key, (codes, labels),
+                                                 nbytes=codes.nbytes + labels.memory_usage(deep=True))
+        codes, labels = factorization
+        counts = np.bincount(codes if mask is None else codes[mask], minlength=len(labels))
+        return pd.Series(counts, index=labels, name=column)
+
+    def filter_df(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager) -> pd.DataFrame:
+        """
+        Filter a DataFrame using the in-use DataFrameFilters of a DataFrameFilterManager.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to filter.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: pd.DataFrame
+        The filtered DataFrame.
+        """
+        mask = self.get_mask(data_frame, df_filter_manager)
+        return data_frame if mask is None else data_frame.loc[mask]
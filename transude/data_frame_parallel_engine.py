@@ -0,0 +1,229 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import List, Tuple
+from .data_frame_filter_manager import DataFrameFilterManager
+from .data_frame_mask_engine import DataFrameMaskEngine, to_bool_array
+
+ColumnSpec = Tuple[str, str, object]
+
+
+def is_shareable(series: pd.Series) -> bool:
+    """
+    Returns whether the values of a Series can be placed in shared memory as a fixed-width NumPy array.
+
+    :param series: pd.Series
+    The Series to check.
+    :return: bool
+    """
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM'
+
+
+def evaluate_partition(column_specs: List[ColumnSpec], size: int, start: int, stop: int, mask_name: str,
+                       engine: str, payload: str | DataFrameFilterManager) -> None:
+    """
+    Evaluates the filters of a DataFrameFilterManager against a row partition of a DataFrame in a worker process and
+    writes the mask of the partition into shared memory.
+
+    :param column_specs: List[Tuple[str, str, object]]
+    The columns the filters refer to, as (column, 'shared', (shared memory name, dtype)) for columns placed in shared
+    memory, or (column, 'values', values of the partition) for columns passed by value.
+    :param size: int
+    The number of rows of the whole DataFrame.
+    :param start: int
+    The first row of the partition.
+    :param stop: int
+    The row after the last row of the partition.
+    :param mask_name: str
+    The name of the shared memory holding the mask of the whole DataFrame.
+    :param engine: str
+    Either 'query' or 'mask'.
+    :param payload: str | DataFrameFilterManager
+    The query to evaluate for the 'query' engine, or the DataFrameFilterManager for the 'mask' engine.
+    """
+    blocks = []
+    try:
+        columns = {}
+        for column, kind, spec in column_specs:
+            if kind == 'shared':
+                name, dtype = spec
+                blocks.append(shared_memory.SharedMemory(name=name))
+                columns[column] = np.ndarray(size, dtype=dtype, buffer=blocks[-1].buf)[start:stop]
+            else:
+                columns[column] = spec
+        partition = pd.DataFrame(columns, copy=False)
+        if engine == 'query':
+            # DataFrame.query() selects with the evaluated mask, which treats missing values as False
+            mask = to_bool_array(partition.eval(payload))
+        else:
+            mask = DataFrameMaskEngine(keep_group_masks=False).get_mask(partition, payload)
+        blocks.append(shared_memory.SharedMemory(name=mask_name))
+        np.ndarray(size, dtype=bool, buffer=blocks[-1].buf)[start:stop] = mask
+        # Views of the shared memory must be released before it can be closed
+        del columns, partition, mask
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class DataFrameParallelEngine:
+    """
+    This class filters large DataFrames on several cores by evaluating the filters of a DataFrameFilterManager against
+    row partitions in a pool of worker processes. Fixed-width columns are placed in shared memory once rather than
+    pickled for every partition, and each worker writes the mask of its partition into a shared mask, so the result is
+    identical to filtering the whole DataFrame with the serial engine.
+    """
+
+    def __init__(self, workers: int = None, min_rows: int = 1_000_000, engine: str = 'query'):
+        """
+        Initializes a DataFrameParallelEngine instance. The pool of worker processes is started on first use and
+        reused until close() is called.
+
+        :param workers: int (default: None)
+        The number of worker processes and row partitions. Defaults to the number of CPUs.
+        :param min_rows: int (default: 1_000_000)
+        DataFrames with fewer rows are filtered serially, as starting and feeding worker processes costs more than it
+        saves for them.
+        :param engine: str (default: 'query')
+        The engine evaluating each partition, either 'query' or 'mask'.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError(f"Invalid workers: {workers}")
+        if engine not in ('query', 'mask'):
+            raise ValueError(f"Invalid engine: {engine}")
+        self.workers = workers
+        self.min_rows = min_rows
+        self.engine = engine
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"DataFrameParallelEngine(workers={self.workers}, min_rows={self.min_rows}, engine='{self.engine}')"
+
+    def __enter__(self) -> 'DataFrameParallelEngine':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shut down the pool of worker processes.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """
+        Get the pool of worker processes, starting it if needed.
+
+        :return: ProcessPoolExecutor
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def filter_serially(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager) -> pd.DataFrame:
+        """
+        Filter a DataFrame in the current process with the engine used for partitions.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to filter.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: pd.DataFrame
+        """
+        if self.engine == 'mask':
+            return DataFrameMaskEngine(keep_group_masks=False).filter_df(data_frame, df_filter_manager)
+        query = df_filter_manager.build_query()
+        return data_frame if not query else data_frame.query(query)
+
+    def get_payload(self, df_filter_manager: DataFrameFilterManager) -> str | DataFrameFilterManager:
+        """
+        Get what the workers need to evaluate the filters: the query for the 'query' engine, or for the 'mask' engine
+        a DataFrameFilterManager holding the same filters without the masks kept for them. Filters are pickled with
+        the dtypes of their columns rather than their DataFrames.
+
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: str | DataFrameFilterManager
+        """
+        if self.engine == 'query':
+            return df_filter_manager.build_query()
+        return DataFrameFilterManager(df_filter_manager.data_frame_filters)
+
+    def get_mask(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager) -> np.ndarray | None:
+        """
+        Evaluate all in-use DataFrameFilters of a DataFrameFilterManager into a boolean mask, one row partition per
+        worker process.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to evaluate the filters against.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: np.ndarray | None
+        The combined mask, or None if no filters are in use.
+        """
+        groups = df_filter_manager.get_filter_groups()
+        if not groups:
+            return None
+        size = len(data_frame)
+        columns = list(dict.fromkeys(df_filter.column for group in groups for df_filter in group))
+        payload = self.get_payload(df_filter_manager)
+        bounds = np.linspace(0, size, min(self.workers, max(size, 1)) + 1, dtype=np.int64).tolist()
+        blocks = []
+        try:
+            shared_columns = []
+            for column in columns:
+                series = data_frame[column]
+                if is_shareable(series):
+                    blocks.append(shared_memory.SharedMemory(create=True, size=max(series.dtype.itemsize * size, 1)))
+                    np.copyto(np.ndarray(size, dtype=series.dtype, buffer=blocks[-1].buf), series.to_numpy())
+                    shared_columns.append((column, 'shared', (blocks[-1].name, series.dtype)))
+                else:
+                    shared_columns.append((column, 'values', None))
+            blocks.append(shared_memory.SharedMemory(create=True, size=max(size, 1)))
+            mask_name = blocks[-1].name
+            executor = self.get_executor()
+            futures = []
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                # Columns that cannot be shared are passed by value, one partition each
+                column_specs = [(column, kind, spec if kind == 'shared' else
+                                 data_frame[column].iloc[start:stop].reset_index(drop=True))
+                                for column, kind, spec in shared_columns]
+                futures.append(executor.submit(evaluate_partition, column_specs, size, start, stop, mask_name,
+                                               self.engine, payload))
+            # Wait for every partition before the shared memory is released, even if one of them failed
+            wait(futures)
+            for future in futures:
+                future.result()
+            return np.ndarray(size, dtype=bool, buffer=blocks[-1].buf).copy()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def filter_df(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager) -> pd.DataFrame:
+        """
+        Filter a DataFrame using the in-use DataFrameFilters of a DataFrameFilterManager, in parallel if it has at
+        least min_rows rows and more than one worker is configured.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame to filter.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: pd.DataFrame
+        The filtered DataFrame.
+        """
+        if len(data_frame) < self.min_rows or self.workers == 1:
+            return self.filter_serially(data_frame, df_filter_manager)
+        mask = self.get_mask(data_frame, df_filter_manager)
+        return data_frame if mask is None else data_frame.loc[mask]
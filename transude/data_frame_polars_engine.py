@@ -0,0 +1,161 @@
+import datetime
+import pandas as pd
+from typing import Any, List
+from .data_frame_filter import DataFrameFilter, to_value_list
+from .data_frame_filter_manager import DataFrameFilterManager
+from .data_frame_mask_engine import DataFrameMaskEngine, combine_masks
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+
+def is_polars_frame(data_frame: Any) -> bool:
+    """
+    Returns whether the given object is a Polars DataFrame or LazyFrame.
+
+    :param data_frame: Any
+    The object to check.
+    :return: bool
+    """
+    return pl is not None and isinstance(data_frame, (pl.DataFrame, pl.LazyFrame))
+
+
+def convert_value(value: Any, dtype: Any) -> Any:
+    """
+    Converts the value of a DataFrameFilter to a Python value Polars can compare with a column of the given dtype.
+    Values built without a DataFrame are strings, so strings are parsed into numbers, booleans, dates and datetimes,
+    like DataFrameFilterFactory does for pandas DataFrames.
+
+    :param value: Any
+    The value to convert.
+    :param dtype: pl.DataType | None
+    The dtype of the column, or None if unknown.
+    :return: Any
+    """
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if not isinstance(value, str) or dtype is None:
+        return value
+    if dtype.is_integer():
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+    if dtype.is_float():
+        return float(value)
+    if dtype == pl.Boolean and value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    if dtype == pl.Date:
+        return datetime.date.fromisoformat(value)
+    if isinstance(dtype, pl.Datetime) and dtype.time_zone is None:
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+class DataFramePolarsEngine:
+    """
+    This class compiles DataFrameFilters into native Polars expressions, so that Polars DataFrames are filtered with
+    Polars' multi-threaded execution and filters on LazyFrames are pushed down into their scans. Missing values never
+    match a filter, as with the nullable dtypes of pandas.
+    """
+    comparison_operators = DataFrameMaskEngine.comparison_operators
+
+    def __init__(self):
+        """
+        Initializes a DataFramePolarsEngine instance.
+
+        :raises ImportError: if Polars is not installed.
+        """
+        if pl is None:
+            raise ImportError("DataFramePolarsEngine requires polars to be installed")
+
+    def __repr__(self) -> str:
+        return "DataFramePolarsEngine()"
+
+    def get_filter_expression(self, df_filter: DataFrameFilter, schema: dict = None) -> 'pl.Expr':
+        """
+        Compile a single DataFrameFilter into a Polars expression.
+
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to compile.
+        :param schema: dict (default: None)
+        The schema of the frame to filter, used to convert string values to the dtypes of their columns.
+        :return: pl.Expr
+        """
+        if DataFrameFilter.is_valid_membership_operator(df_filter.operator):
+            return self.get_group_expression([df_filter], schema)
+        column = pl.col(df_filter.column)
+        if DataFrameFilter.is_valid_str_operator(df_filter.operator):
+            strings = column.cast(pl.String)
+            value = df_filter.value
+            if df_filter.operator == 'startswith':
+                return strings.str.starts_with(value)
+            if df_filter.operator == 'endswith':
+                return strings.str.ends_with(value)
+            if df_filter.operator == 'match':
+                return strings.str.contains(f"^(?:{value})")
+            if not df_filter.regex:
+                if df_filter.match_case:
+                    return strings.str.contains(value, literal=True)
+                value = pl.escape_regex(value)
+            return strings.str.contains(value if df_filter.match_case else f"(?i){value}")
+        dtype = schema.get(df_filter.column) if schema is not None else None
+        return self.comparison_operators[df_filter.operator](column,
+                                                             pl.lit(convert_value(df_filter.value, dtype)))
+
+    def get_group_expression(self, df_filters: List[DataFrameFilter], schema: dict = None) -> 'pl.Expr':
+        """
+        Compile a group of DataFrameFilters sharing a filter ID into a Polars expression.
+
+        :param df_filters: List[DataFrameFilter]
+        The in-use DataFrameFilters of the group, in query order.
+        :param schema: dict (default: None)
+        The schema of the frame to filter.
+        :return: pl.Expr
+        """
+        membership_test = DataFrameFilterManager.get_membership_test(df_filters)
+        if membership_test is not None:
+            column, values, negated = membership_test
+            dtype = schema.get(column) if schema is not None else None
+            expression = pl.col(column).is_in([convert_value(value, dtype) for value in to_value_list(values)])
+            return ~expression if negated else expression
+        expressions = [self.get_filter_expression(df_filter, schema) for df_filter in df_filters]
+        return combine_masks(expressions, [df_filter.joiner for df_filter in df_filters[1:]])
+
+    def get_expression(self, df_filter_manager: DataFrameFilterManager, schema: dict = None) -> 'pl.Expr | None':
+        """
+        Compile all in-use DataFrameFilters of a DataFrameFilterManager into a Polars expression.
+
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :param schema: dict (default: None)
+        The schema of the frame to filter.
+        :return: pl.Expr | None
+        The combined expression, or None if no filters are in use.
+        """
+        groups = df_filter_manager.get_filter_groups()
+        if not groups:
+            return None
+        expressions = [self.get_group_expression(group, schema) for group in groups]
+        return combine_masks(expressions, [group[0].group_joiner for group in groups[1:]])
+
+    def filter_df(self, data_frame: 'pl.DataFrame | pl.LazyFrame',
+                  df_filter_manager: DataFrameFilterManager) -> 'pl.DataFrame | pl.LazyFrame':
+        """
+        Filter a Polars DataFrame or LazyFrame using the in-use DataFrameFilters of a DataFrameFilterManager. A
+        LazyFrame is returned lazily, with the filters pushed down into its scans once collected.
+
+        :param data_frame: pl.DataFrame | pl.LazyFrame
+        The frame to filter.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: pl.DataFrame | pl.LazyFrame
+        The filtered frame, of the same type as the given frame.
+        :raises TypeError: if the frame is not a Polars DataFrame or LazyFrame.
+        """
+        if not is_polars_frame(data_frame):
+            raise TypeError(f"Unrecognized data frame type: {type(data_frame)}")
+        expression = self.get_expression(df_filter_manager, data_frame.collect_schema())
+        return data_frame if expression is None else data_frame.filter(expression)
@@ -0,0 +1,126 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+async def wait_until_done(future: Future) -> None:
+    """
+    Waits for a concurrent future to finish without retrieving its result, and without cancelling it if the waiting
+    task is cancelled.
+
+    :param future: Future
+    The concurrent future to wait for.
+    """
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def set_done(_: Future) -> None:
+        try:
+            loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+        except RuntimeError:
+            # The event loop was closed meanwhile, nobody is waiting anymore
+            pass
+
+    future.add_done_callback(set_done)
+    await done
+
+
+class DataFrameFilterSession:
+    """
+    This class runs the filter requests of one session, such as one touch-screen client, on an executor from asyncio,
+    so that the event loop stays responsive. Only the latest request of a session matters: a newer request cancels an
+    older one that is still debouncing or waiting to start, and an older request that is already running is left to
+    finish with its result discarded while the newer one waits for it, so a session never filters more than once at a
+    time. Awaiting a superseded request raises asyncio.CancelledError.
+    """
+
+    def __init__(self, debounce: float = 0.0, executor: Executor = None):
+        """
+        Initializes a DataFrameFilterSession instance.
+
+        :param debounce: float (default: 0.0)
+        The number of seconds to wait before starting a request, during which a newer request supersedes it without
+        it ever being started.
+        :param executor: Executor (default: None)
+        The executor to run requests on, which may be shared by many sessions. Defaults to a single thread of the
+        session's own, started on first use and shut down by close().
+        :raises ValueError: if debounce is negative.
+        """
+        if debounce < 0:
+            raise ValueError(f"Invalid debounce: {debounce}")
+        self.debounce = debounce
+        self.executor = executor
+        self._own_executor = None
+        self._task = None
+        self._running = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"DataFrameFilterSession(debounce={self.debounce}, executor={self.executor!r})"
+
+    async def __aenter__(self) -> 'DataFrameFilterSession':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Cancel the pending request, if any, and shut down the session's own executor, if it was started.
+        """
+        if self._task is not None:
+            self._task.cancel()
+        with self._lock:
+            if self._own_executor is not None:
+                self._own_executor.shutdown(wait=False, cancel_futures=True)
+                self._own_executor = None
+
+    def get_executor(self) -> Executor:
+        """
+        Get the executor to run requests on, starting the session's own executor if needed.
+
+        :return: Executor
+        """
+        if self.executor is not None:
+            return self.executor
+        with self._lock:
+            if self._own_executor is None:
+                self._own_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='DataFrameFilterSession')
+            return self._own_executor
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a callable on the executor as the latest request of the session, superseding the previous request.
+
+        :param func: Callable[..., Any]
+        The callable to run, such as transude.filter_df_via_manager.
+        :param args:
+        Positional arguments passed to the callable.
+        :param kwargs:
+        Keyword arguments passed to the callable.
+        :return: Any
+        The result of the callable.
+        :raises asyncio.CancelledError: if a newer request supersedes this one.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = asyncio.ensure_future(self._run(functools.partial(func, *args, **kwargs)))
+        return await self._task
+
+    async def _run(self, func: Callable[[], Any]) -> Any:
+        """
+        Debounce a request, wait for a superseded request still running to finish, and run the request.
+
+        :param func: Callable[[], Any]
+        The request to run.
+        :return: Any
+        """
+        if self.debounce > 0:
+            await asyncio.sleep(self.debounce)
+        while self._running is not None and not self._running.done():
+            await wait_until_done(self._running)
+        self._running = self.get_executor().submit(func)
+        # Cancelling this request cancels the submitted one if it has not started yet
+        return await asyncio.wrap_future(self._running)
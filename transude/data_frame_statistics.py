@@ -0,0 +1,424 @@
+import datetime
+import math
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, List
+from .data_frame_cache import DataFrameCache, estimate_nbytes
+from .data_frame_filter import DataFrameFilter
+from .data_frame_filter_manager import DataFrameFilterManager
+from .data_frame_index import RANGE_OPERATORS, excludes_missing_when_unequal
+from .data_frame_mask_engine import DataFrameMaskEngine, apply_str_operator, get_group_signature, plan_terms, \
+    split_terms, to_bool_array
+from .data_frame_version import get_frame_version
+
+
+def to_number(value: Any, kind: str) -> float | None:
+    """
+    Converts a value to the number it is compared as in the histogram of a column of the given dtype kind: the value
+    itself for numeric columns, and nanoseconds for datetime and timedelta columns.
+
+    :param value: Any
+    The value to convert.
+    :param kind: str
+    The kind of the dtype of the column, one of 'i', 'u', 'f', 'M' or 'm'.
+    :return: float | None
+    The number, or None if the value is missing or not compared with the column by value.
+    """
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if kind in 'iuf':
+        if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)):
+            return float(value)
+        return None
+    try:
+        if kind == 'M' and isinstance(value, (str, datetime.datetime, np.datetime64)):
+            timestamp = pd.Timestamp(value)
+            return float(timestamp.value) if timestamp.tz is None else None
+        if kind == 'm' and isinstance(value, (datetime.timedelta, np.timedelta64)):
+            return float(pd.Timedelta(value).value)
+    except ValueError:
+        pass
+    return None
+
+
+def get_numbers(series: pd.Series) -> np.ndarray | None:
+    """
+    Returns the values of a numeric, datetime or timedelta column besides missing values as float64 numbers, with
+    datetimes and timedeltas in nanoseconds.
+
+    :param series: pd.Series
+    The column to convert.
+    :return: np.ndarray | None
+    The numbers, or None if the column does not hold numbers, datetimes or timedeltas.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iufmM':
+        values = series.to_numpy()
+        values = values[~pd.isna(values)]
+        if dtype.kind in 'mM':
+            values = values.astype(f"{dtype.str[1:].split('[')[0]}[ns]").view(np.int64)
+        return values.astype(np.float64)
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in 'iuf' and \
+            not isinstance(dtype, pd.CategoricalDtype):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return values[~np.isnan(values)]
+    return None
+
+
+class ColumnStatistics:
+    """
+    This class holds statistics of a DataFrame column for estimating the fraction of rows a DataFrameFilter matches
+    without evaluating it: the number of missing values, the minimum and maximum, an estimate of the number of distinct
+    values, an equi-depth histogram of numeric, datetime and timedelta columns, the most frequent values and a random
+    sample of the column. Columns with more rows than the sample size are described from the sample, except for the
+    exact number of missing values, minimum and maximum.
+    """
+
+    def __init__(self, series: pd.Series, sample_size: int = 10_000, bins: int = 64, top_k: int = 16,
+                 seed: int = 0):
+        """
+        Initializes a ColumnStatistics instance.
+
+        :param series: pd.Series
+        The column to describe.
+        :param sample_size: int (default: 10_000)
+        The number of rows to sample from longer columns.
+        :param bins: int (default: 64)
+        The number of buckets of the equi-depth histogram.
+        :param top_k: int (default: 16)
+        The number of most frequent values to keep the frequencies of.
+        :param seed: int (default: 0)
+        The seed of the random sample.
+        """
+        self.dtype = series.dtype
+        self.size = len(series)
+        self.null_count = int(series.isna().sum())
+        if self.size > sample_size:
+            positions = np.sort(np.random.default_rng(seed).choice(self.size, sample_size, replace=False))
+            self.sample = series.iloc[positions].reset_index(drop=True)
+        else:
+            self.sample = series.reset_index(drop=True)
+        non_null_sample = self.sample.dropna()
+        non_null_count = self.size - self.null_count
+        scale = non_null_count / len(non_null_sample) if len(non_null_sample) else 0.0
+        counts = non_null_sample.value_counts()
+        counts = counts[counts > 0]
+        if len(non_null_sample) == non_null_count:
+            self.distinct = len(counts)
+        else:
+            # Guaranteed-error estimator: values seen once in the sample stand for many unseen values
+            seen_once = int((counts == 1).sum())
+            if seen_once == len(counts):
+                # No value was seen twice, as in key columns
+                self.distinct = non_null_count
+            else:
+                self.distinct = int(min(math.sqrt(scale) * seen_once + len(counts) - seen_once, non_null_count))
+        top_counts = counts.head(top_k)
+        if len(non_null_sample) < non_null_count:
+            # A value seen once in a sample is no more frequent than any value not seen at all
+            top_counts = top_counts[top_counts > 1]
+        self.top_values = {value: count * scale for value, count in top_counts.items()}
+        try:
+            values = series.dropna() if self.dtype == object else series
+            self.min = values.min()
+            self.max = values.max()
+        except TypeError:
+            # Mixed types cannot be ordered
+            self.min = self.max = None
+        self.kind = None
+        self.histogram = None
+        numbers = get_numbers(series)
+        if numbers is not None and len(numbers):
+            self.kind = self.dtype.kind
+            sample_numbers = get_numbers(non_null_sample)
+            if not len(sample_numbers):
+                # The few numbers of a mostly missing column may all be missed by the sample
+                sample_numbers = numbers
+            self.histogram = np.quantile(sample_numbers, np.linspace(0, 1, bins + 1))
+            self.histogram[0], self.histogram[-1] = numbers.min(), numbers.max()
+            self.top_numbers = {number: count for number, count in
+                                zip(get_numbers(pd.Series(list(self.top_values), dtype=self.dtype)),
+                                    self.top_values.values())}
+        self.nulls_unequal = not excludes_missing_when_unequal(self.dtype)
+
+    def __repr__(self) -> str:
+        return f"ColumnStatistics(dtype={self.dtype}, size={self.size}, null_count={self.null_count}, " \
+               f"distinct={self.distinct}, min={self.min!r}, max={self.max!r})"
+
+    @property
+    def nbytes(self) -> int:
+        histogram_nbytes = 0 if self.histogram is None else self.histogram.nbytes
+        return estimate_nbytes(self.sample) + histogram_nbytes + 100 * len(self.top_values)
+
+    @property
+    def non_null_fraction(self) -> float:
+        return (self.size - self.null_count) / self.size if self.size else 0.0
+
+    def get_equal_fraction(self, value: Any) -> float | None:
+        """
+        Estimate the fraction of rows equal to a value, from the frequency of the value if it is one of the most
+        frequent values, and otherwise by spreading the remaining rows evenly over the remaining distinct values.
+
+        :param value: Any
+        The value to compare with.
+        :return: float | None
+        The fraction, or None if the value cannot be looked up.
+        """
+        if not self.size or pd.api.types.is_scalar(value) and pd.isna(value):
+            return 0.0
+        try:
+            if self.kind is not None:
+                number = to_number(value, self.kind)
+                if number is None:
+                    return None
+                if number < self.histogram[0] or number > self.histogram[-1]:
+                    return 0.0
+                count = self.top_numbers.get(number)
+            else:
+                count = self.top_values.get(value)
+        except TypeError:
+            return None
+        if count is not None:
+            return count / self.size
+        remaining_rows = self.size - self.null_count - sum(self.top_values.values())
+        remaining_distinct = self.distinct - len(self.top_values)
+        if remaining_rows <= 0 or remaining_distinct <= 0:
+            return 0.0
+        return remaining_rows / remaining_distinct / self.size
+
+    def get_unequal_fraction(self, value: Any) -> float | None:
+        """
+        Estimate the fraction of rows matching a '!=' comparison with a value that is not missing.
+
+        :param value: Any
+        The value to compare with.
+        :return: float | None
+        The fraction, or None if the value cannot be looked up.
+        """
+        equal = self.get_equal_fraction(value)
+        if equal is None:
+            return None
+        null_fraction = 1 - self.non_null_fraction if self.nulls_unequal and self.size else 0.0
+        return max(self.non_null_fraction - equal, 0.0) + null_fraction
+
+    def get_range_fraction(self, operator: str, value: Any) -> float | None:
+        """
+        Estimate the fraction of rows matching a '>', '<', '>=' or '<=' comparison with a value from the histogram,
+        interpolating linearly within the bucket the value falls into.
+
+        :param operator: str
+        The comparison operator.
+        :param value: Any
+        The value to compare with.
+        :return: float | None
+        The fraction, or None if the column has no histogram or the value is not compared with it by value.
+        """
+        if self.histogram is None:
+            return None
+        number = to_number(value, self.kind)
+        if number is None:
+            return None
+        histogram = self.histogram
+        bins = len(histogram) - 1
+        if number < histogram[0]:
+            cumulative = 0.0
+        elif number >= histogram[-1]:
+            cumulative = 1.0
+        else:
+            index = min(int(np.searchsorted(histogram, number, side='right')) - 1, bins - 1)
+            low, high = histogram[index], histogram[index + 1]
+            cumulative = (index + ((number - low) / (high - low) if high > low else 1.0)) / bins
+        at_most = cumulative * self.non_null_fraction
+        equal = self.get_equal_fraction(value) or 0.0
+        fractions = {'<=': at_most,
+                     '<': at_most - equal,
+                     '>': self.non_null_fraction - at_most,
+                     '>=': self.non_null_fraction - at_most + equal}
+        return min(max(fractions[operator], 0.0), 1.0)
+
+    def evaluate_sample(self, evaluate: Callable[[pd.Series], Any]) -> float | None:
+        """
+        Estimate the fraction of rows matching a predicate by evaluating it on the sample of the column.
+
+        :param evaluate: Callable[[pd.Series], Any]
+        Evaluates the predicate for each value of a Series.
+        :return: float | None
+        The fraction, or None if the predicate cannot be evaluated.
+        """
+        if not len(self.sample):
+            return 0.0
+        try:
+            return float(to_bool_array(evaluate(self.sample)).mean())
+        except (TypeError, ValueError):
+            return None
+
+    def estimate_selectivity(self, df_filter: DataFrameFilter) -> float | None:
+        """
+        Estimate the fraction of rows a DataFrameFilter on the column matches. String operators and comparisons that
+        the other statistics cannot answer are evaluated on the sample of the column.
+
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to estimate the selectivity of.
+        :return: float | None
+        The fraction, or None if it cannot be estimated.
+        """
+        value = df_filter.value
+        if DataFrameFilter.is_valid_str_operator(df_filter.operator):
+            return self.evaluate_sample(lambda sample: apply_str_operator(sample, df_filter))
+        if DataFrameFilter.is_valid_membership_operator(df_filter.operator):
+            values = df_filter.get_values()
+            if df_filter.operator == 'in':
+                return self.evaluate_sample(lambda sample: sample.isin(values))
+            if self.nulls_unequal:
+                return self.evaluate_sample(lambda sample: ~sample.isin(values))
+            return self.evaluate_sample(lambda sample: ~sample.isin(values) & sample.notna())
+        fraction = None
+        if not (pd.api.types.is_scalar(value) and pd.isna(value)):
+            if df_filter.operator == '==':
+                fraction = self.get_equal_fraction(value)
+            elif df_filter.operator == '!=':
+                fraction = self.get_unequal_fraction(value)
+            elif df_filter.operator in RANGE_OPERATORS:
+                fraction = self.get_range_fraction(df_filter.operator, value)
+        if fraction is not None:
+            return fraction
+        comparison_operator = DataFrameMaskEngine.comparison_operators[df_filter.operator]
+        return self.evaluate_sample(lambda sample: comparison_operator(sample, value))
+
+
+class DataFrameStatistics:
+    """
+    This class computes statistics of DataFrame columns on first use, caches them for the current version of the
+    DataFrame (see get_frame_version), and estimates from them how many rows DataFrameFilters and the filters of a
+    DataFrameFilterManager match without evaluating them, e.g. to show row count hints next to filters. Filters are
+    assumed to be independent of each other.
+    """
+
+    def __init__(self, cache: DataFrameCache = None, sample_size: int = 10_000, bins: int = 64, top_k: int = 16):
+        """
+        Initializes a DataFrameStatistics instance.
+
+        :param cache: DataFrameCache (default: None)
+        Cache for the statistics of columns. Defaults to a new DataFrameCache.
+        :param sample_size: int (default: 10_000)
+        The number of rows to sample from longer columns.
+        :param bins: int (default: 64)
+        The number of buckets of the equi-depth histograms.
+        :param top_k: int (default: 16)
+        The number of most frequent values per column to keep the frequencies of.
+        """
+        if cache is None:
+            cache = DataFrameCache()
+        self.cache = cache
+        self.sample_size = sample_size
+        self.bins = bins
+        self.top_k = top_k
+
+    def __repr__(self) -> str:
+        return f"DataFrameStatistics(cache={self.cache!r}, sample_size={self.sample_size}, bins={self.bins}, " \
+               f"top_k={self.top_k})"
+
+    def get_column_statistics(self, data_frame: pd.DataFrame, column: str) -> ColumnStatistics:
+        """
+        Get the statistics of a column, computing them if they are not cached for the current version of the
+        DataFrame.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame holding the column.
+        :param column: str
+        The column to get the statistics of.
+        :return: ColumnStatistics
+        """
+        key = (get_frame_version(data_frame), 'statistics', column)
+        statistics = self.cache.get(key)
+        if statistics is None:
+            statistics = self.cache.put(key, ColumnStatistics(data_frame[column], self.sample_size, self.bins,
+                                                              self.top_k))
+        return statistics
+
+    def estimate_selectivity(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter) -> float:
+        """
+        Estimate the fraction of the rows of a DataFrame a DataFrameFilter matches. Falls back to the default
+        selectivity of the operator (see DataFrameMaskEngine.selectivities) if it cannot be estimated.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the filter is applied to.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to estimate the selectivity of.
+        :return: float
+        """
+        fraction = self.get_column_statistics(data_frame, df_filter.column).estimate_selectivity(df_filter)
+        return DataFrameMaskEngine.selectivities.get(df_filter.operator, 0.5) if fraction is None else fraction
+
+    def estimate_group_selectivity(self, data_frame: pd.DataFrame, df_filters: List[DataFrameFilter]) -> float:
+        """
+        Estimate the fraction of the rows of a DataFrame a group of DataFrameFilters sharing a filter ID matches.
+        Membership tests add up the fractions of their values, which match disjoint rows.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the filters are applied to.
+        :param df_filters: List[DataFrameFilter]
+        The in-use DataFrameFilters of the group, in query order.
+        :return: float
+        """
+        membership_test = DataFrameFilterManager.get_membership_test(df_filters)
+        # Filters testing against many values at once are estimated on the sample instead
+        if membership_test is not None and len(df_filters) > 1:
+            column, values, negated = membership_test
+            statistics = self.get_column_statistics(data_frame, column)
+            if negated:
+                unequal = statistics.get_unequal_fraction(values[0])
+                equal = [statistics.get_equal_fraction(value) for value in values[1:]]
+                if unequal is not None and None not in equal:
+                    return max(unequal - sum(equal), 0.0)
+            else:
+                equal = [statistics.get_equal_fraction(value) for value in values]
+                if None not in equal:
+                    return min(sum(equal), 1.0)
+        terms = split_terms(df_filters, [df_filter.joiner for df_filter in df_filters[1:]])
+        _, _, selectivity = plan_terms(terms, DataFrameFilter.get_signature,
+                                       lambda df_filter: (0.0, self.estimate_selectivity(data_frame, df_filter)))
+        return selectivity
+
+    def estimate_manager_selectivity(self, data_frame: pd.DataFrame,
+                                     df_filter_manager: DataFrameFilterManager) -> float:
+        """
+        Estimate the fraction of the rows of a DataFrame the in-use DataFrameFilters of a DataFrameFilterManager match.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the filters are applied to.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: float
+        """
+        groups = df_filter_manager.get_filter_groups()
+        if not groups:
+            return 1.0
+        terms = split_terms(groups, [group[0].group_joiner for group in groups[1:]])
+        _, _, selectivity = plan_terms(terms, get_group_signature,
+                                       lambda group: (0.0, self.estimate_group_selectivity(data_frame, group)))
+        return selectivity
+
+    def estimate_filter_rows(self, data_frame: pd.DataFrame, df_filter: DataFrameFilter) -> int:
+        """
+        Estimate the number of rows of a DataFrame a DataFrameFilter matches.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the filter is applied to.
+        :param df_filter: DataFrameFilter
+        The DataFrameFilter to estimate the number of rows of.
+        :return: int
+        """
+        return round(self.estimate_selectivity(data_frame, df_filter) * len(data_frame))
+
+    def estimate_rows(self, data_frame: pd.DataFrame, df_filter_manager: DataFrameFilterManager) -> int:
+        """
+        Estimate the number of rows of a DataFrame the in-use DataFrameFilters of a DataFrameFilterManager match.
+
+        :param data_frame: pd.DataFrame
+        The DataFrame the filters are applied to.
+        :param df_filter_manager: DataFrameFilterManager
+        The DataFrameFilterManager holding the filters.
+        :return: int
+        """
+        return round(self.estimate_manager_selectivity(data_frame, df_filter_manager) * len(data_frame))
@@ -0,0 +1,97 @@
+import os
+import pandas as pd
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Union
+
+CSV_SUFFIXES = ('.csv', '.tsv')
+JSON_LINES_SUFFIXES = ('.jsonl', '.ndjson', '.json')
+
+SourceTyping = Union[str, os.PathLike, Iterable[pd.DataFrame]]
+SinkTyping = Union[str, os.PathLike, Callable[[pd.DataFrame], None]]
+
+
+def get_file_format(path: str | os.PathLike) -> str:
+    """
+    Returns the format of a file from its suffixes, ignoring compression suffixes such as '.gz'.
+
+    :param path: str | os.PathLike
+    The path of the file.
+    :return: str
+    Either 'csv' or 'jsonl'.
+    :raises ValueError: if the format cannot be determined.
+    """
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    if any(suffix in CSV_SUFFIXES for suffix in suffixes):
+        return 'csv'
+    if any(suffix in JSON_LINES_SUFFIXES for suffix in suffixes):
+        return 'jsonl'
+    raise ValueError(f"Unrecognized file format: {path}")
+
+
+def read_chunks(source: SourceTyping, chunksize: int = 100_000, **read_kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Reads a CSV or JSON lines file in chunks of rows, so that only one chunk is held in memory at a time. Iterables
+    of DataFrames are passed through.
+
+    :param source: str | os.PathLike | Iterable[pd.DataFrame]
+    The path of a CSV file ('.csv', '.tsv') or JSON lines file ('.jsonl', '.ndjson', '.json'), optionally compressed,
+    or an iterable of DataFrame chunks.
+    :param chunksize: int (default: 100_000)
+    The number of rows per chunk read from a file.
+    :param read_kwargs:
+    Keyword arguments passed to pandas.read_csv() or pandas.read_json(), such as dtype. Passing dtype keeps the
+    dtypes of the columns stable between chunks, which otherwise are inferred separately for each chunk.
+    :return: Iterator[pd.DataFrame]
+    :raises ValueError: if the format of the file cannot be determined.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        yield from source
+        return
+    if chunksize <= 0:
+        raise ValueError(f"Invalid chunksize: {chunksize}")
+    if get_file_format(source) == 'csv':
+        if 'sep' not in read_kwargs and '.tsv' in [suffix.lower() for suffix in Path(source).suffixes]:
+            read_kwargs['sep'] = '\t'
+        reader = pd.read_csv(source, chunksize=chunksize, **read_kwargs)
+    else:
+        reader = pd.read_json(source, lines=True, chunksize=chunksize, **read_kwargs)
+    with reader:
+        yield from reader
+
+
+def write_chunks(chunks: Iterable[pd.DataFrame], sink: SinkTyping, **write_kwargs) -> int:
+    """
+    Writes DataFrame chunks one at a time to a CSV or JSON lines file, or passes them to a callable.
+
+    :param chunks: Iterable[pd.DataFrame]
+    The chunks to write, such as the filtered chunks of filter_df_chunks().
+    :param sink: str | os.PathLike | Callable[[pd.DataFrame], None]
+    The path of a CSV file ('.csv', '.tsv') or JSON lines file ('.jsonl', '.ndjson', '.json') to write, or a
+    callable to call with each chunk.
+    :param write_kwargs:
+    Keyword arguments passed to DataFrame.to_csv() or DataFrame.to_json().
+    :return: int
+    The number of rows written.
+    :raises ValueError: if the format of the file cannot be determined or the file is to be compressed.
+    """
+    rows = 0
+    if callable(sink):
+        for chunk in chunks:
+            sink(chunk)
+            rows += len(chunk)
+        return rows
+    if Path(sink).suffix.lower() not in CSV_SUFFIXES + JSON_LINES_SUFFIXES:
+        raise ValueError(f"Unrecognized or compressed file format: {sink}")
+    file_format = get_file_format(sink)
+    if file_format == 'csv':
+        write_kwargs.setdefault('index', False)
+        if '.tsv' in [suffix.lower() for suffix in Path(sink).suffixes]:
+            write_kwargs.setdefault('sep', '\t')
+    with open(sink, 'w', newline='', encoding='utf-8') as file:
+        for i, chunk in enumerate(chunks):
+            if file_format == 'csv':
+                chunk.to_csv(file, header=i == 0, **write_kwargs)
+            elif len(chunk):
+                file.write(chunk.to_json(orient='records', lines=True, **write_kwargs))
+            rows += len(chunk)
+    return rows
@@ -0,0 +1,75 @@
+import itertools
+import threading
+import weakref
+import pandas as pd
+from typing import Tuple
+
+FrameVersion = Tuple[int, int, Tuple[int, ...]]
+
+_next_serial = itertools.count()
+_frames = {}
+_lock = threading.Lock()
+_generation = 0
+
+
+def _get_entry(data_frame: pd.DataFrame) -> list:
+    """
+    Returns the registry entry of a DataFrame, registering the DataFrame under a new serial if needed.
+
+    :param data_frame: pd.DataFrame
+    The DataFrame to look up.
+    :return: list
+    The [weak reference, serial, version] entry of the DataFrame.
+    """
+    key = id(data_frame)
+    entry = _frames.get(key)
+    if entry is None or entry[0]() is not data_frame:
+        entry = [weakref.ref(data_frame, lambda _, key=key: _frames.pop(key, None)), next(_next_serial), 0]
+        _frames[key] = entry
+    return entry
+
+
+def get_frame_version(data_frame: pd.DataFrame) -> FrameVersion:
+    """
+    Returns a hashable token identifying a DataFrame and its current version.
+
+    The token changes whenever the DataFrame is replaced by another object, changes shape, or is passed to
+    bump_frame_version(). Unlike id(), the serial of a DataFrame is never reused by another DataFrame.
+
+    :param data_frame: pd.DataFrame
+    The DataFrame to identify.
+    :return: FrameVersion
+    The (serial, version, shape) token of the DataFrame.
+    """
+    with _lock:
+        entry = _get_entry(data_frame)
+        return entry[1], entry[2], data_frame.shape
+
+
+def bump_frame_version(data_frame: pd.DataFrame) -> int:
+    """
+    Marks a DataFrame as modified so that anything cached against its previous version is no longer used.
+
+    Call this after mutating a DataFrame in place, e.g. after assigning to a column or through .loc/.iloc.
+
+    :param data_frame: pd.DataFrame
+    The DataFrame that was modified.
+    :return: int
+    The new version of the DataFrame.
+    """
+    global _generation
+    with _lock:
+        entry = _get_entry(data_frame)
+        entry[2] += 1
+        _generation += 1
+        return entry[2]
+
+
+def get_frame_generation() -> int:
+    """
+    Returns a counter that bump_frame_version() increments for any DataFrame, to tell in constant time that no
+    DataFrame was marked as modified since.
+
+    :return: int
+    """
+    return _generation